@@ -1,20 +1,40 @@
 from __future__ import annotations
 
 import asyncio
+import hmac
 import logging
+import mimetypes
 from contextlib import asynccontextmanager
+from pathlib import Path
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
 from markupsafe import Markup
+from pydantic import BaseModel, Field
 from sqladmin import Admin, ModelView
 
+from core import metrics, profiling
 from core.domain.job import Job
-from core.infra.db import create_db_and_tables, get_engine
+from core.infra.db import create_db_and_tables, get_engine, session_scope
+from core.infra.executor import run_blocking
+from core.infra.redis import get_async_redis
 from core.logging import configure_logging
+from core.ports.storage_port import StoragePort, StoredFile
+from core.services import admission, download_links, retention
+from core.services.queue import get_queue_pool
 from core.settings import get_settings
+from core.tracing import configure_tracing
 from mcp_music_forge.mcp_app import mcp
+from mcp_music_forge.tools.cancel_job import CancelJobResult, cancel_job
 from mcp_music_forge.tools.enqueue_download import (
     EnqueueOptions,
     EnqueueResult,
@@ -23,7 +43,13 @@ from mcp_music_forge.tools.enqueue_download import (
 from mcp_music_forge.tools.get_job_status import (
     GetJobStatusResult,
     get_job_status,
+    primary_suffix,
+)
+from mcp_music_forge.tools.get_jobs_status import (
+    GetJobsStatusResult,
+    get_jobs_status,
 )
+from storage import final_artifact, get_storage
 
 
 @asynccontextmanager
@@ -31,31 +57,15 @@ async def lifespan(app: FastAPI):
     settings = get_settings()
     configure_logging(logging.INFO)
     create_db_and_tables()
+    metrics.register_cluster_collector()
+    loop_monitor = profiling.start_loop_monitor()
     # Minimal OTEL setup if OTLP endpoint provided
-    if settings.otel_endpoint:
+    if configure_tracing(settings):
         try:
-            from opentelemetry import trace
-            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
-                OTLPSpanExporter,
-            )
             from opentelemetry.instrumentation.fastapi import (
                 FastAPIInstrumentor,
             )
-            from opentelemetry.sdk.resources import SERVICE_NAME, Resource
-            from opentelemetry.sdk.trace import TracerProvider
-            from opentelemetry.sdk.trace.export import BatchSpanProcessor
-
-            provider = TracerProvider(
-                resource=Resource.create(
-                    {SERVICE_NAME: settings.otel_service_name}
-                )
-            )
-            provider.add_span_processor(
-                BatchSpanProcessor(
-                    OTLPSpanExporter(endpoint=settings.otel_endpoint)
-                )
-            )
-            trace.set_tracer_provider(provider)
+
             FastAPIInstrumentor.instrument_app(app)
         except Exception as e:
             # Observability is optional; continue without failing, but log why
@@ -68,13 +78,17 @@ async def lifespan(app: FastAPI):
             from aiogram.client.default import DefaultBotProperties
             from aiogram.enums import ParseMode
 
+            from bot.forge_client import InProcessForgeClient
             from bot.main import dp as bot_dp
 
             tg_bot = Bot(
                 token=settings.telegram_bot_token,
                 default=DefaultBotProperties(parse_mode=ParseMode.HTML),
             )
-            bot_task = asyncio.create_task(bot_dp.start_polling(tg_bot))
+            # Co-located with the API: skip the loopback HTTP hop
+            bot_task = asyncio.create_task(
+                bot_dp.start_polling(tg_bot, forge=InProcessForgeClient())
+            )
             logging.getLogger(__name__).info("Telegram bot started inline with API")
         except Exception as e:
             logging.getLogger(__name__).warning("Bot startup skipped: %s", e)
@@ -90,6 +104,8 @@ async def lifespan(app: FastAPI):
             await bot_task
         except asyncio.CancelledError:
             pass
+    if loop_monitor is not None:
+        await loop_monitor.stop()
 
 
 app = FastAPI(title="MCP Music Forge", version="0.1.0", lifespan=lifespan)
@@ -252,16 +268,123 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> Response:
+    # Sync on purpose: collectors do blocking Redis/disk reads
+    return Response(metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
+
+
+def _is_admin(token: str | None) -> bool:
+    expected = get_settings().admin_token
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not get_settings().admin_token:
+        # Profiling endpoints don't exist unless ADMIN_TOKEN is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post(
+    "/debug/profile",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+async def debug_profile(
+    seconds: float = 10.0, interval_ms: float = 5.0
+) -> PlainTextResponse:
+    """Sample this API process for ``seconds``; returns folded stacks."""
+    if not 0 < seconds <= get_settings().profile_max_seconds:
+        raise HTTPException(status_code=400, detail="seconds out of range")
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be >= 1")
+    profiler = profiling.SamplingProfiler(interval_ms / 1000).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    return PlainTextResponse(profiler.folded())
+
+
+@app.post(
+    "/debug/profile/jobs/{job_id}",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+async def debug_profile_job(job_id: str) -> dict[str, str]:
+    """Ask the worker that picks up ``job_id`` next to profile it."""
+    await profiling.request_job_profile(get_async_redis(), job_id)
+    return {"job_id": job_id, "profile": f"/debug/profiles/job-{job_id}"}
+
+
+@app.get(
+    "/debug/profiles/{name}",
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+async def debug_profile_file(name: str) -> FileResponse:
+    path = profiling.profiles_dir() / f"{name}.folded"
+    if path.name != f"{name}.folded" or not path.is_file():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain")
+
+
 @app.post("/download", response_model=EnqueueResult)
 async def api_enqueue(
-    url: str, options: EnqueueOptions | None = None
+    request: Request,
+    url: str,
+    options: EnqueueOptions | None = None,
+    x_admin_token: str | None = Header(default=None),
 ) -> EnqueueResult:
+    options = options or EnqueueOptions()
+    if options.client_id is None or not _is_admin(x_admin_token):
+        # Only trusted relays (the bot) pick their own key; anyone else
+        # could dodge ADMISSION_MAX_CLIENT_JOBS with a fresh id per request
+        host = request.client.host if request.client else "unknown"
+        options.client_id = f"http:{host}"
     try:
         return await enqueue_download(url, options)
+    except admission.AdmissionRejectedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.as_dict(),
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
     except Exception as e:  # noqa: BLE001
         raise HTTPException(status_code=400, detail=str(e)) from e
 
 
+@app.get("/limits")
+async def api_limits(
+    client_id: str | None = None,
+) -> dict[str, dict[str, int | None]]:
+    """Admission thresholds and current usage; a limit of 0 is disabled."""
+    current = await admission.limits(await get_queue_pool(), client_id)
+    return admission.as_json(current)
+
+
+class JobsStatusRequest(BaseModel):
+    job_ids: list[str]
+    fields: list[str] | None = Field(
+        default=None,
+        description="Optional fields to include; default all but artifacts",
+    )
+
+
+@app.post(
+    "/jobs/status",
+    response_model=GetJobsStatusResult,
+    response_model_exclude_unset=True,
+)
+async def api_jobs_status(req: JobsStatusRequest) -> GetJobsStatusResult:
+    try:
+        return await get_jobs_status(req.job_ids, req.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
 @app.get("/jobs/{job_id}", response_model=GetJobStatusResult)
 async def api_job(job_id: str) -> GetJobStatusResult:
     try:
@@ -270,37 +393,141 @@ async def api_job(job_id: str) -> GetJobStatusResult:
         raise HTTPException(status_code=404, detail=str(e)) from e
 
 
+@app.post("/jobs/{job_id}/cancel", response_model=CancelJobResult)
+async def api_cancel_job(job_id: str) -> CancelJobResult:
+    try:
+        return await cancel_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+
 @app.get("/jobs/{job_id}/download")
-async def download_job_artifact(job_id: str):
+async def download_job_artifact(job_id: str, request: Request) -> Response:
     """
     Download the final artifact for a job.
+
+    Redirects to a short-lived URL when the storage issues one (presigned
+    object, signed local link); otherwise local files are handed to the
+    proxy or served directly and objects are streamed (with ranges).
+    """
+    storage = get_storage()
+    artifact = await run_blocking(_primary_artifact, storage, job_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="No artifacts found")
+    await run_blocking(retention.touch, job_id)
+    url = await run_blocking(storage.url, job_id, "final", artifact.name)
+    if url:
+        return RedirectResponse(url, status_code=307)
+    if artifact.path is not None:
+        return _send_file(artifact.path, artifact.name)
+    return await _stream_artifact(
+        storage, job_id, artifact, request.headers.get("range")
+    )
+
+
+@app.get(
+    get_settings().download_link_prefix.rstrip("/") + "/{path:path}",
+    include_in_schema=False,
+)
+async def signed_download(
+    path: str, request: Request, st: str = "", ts: str = "", e: str = ""
+) -> Response:
+    """
+    Serve a signed link when the proxy does not check them itself; no
+    database access, like the proxy.
     """
     settings = get_settings()
-    final_dir = settings.storage_dir / "jobs" / job_id / "final"
-    if not final_dir.exists():
-        raise HTTPException(status_code=404, detail="Job files not found")
-
-    # Find first file
-    # Prioritize audio files
-    audio_extensions = {".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg", ".opus"}
-    files = [f for f in final_dir.iterdir() if f.is_file() and not f.name.startswith(".")]
-    
-    audio_files = [f for f in files if f.suffix.lower() in audio_extensions]
-    
-    if audio_files:
-        file_to_serve = audio_files[0]
+    # The decoded full path, like nginx's $uri; request.url.path is rebuilt
+    # from it and cuts names with "#" or "?" short
+    uri = request.scope["path"]
+    if not settings.download_link_secret or not download_links.verify(
+        uri, st, ts, e, secret=settings.download_link_secret
+    ):
+        raise HTTPException(status_code=403, detail="Invalid or expired link")
+    file = settings.storage_dir / path
+    jobs_root = (settings.storage_dir / "jobs").resolve()
+    if not file.resolve().is_relative_to(jobs_root) or not file.is_file():
+        raise HTTPException(status_code=404, detail="No artifacts found")
+    return _send_file(file, file.name)
+
+
+def _send_file(path: Path, name: str) -> Response:
+    """A local file, sent by the front proxy when DOWNLOAD_OFFLOAD is set."""
+    settings = get_settings()
+    headers = {
+        "Content-Disposition": f"attachment; filename*=utf-8''{quote(name)}"
+    }
+    if settings.download_offload == "nginx":
+        rel = path.relative_to(settings.storage_dir).as_posix()
+        headers["X-Accel-Redirect"] = quote(
+            settings.download_offload_prefix + rel
+        )
+    elif settings.download_offload == "sendfile":
+        headers["X-Sendfile"] = str(path.resolve())
     else:
-        # Fallback: try to find anything that is NOT an image or json
-        other_files = [
-            f for f in files 
-            if f.suffix.lower() not in {".jpg", ".jpeg", ".png", ".webp", ".json"}
-        ]
-        if other_files:
-            file_to_serve = other_files[0]
-        elif files:
-             # Last resort: serve whatever is there (e.g. just an image if download failed partially)
-            file_to_serve = files[0]
-        else:
-            raise HTTPException(status_code=404, detail="No artifacts found")
-
-    return FileResponse(file_to_serve, filename=file_to_serve.name)
+        return FileResponse(path, filename=name)
+    return Response(
+        media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+        headers=headers,
+    )
+
+
+def _primary_artifact(storage: StoragePort, job_id: str) -> StoredFile | None:
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        prefer = primary_suffix(job.options) if job else None
+    return final_artifact(storage, job_id, prefer)
+
+
+def _byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """First range of a ``bytes=a-b`` header; None for the whole file."""
+    if not header or not header.startswith("bytes="):
+        return None
+    first, _, last = header[6:].split(",")[0].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:  # suffix: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+
+async def _stream_artifact(
+    storage: StoragePort, job_id: str, artifact: StoredFile, range_: str | None
+) -> StreamingResponse:
+    size = artifact.size
+    span = _byte_range(range_, size)
+    start, end = span or (0, size - 1)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+        "Content-Disposition": (
+            f"attachment; filename*=utf-8''{quote(artifact.name)}"
+        ),
+    }
+    if span:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    try:
+        chunks = await run_blocking(
+            storage.iter_bytes,
+            job_id,
+            "final",
+            artifact.name,
+            start,
+            end if span else None,
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail="No artifacts found") from e
+    return StreamingResponse(
+        chunks,
+        status_code=206 if span else 200,
+        media_type=mimetypes.guess_type(artifact.name)[0]
+        or "application/octet-stream",
+        headers=headers,
+    )
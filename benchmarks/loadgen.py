@@ -0,0 +1,537 @@
+"""
+End-to-end load generator: enqueue-to-completion latency percentiles.
+
+Submits jobs at a fixed (or Poisson) rate through ``POST /download`` and
+the MCP ``enqueue_download`` tool, runs real arq workers in-process, and
+polls ``GET /jobs/{id}`` until each job finishes. Media comes from a local
+HTTP server handing out synthetic WAV files, downloaded by a provider that
+streams them like a real one would.
+
+    python -m benchmarks.loadgen --rate 2 --seconds 30 --workers 2
+    python -m benchmarks.loadgen --max-jobs 4 --format wav --json out.json
+
+Redis is a fakeredis TCP server on localhost unless ``--redis-url`` is
+given. Reported, as p50/p95/p99/max: enqueue latency per entry point,
+queue wait (enqueued -> worker start), processing time, end-to-end time
+as seen by the poller, and status-poll latency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import wave
+from array import array
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import Any, cast
+
+_SAMPLE_RATE = 44100
+
+
+@dataclass
+class JobTiming:
+    via: str
+    submitted: float
+    enqueued: float | None = None
+    observed: float | None = None
+    status: str | None = None
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--rate", type=float, default=1.0, help="Jobs per second")
+    p.add_argument(
+        "--seconds", type=float, default=20.0, help="How long to submit"
+    )
+    p.add_argument(
+        "--poisson",
+        action="store_true",
+        help="Exponential inter-arrival times instead of a fixed rate",
+    )
+    p.add_argument(
+        "--mcp-share",
+        type=float,
+        default=0.5,
+        help="Fraction of jobs submitted via the MCP tool (default: 0.5)",
+    )
+    p.add_argument("--workers", type=int, default=1, help="arq workers")
+    p.add_argument(
+        "--max-jobs", type=int, default=1, help="Concurrent jobs per worker"
+    )
+    p.add_argument(
+        "--poll-delay",
+        type=float,
+        default=0.5,
+        help="arq queue poll delay (default: arq's 0.5s)",
+    )
+    p.add_argument("--format", default="mp3", help="Target format")
+    p.add_argument("--quality", default="v0")
+    p.add_argument(
+        "--media-seconds",
+        type=int,
+        default=30,
+        help="Length of the served audio (default: 30)",
+    )
+    p.add_argument(
+        "--status-interval",
+        type=float,
+        default=0.5,
+        help="Seconds between status polls per job",
+    )
+    p.add_argument(
+        "--timeout",
+        type=float,
+        default=300.0,
+        help="Give up waiting for jobs after this long",
+    )
+    p.add_argument("--redis-url", default=None, help="Use a real Redis")
+    p.add_argument(
+        "--storage-dir",
+        type=Path,
+        default=None,
+        help="Where job files go (default: scratch dir)",
+    )
+    p.add_argument(
+        "--provider-limits",
+        action="store_true",
+        help="Keep PROVIDER_* rate limits instead of lifting them",
+    )
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument(
+        "--keep", action="store_true", help="Keep the scratch directory"
+    )
+    p.add_argument("--json", type=Path, default=None, help="Write results")
+    return p.parse_args(argv)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def _sine_wav(seconds: int) -> bytes:
+    """Mono 16-bit 440 Hz tone with a little deterministic noise."""
+    rng = random.Random(seconds)  # noqa: S311 - test signal, not crypto
+    step = 2 * math.pi * 440 / _SAMPLE_RATE
+    period = [
+        int(12000 * math.sin(i * step)) for i in range(_SAMPLE_RATE // 440)
+    ]
+    noise = [rng.randint(-500, 500) for _ in range(997)]
+    frames = array(
+        "h",
+        (
+            period[i % len(period)] + noise[i % len(noise)]
+            for i in range(seconds * _SAMPLE_RATE)
+        ),
+    )
+    if sys.byteorder == "big":
+        frames.byteswap()
+    buf = BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(_SAMPLE_RATE)
+        w.writeframes(frames.tobytes())
+    return buf.getvalue()
+
+
+def _start_media_server(body: bytes) -> tuple[ThreadingHTTPServer, str]:
+    """Serve the same WAV at every /track/<n>.wav path."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 - http.server API
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/wav")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_: Any) -> None:
+            return None
+
+    server = ThreadingHTTPServer(("127.0.0.1", _free_port()), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    if isinstance(host, bytes):
+        host = host.decode()
+    return server, f"http://{host}:{port}"
+
+
+def _start_fake_redis() -> str:
+    import arq.worker
+    from fakeredis import TcpFakeServer
+
+    async def _no_redis_info(*_: Any) -> None:
+        return None
+
+    # fakeredis has no INFO command, which arq workers log on startup
+    arq.worker.log_redis_info = _no_redis_info  # type: ignore[assignment]
+
+    port = _free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def _configure(workdir: Path, redis_url: str, args: argparse.Namespace) -> None:
+    """Point settings at scratch storage/db before anything reads them."""
+    storage = args.storage_dir or workdir / "data"
+    os.environ["STORAGE_DIR"] = str(storage)
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/db.sqlite3"
+    os.environ["REDIS_URL"] = redis_url
+    if not args.provider_limits:
+        os.environ["PROVIDER_RATE"] = "1000000"
+        os.environ["PROVIDER_BURST"] = "1000000"
+        os.environ["PROVIDER_MAX_CONCURRENCY"] = str(
+            max(args.workers * args.max_jobs, 1)
+        )
+
+    from core.settings import get_settings
+
+    get_settings.cache_clear()
+
+
+def _make_provider(base_url: str, media_seconds: int) -> Any:
+    import httpx
+
+    from core.ports.provider_port import (
+        DownloadProgress,
+        ProbeResult,
+        ProgressHook,
+        ProviderPort,
+    )
+
+    class HttpMediaProvider(ProviderPort):
+        """Streams files from the local media server to ``dest_dir``."""
+
+        name = "http-media"
+
+        def can_handle(self, url: str) -> bool:
+            return url.startswith(base_url)
+
+        async def probe(self, url: str) -> ProbeResult:
+            return ProbeResult(
+                provider=self.name,
+                can_download=True,
+                normalized_id=url,
+                title=url.rsplit("/", 1)[-1],
+                artist="Loadgen",
+                duration=media_seconds,
+                artwork_url=None,
+                reason_if_denied=None,
+            )
+
+        async def download(
+            self,
+            url: str,
+            dest_dir: str,
+            *,
+            respect_tou: bool = True,
+            progress: ProgressHook | None = None,
+        ) -> tuple[str, ProbeResult]:
+            dest = Path(dest_dir) / url.rsplit("/", 1)[-1]
+            started = time.monotonic()
+            async with httpx.AsyncClient() as client:
+                async with client.stream("GET", url) as resp:
+                    resp.raise_for_status()
+                    total = int(resp.headers.get("content-length", 0))
+                    done = 0
+                    with dest.open("wb") as f:
+                        async for chunk in resp.aiter_bytes(1 << 16):
+                            f.write(chunk)
+                            done += len(chunk)
+                            if progress is not None:
+                                elapsed = max(time.monotonic() - started, 1e-6)
+                                progress(
+                                    DownloadProgress(
+                                        done, total or None, done / elapsed, 0
+                                    )
+                                )
+            return str(dest), await self.probe(url)
+
+    return HttpMediaProvider()
+
+
+def _job_id_from_tool_result(result: Any) -> str:
+    """FastMCP returns content blocks, or (blocks, structured) pairs."""
+    if isinstance(result, tuple):
+        result = result[1]
+    if isinstance(result, dict):
+        return str(result.get("result", result)["job_id"])
+    return str(json.loads(result[0].text)["job_id"])
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(q: float) -> float:
+        return ordered[max(math.ceil(len(ordered) * q) - 1, 0)]
+
+    return {
+        "n": len(ordered),
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": ordered[-1],
+    }
+
+
+class LoadRun:
+    def __init__(self, args: argparse.Namespace, media_url: str) -> None:
+        self.args = args
+        self.media_url = media_url
+        self.rng = random.Random(args.seed)  # noqa: S311
+        self.timings: dict[str, JobTiming] = {}
+        # Workers may pick a job up before its enqueue call has returned
+        self.started: dict[str, float] = {}
+        self.finished: dict[str, float] = {}
+        self.poll_latencies: list[float] = []
+        self.errors: list[str] = []
+
+    def install_worker_timer(self) -> None:
+        """Record when workers start/finish each job."""
+        import workers.tasks as tasks
+
+        process_job = tasks.process_job
+
+        async def timed(job_id: str) -> None:
+            self.started.setdefault(job_id, time.perf_counter())
+            try:
+                await process_job(job_id)
+            finally:
+                self.finished[job_id] = time.perf_counter()
+
+        tasks.process_job = timed
+
+    async def submit(self, n: int, http: Any) -> None:
+        from mcp_music_forge.mcp_app import mcp
+
+        url = f"{self.media_url}/track/{n}.wav"
+        options = {"format": self.args.format, "quality": self.args.quality}
+        via = "mcp" if self.rng.random() < self.args.mcp_share else "http"
+        t0 = time.perf_counter()
+        try:
+            if via == "http":
+                resp = await http.post(
+                    "/download", params={"url": url}, json=options
+                )
+                resp.raise_for_status()
+                job_id = resp.json()["job_id"]
+            else:
+                result = await mcp.call_tool(
+                    "enqueue_download", {"url": url, "options": options}
+                )
+                job_id = _job_id_from_tool_result(result)
+        except Exception as e:  # noqa: BLE001
+            self.errors.append(f"enqueue via {via}: {e}")
+            return
+        timing = JobTiming(via=via, submitted=t0)
+        timing.enqueued = time.perf_counter()
+        self.timings[job_id] = timing
+        await self.poll(job_id, timing, http)
+
+    async def poll(self, job_id: str, timing: JobTiming, http: Any) -> None:
+        deadline = time.perf_counter() + self.args.timeout
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(self.args.status_interval)
+            t0 = time.perf_counter()
+            resp = await http.get(f"/jobs/{job_id}")
+            self.poll_latencies.append(time.perf_counter() - t0)
+            status = resp.json().get("status")
+            if status in ("succeeded", "failed", "cancelled", "timed_out"):
+                timing.observed = time.perf_counter()
+                timing.status = status
+                return
+        timing.status = "timeout"
+
+    def arrivals(self) -> list[float]:
+        """Offsets (seconds from start) at which jobs are submitted."""
+        out: list[float] = []
+        t = 0.0
+        while t < self.args.seconds:
+            out.append(t)
+            if self.args.poisson:
+                t += self.rng.expovariate(self.args.rate)
+            else:
+                t += 1 / self.args.rate
+        return out
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        jobs = list(self.timings.values())
+        done = [t for t in jobs if t.status == "succeeded"]
+        started, finished = self.started, self.finished
+        series: dict[str, list[float]] = {
+            "enqueue (http)": [
+                t.enqueued - t.submitted
+                for t in jobs
+                if t.via == "http" and t.enqueued
+            ],
+            "enqueue (mcp)": [
+                t.enqueued - t.submitted
+                for t in jobs
+                if t.via == "mcp" and t.enqueued
+            ],
+            "queue wait": [
+                started[j] - t.enqueued
+                for j, t in self.timings.items()
+                if j in started and t.enqueued
+            ],
+            "processing": [
+                finished[j] - started[j] for j in finished if j in started
+            ],
+            "end to end": [
+                t.observed - t.submitted for t in done if t.observed
+            ],
+            "status poll": self.poll_latencies,
+        }
+        statuses: dict[str, int] = {}
+        for t in jobs:
+            statuses[t.status or "unknown"] = (
+                statuses.get(t.status or "unknown", 0) + 1
+            )
+        return {
+            "params": {
+                k: str(v) if isinstance(v, Path) else v
+                for k, v in vars(self.args).items()
+                if k != "json"
+            },
+            "elapsed": elapsed,
+            "submitted": len(jobs),
+            "statuses": statuses,
+            "throughput": len(done) / elapsed if elapsed else 0.0,
+            "errors": self.errors[:20],
+            "latency": {k: _percentiles(v) for k, v in series.items()},
+        }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(
+        f"{report['submitted']} jobs in {report['elapsed']:.1f}s, "
+        f"{report['throughput']:.2f} completed/s, "
+        f"statuses {report['statuses']}"
+    )
+    print(
+        f"{'latency (s)':<16} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+        f"{'max':>8}"
+    )
+    for name, p in report["latency"].items():
+        if not p:
+            continue
+        print(
+            f"{name:<16} {p['n']:>6} {p['p50']:8.3f} {p['p95']:8.3f} "
+            f"{p['p99']:8.3f} {p['max']:8.3f}"
+        )
+    for err in report["errors"]:
+        print(f"error: {err}", file=sys.stderr)
+
+
+async def _run(args: argparse.Namespace, media_url: str) -> dict[str, Any]:
+    import httpx
+    from arq.typing import WorkerCoroutine
+    from arq.worker import Worker
+
+    import workers.tasks as tasks
+    from api.main import app
+    from core.infra.db import create_db_and_tables
+    from core.services.queue import get_queue_pool
+
+    create_db_and_tables()
+    run = LoadRun(args, media_url)
+    run.install_worker_timer()
+
+    pool = await get_queue_pool()
+    workers = [
+        Worker(
+            functions=cast(
+                list[WorkerCoroutine], tasks.WorkerSettings.functions
+            ),
+            redis_pool=pool,
+            max_jobs=args.max_jobs,
+            poll_delay=args.poll_delay,
+            handle_signals=False,
+            keep_result=0,
+            log_results=False,
+        )
+        for _ in range(args.workers)
+    ]
+    worker_tasks = [asyncio.create_task(w.async_run()) for w in workers]
+
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadgen"
+        ) as http:
+            pending: list[asyncio.Task[None]] = []
+            for n, offset in enumerate(run.arrivals()):
+                delay = started + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                pending.append(asyncio.create_task(run.submit(n, http)))
+            await asyncio.gather(*pending)
+    finally:
+        crashed = [t for t in worker_tasks if t.done() and t.exception()]
+        for t in worker_tasks:
+            t.cancel()
+        await asyncio.gather(*worker_tasks, return_exceptions=True)
+        for t in crashed:
+            run.errors.append(f"worker crashed: {t.exception()!r}")
+        for w in workers:
+            await w.close()
+    return run.report(time.perf_counter() - started)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    from core.logging import configure_logging
+
+    configure_logging(logging.WARNING)
+    if args.rate <= 0:
+        print("--rate must be positive", file=sys.stderr)
+        return 2
+    workdir = Path(tempfile.mkdtemp(prefix="forge-loadgen-"))
+    media, media_url = _start_media_server(_sine_wav(args.media_seconds))
+    redis_url = args.redis_url or _start_fake_redis()
+    _configure(workdir, redis_url, args)
+
+    import mcp_music_forge.tools.enqueue_download as enqueue_tool
+    from core.services import provider_registry
+
+    provider = _make_provider(media_url, args.media_seconds)
+    provider_registry.detect_provider = lambda url, *_: provider
+    enqueue_tool.detect_provider = provider_registry.detect_provider
+
+    try:
+        report = asyncio.run(_run(args, media_url))
+    finally:
+        media.shutdown()
+        if args.keep:
+            print(f"Scratch kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    _print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    failed = report["statuses"].get("failed", 0) + len(report["errors"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
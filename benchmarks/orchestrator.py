@@ -0,0 +1,485 @@
+"""
+End-to-end benchmark of the download orchestrator.
+
+Runs ``process_job`` against a local provider that "downloads" synthetic
+audio (pink noise rendered by ffmpeg's lavfi) and transcodes it with the
+real ffmpeg to every output profile. Reports per-stage timings, jobs/sec,
+peak RSS and file I/O, and compares against a stored JSON baseline.
+
+    python -m benchmarks.orchestrator --durations 30,180 --jobs 4
+    python -m benchmarks.orchestrator --save-baseline
+
+Redis is replaced by an in-process fakeredis unless ``--redis-url`` is
+given; provider rate limits are lifted so they don't skew the numbers.
+Baselines are machine-specific: compare runs from the same host only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+# (format, quality) pairs covering every branch of ffmpeg_cli._args_for;
+# wav/copy takes the orchestrator's no-transcode copy path
+PROFILES: list[tuple[str, str]] = [
+    ("mp3", "v0"),
+    ("mp3", "v2"),
+    ("mp3", "320"),
+    ("opus", "160"),
+    ("opus", "96"),
+    ("aac", "256"),
+    ("aac", "192"),
+    ("flac", "lossless"),
+    ("wav", "copy"),
+]
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "orchestrator.json"
+
+_CHUNK = 1 << 20
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    jobs: int
+    wall: float
+    jobs_per_sec: float
+    job_mean: float
+    job_p95: float
+    stages: dict[str, float] = field(default_factory=dict)
+    output_bytes: int = 0
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument(
+        "--durations",
+        default="30,180",
+        help="Comma-separated source lengths in seconds (default: 30,180)",
+    )
+    p.add_argument(
+        "--profiles",
+        default="all",
+        help="Comma-separated format:quality pairs, or 'all'",
+    )
+    p.add_argument("--jobs", type=int, default=2, help="Jobs per scenario")
+    p.add_argument(
+        "--concurrency", type=int, default=1, help="Jobs run at once"
+    )
+    p.add_argument("--redis-url", default=None, help="Use a real Redis")
+    p.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    p.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write this run as the new baseline",
+    )
+    p.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown vs baseline before failing (default: 0.2)",
+    )
+    p.add_argument("--json", type=Path, default=None, help="Write results")
+    p.add_argument(
+        "--keep", action="store_true", help="Keep the scratch directory"
+    )
+    return p.parse_args(argv)
+
+
+def _configure(workdir: Path, args: argparse.Namespace) -> None:
+    """Point settings at a scratch storage/db before anything reads them."""
+    os.environ["STORAGE_DIR"] = str(workdir / "data")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/db.sqlite3"
+    os.environ["PROVIDER_RATE"] = "1000000"
+    os.environ["PROVIDER_BURST"] = "1000000"
+    os.environ["PROVIDER_MAX_CONCURRENCY"] = str(max(args.concurrency, 1))
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+
+    from core.settings import get_settings
+
+    get_settings.cache_clear()
+
+    if not args.redis_url:
+        import fakeredis
+
+        import core.infra.redis as redis_infra
+
+        server = fakeredis.FakeServer()
+        redis_infra._client = fakeredis.FakeRedis(
+            server=server, decode_responses=True
+        )
+        redis_infra._async_client = fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=True
+        )
+
+
+def _render_source(ffmpeg: str, duration: int, dest: Path) -> Path:
+    """Stereo 44.1 kHz pink noise: a worst-ish case close to real music."""
+    if dest.exists():
+        return dest
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [
+            ffmpeg,
+            "-y",
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"anoisesrc=d={duration}:c=pink:r=44100:a=0.3",
+            "-ac",
+            "2",
+            str(dest),
+        ],
+        check=True,
+    )
+    return dest
+
+
+def _make_provider(sources: dict[int, Path]) -> Any:
+    from core.ports.provider_port import (
+        DownloadProgress,
+        ProbeResult,
+        ProgressHook,
+        ProviderPort,
+    )
+
+    class LocalAudioProvider(ProviderPort):
+        """Serves pre-rendered files; URLs look like bench://<seconds>/<n>."""
+
+        name = "bench"
+
+        def can_handle(self, url: str) -> bool:
+            return url.startswith("bench://")
+
+        def _duration(self, url: str) -> int:
+            return int(url.removeprefix("bench://").split("/", 1)[0])
+
+        async def probe(self, url: str) -> ProbeResult:
+            return ProbeResult(
+                provider=self.name,
+                can_download=True,
+                normalized_id=url,
+                title=f"Bench {url}",
+                artist="Bench",
+                duration=self._duration(url),
+                artwork_url=None,
+                reason_if_denied=None,
+            )
+
+        async def download(
+            self,
+            url: str,
+            dest_dir: str,
+            *,
+            respect_tou: bool = True,
+            progress: ProgressHook | None = None,
+        ) -> tuple[str, ProbeResult]:
+            src = sources[self._duration(url)]
+            dest = Path(dest_dir) / src.name
+            await asyncio.to_thread(_copy, src, dest, progress)
+            return str(dest), await self.probe(url)
+
+    def _copy(src: Path, dest: Path, progress: ProgressHook | None) -> None:
+        total = src.stat().st_size
+        done = 0
+        started = time.monotonic()
+        with src.open("rb") as fi, dest.open("wb") as fo:
+            while chunk := fi.read(_CHUNK):
+                fo.write(chunk)
+                done += len(chunk)
+                if progress is not None:
+                    elapsed = max(time.monotonic() - started, 1e-6)
+                    progress(DownloadProgress(done, total, done / elapsed, 0))
+
+    return LocalAudioProvider()
+
+
+def _install_stage_timer(marks: dict[str, list[tuple[str, float]]]) -> None:
+    """Record when each job enters a stage (via the progress reporter)."""
+    from core.services import download_orchestrator
+    from core.services.progress import ProgressReporter
+
+    class TimedReporter(ProgressReporter):
+        def stage(self, name: str, **fields: Any) -> None:
+            marks[self.job_id].append((name, time.perf_counter()))
+            super().stage(name, **fields)
+
+    download_orchestrator.ProgressReporter = TimedReporter  # type: ignore[misc]
+
+
+def _create_job(url: str, fmt: str, quality: str) -> str:
+    from core.domain.job import DownloadOptions, Job, JobStatus
+    from core.infra.db import session_scope
+
+    job_id = uuid.uuid4().hex
+    with session_scope() as s:
+        s.add(
+            Job(
+                id=job_id,
+                provider="bench",
+                url=url,
+                fingerprint=job_id,
+                status=JobStatus.queued.value,
+                options=DownloadOptions(
+                    format=fmt, quality=quality, embed_cover=False
+                ).model_dump(),
+            )
+        )
+    return job_id
+
+
+def _stage_durations(
+    started: float, ended: float, marks: list[tuple[str, float]]
+) -> dict[str, float]:
+    """Time spent in each stage, from consecutive stage marks."""
+    points = [("setup", started), *marks]
+    out: dict[str, float] = {}
+    for (name, t0), (_, t1) in zip(points, points[1:], strict=False):
+        out[name] = out.get(name, 0.0) + (t1 - t0)
+    if points[-1][0] != "done":
+        out[points[-1][0]] = ended - points[-1][1]
+    return out
+
+
+async def _run_scenario(
+    name: str,
+    urls: list[str],
+    fmt: str,
+    quality: str,
+    concurrency: int,
+    marks: dict[str, list[tuple[str, float]]],
+) -> ScenarioResult:
+    from core.domain.job import Job, JobStatus
+    from core.infra.db import session_scope
+    from core.services.download_orchestrator import process_job
+    from storage import get_storage
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    stages: dict[str, list[float]] = defaultdict(list)
+    job_ids = [_create_job(url, fmt, quality) for url in urls]
+
+    async def one(job_id: str) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            await process_job(job_id)
+            t1 = time.perf_counter()
+        latencies.append(t1 - t0)
+        for stage, secs in _stage_durations(t0, t1, marks[job_id]).items():
+            stages[stage].append(secs)
+
+    wall0 = time.perf_counter()
+    await asyncio.gather(*(one(j) for j in job_ids))
+    wall = time.perf_counter() - wall0
+
+    out_bytes = 0
+    with session_scope() as s:
+        for job_id in job_ids:
+            job = s.get(Job, job_id)
+            if job is None or job.status != JobStatus.succeeded.value:
+                error = job.error if job else "missing"
+                raise RuntimeError(f"{name}: job {job_id} failed: {error}")
+            final = get_storage().subdir(job_id, "final")
+            out_bytes += sum(p.stat().st_size for p in final.iterdir())
+
+    latencies.sort()
+    p95 = latencies[math.ceil(len(latencies) * 0.95) - 1]
+    return ScenarioResult(
+        name=name,
+        jobs=len(job_ids),
+        wall=wall,
+        jobs_per_sec=len(job_ids) / wall if wall else 0.0,
+        job_mean=statistics.fmean(latencies),
+        job_p95=p95,
+        stages={k: statistics.fmean(v) for k, v in stages.items()},
+        output_bytes=out_bytes,
+    )
+
+
+def _proc_io() -> dict[str, int]:
+    """Bytes moved by this process and its reaped children (Linux only)."""
+    try:
+        text = Path("/proc/self/io").read_text()
+    except OSError:
+        return {}
+    values = dict(line.split(": ", 1) for line in text.splitlines())
+    keys = ("rchar", "wchar", "read_bytes", "write_bytes")
+    return {k: int(values[k]) for k in keys if k in values}
+
+
+def _resources(io_before: dict[str, int]) -> dict[str, Any]:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    io_after = _proc_io()
+    return {
+        "peak_rss_bytes": self_usage.ru_maxrss * scale,
+        "peak_child_rss_bytes": children.ru_maxrss * scale,
+        "cpu_user": self_usage.ru_utime + children.ru_utime,
+        "cpu_system": self_usage.ru_stime + children.ru_stime,
+        "io": {k: io_after[k] - io_before.get(k, 0) for k in io_after},
+    }
+
+
+def _compare(
+    results: list[ScenarioResult], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Scenarios whose mean job time grew by more than ``tolerance``."""
+    regressions: list[str] = []
+    old = baseline.get("scenarios", {})
+    for r in results:
+        prev = old.get(r.name)
+        if not prev:
+            continue
+        ratio = r.job_mean / prev["job_mean"] if prev["job_mean"] else 1.0
+        marker = ""
+        if ratio > 1 + tolerance:
+            marker = "  REGRESSION"
+            regressions.append(r.name)
+        print(
+            f"  {r.name:<22} {prev['job_mean']:8.3f}s -> "
+            f"{r.job_mean:8.3f}s ({ratio - 1:+.1%}){marker}"
+        )
+    return regressions
+
+
+def _print_results(results: list[ScenarioResult]) -> None:
+    stage_names = ["download", "transcode"]
+    header = f"{'scenario':<22} {'jobs/s':>8} {'mean':>8} {'p95':>8}"
+    header += "".join(f" {s:>10}" for s in stage_names)
+    print(header)
+    for r in results:
+        line = (
+            f"{r.name:<22} {r.jobs_per_sec:8.2f} "
+            f"{r.job_mean:8.3f} {r.job_p95:8.3f}"
+        )
+        line += "".join(f" {r.stages.get(s, 0.0):10.3f}" for s in stage_names)
+        print(line)
+
+
+def _report(
+    args: argparse.Namespace,
+    durations: list[int],
+    results: list[ScenarioResult],
+    usage: dict[str, Any],
+) -> int:
+    """Print results, then save or check the baseline; exit code."""
+    _print_results(results)
+    print(
+        f"\npeak RSS {usage['peak_rss_bytes'] / 2**20:.1f} MiB, "
+        f"ffmpeg peak RSS {usage['peak_child_rss_bytes'] / 2**20:.1f} MiB"
+    )
+    for k, v in usage["io"].items():
+        print(f"{k:<12} {v / 2**20:10.1f} MiB")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "params": {
+            "jobs": args.jobs,
+            "concurrency": args.concurrency,
+            "durations": durations,
+        },
+        "resources": usage,
+        "scenarios": {r.name: asdict(r) for r in results},
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    if args.baseline.exists():
+        print(f"\nAgainst baseline {args.baseline}:")
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("params") != report["params"]:
+            print(f"  (baseline params differ: {baseline.get('params')})")
+        if _compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+async def _main(args: argparse.Namespace) -> int:
+    workdir = Path(tempfile.mkdtemp(prefix="forge-bench-"))
+    try:
+        _configure(workdir, args)
+
+        import core.domain.job  # noqa: F401  (registers the tables)
+        from core.infra.db import create_db_and_tables
+        from core.services import provider_registry
+        from core.settings import get_settings
+
+        ffmpeg = get_settings().ffmpeg_bin
+        if shutil.which(ffmpeg) is None:
+            print(f"ffmpeg not found: {ffmpeg} (set FFMPEG_BIN)")
+            return 2
+
+        durations = [int(d) for d in args.durations.split(",") if d]
+        profiles = (
+            PROFILES
+            if args.profiles == "all"
+            else [tuple(p.split(":", 1)) for p in args.profiles.split(",")]
+        )
+        sources = {
+            d: _render_source(ffmpeg, d, workdir / "src" / f"noise-{d}s.wav")
+            for d in durations
+        }
+        provider = _make_provider(sources)
+        provider_registry.detect_provider = lambda url, *_: provider
+        create_db_and_tables()
+
+        marks: dict[str, list[tuple[str, float]]] = defaultdict(list)
+        _install_stage_timer(marks)
+
+        io_before = _proc_io()
+        results: list[ScenarioResult] = []
+        for fmt, quality in profiles:
+            for d in durations:
+                name = f"{fmt}-{quality}-{d}s"
+                urls = [f"bench://{d}/{i}" for i in range(args.jobs)]
+                results.append(
+                    await _run_scenario(
+                        name, urls, fmt, quality, args.concurrency, marks
+                    )
+                )
+                print(f"  done {name}", file=sys.stderr)
+        usage = _resources(io_before)
+
+        return _report(args, durations, results, usage)
+    finally:
+        if args.keep:
+            print(f"Scratch kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv: list[str] | None = None) -> int:
+    return asyncio.run(_main(_parse_args(argv)))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import logging
+
+from redis.asyncio import Redis as AsyncRedis
+
+from core import metrics
+from core.infra.redis import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+_KEY = "forge:tg:file_id:{key}"
+# Telegram keeps file_ids valid for a long time, but not forever
+_TTL_SECONDS = 90 * 24 * 3600
+
+
+class FileIdCache:
+    """
+    Telegram file_id per artifact, so identical audio is re-sent by
+    reference instead of being uploaded again.
+
+    Keys are artifact sha256 digests (or any other stable artifact key).
+    Lookups are best-effort: a Redis failure just means a fresh upload.
+    """
+
+    def __init__(self, redis: AsyncRedis | None = None) -> None:
+        self._redis = redis
+
+    @property
+    def redis(self) -> AsyncRedis:
+        return self._redis or get_async_redis()
+
+    async def get(self, key: str) -> str | None:
+        try:
+            file_id = await self.redis.get(_KEY.format(key=key))
+        except Exception as e:  # noqa: BLE001
+            logger.warning("file_id cache lookup failed: %s", e)
+            file_id = None
+        metrics.cache_lookup("telegram_file_id", file_id is not None)
+        return file_id
+
+    async def set(self, key: str, file_id: str) -> None:
+        try:
+            await self.redis.set(_KEY.format(key=key), file_id, ex=_TTL_SECONDS)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("file_id cache store failed: %s", e)
+
+    async def forget(self, key: str) -> None:
+        try:
+            await self.redis.delete(_KEY.format(key=key))
+        except Exception as e:  # noqa: BLE001
+            logger.warning("file_id cache delete failed: %s", e)
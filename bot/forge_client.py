@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import abc
+
+import httpx
+
+from mcp_music_forge.tools.enqueue_download import (
+    EnqueueOptions,
+    EnqueueResult,
+    enqueue_download,
+)
+from mcp_music_forge.tools.get_job_status import (
+    GetJobStatusResult,
+    get_job_status,
+)
+from mcp_music_forge.tools.get_jobs_status import (
+    GetJobsStatusResult,
+    get_jobs_status,
+)
+
+
+class ForgeClient(abc.ABC):
+    """What the bot needs from the forge: enqueue a URL, read a job."""
+
+    @abc.abstractmethod
+    async def enqueue(
+        self, url: str, options: EnqueueOptions | None = None
+    ) -> EnqueueResult: ...
+
+    @abc.abstractmethod
+    async def get_status(self, job_id: str) -> GetJobStatusResult: ...
+
+    @abc.abstractmethod
+    async def get_statuses(
+        self, job_ids: list[str], fields: list[str] | None = None
+    ) -> dict[str, GetJobStatusResult]:
+        """Statuses of known jobs keyed by id; unknown ids are omitted."""
+
+    async def aclose(self) -> None:  # pragma: no cover - trivial
+        return None
+
+
+class InProcessForgeClient(ForgeClient):
+    """Direct calls into the service layer when the bot runs inside the API."""
+
+    async def enqueue(
+        self, url: str, options: EnqueueOptions | None = None
+    ) -> EnqueueResult:
+        return await enqueue_download(url, options)
+
+    async def get_status(self, job_id: str) -> GetJobStatusResult:
+        return await get_job_status(job_id)
+
+    async def get_statuses(
+        self, job_ids: list[str], fields: list[str] | None = None
+    ) -> dict[str, GetJobStatusResult]:
+        res = await get_jobs_status(job_ids, fields)
+        return {job.id: job for job in res.jobs}
+
+
+class HttpForgeClient(ForgeClient):
+    """Talks to a separately deployed API over one pooled HTTP client."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 10.0,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+        admin_token: str | None = None,
+    ) -> None:
+        # The token lets the API keep our per-chat client ids for admission
+        headers = {"X-Admin-Token": admin_token} if admin_token else None
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            transport=transport,
+            headers=headers,
+        )
+
+    async def enqueue(
+        self, url: str, options: EnqueueOptions | None = None
+    ) -> EnqueueResult:
+        resp = await self._client.post(
+            "/download",
+            params={"url": url},
+            json=options.model_dump(mode="json") if options else None,
+        )
+        resp.raise_for_status()
+        return EnqueueResult.model_validate(resp.json())
+
+    async def get_status(self, job_id: str) -> GetJobStatusResult:
+        resp = await self._client.get(f"/jobs/{job_id}")
+        resp.raise_for_status()
+        return GetJobStatusResult.model_validate(resp.json())
+
+    async def get_statuses(
+        self, job_ids: list[str], fields: list[str] | None = None
+    ) -> dict[str, GetJobStatusResult]:
+        resp = await self._client.post(
+            "/jobs/status", json={"job_ids": job_ids, "fields": fields}
+        )
+        resp.raise_for_status()
+        res = GetJobsStatusResult.model_validate(resp.json())
+        return {job.id: job for job in res.jobs}
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -8,11 +8,28 @@ import httpx
 from aiogram import Bot, Dispatcher, F
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import CommandStart
-from aiogram.types import FSInputFile, Message
-
+from aiogram.types import (
+    BufferedInputFile,
+    FSInputFile,
+    InputFile,
+    Message,
+    URLInputFile,
+)
+
+from bot.file_id_cache import FileIdCache
+from bot.forge_client import ForgeClient, HttpForgeClient
+from bot.tracker import JobTracker, Waiter
+from core.domain.job import ArtifactKind, JobStatus
+from core.infra.executor import run_blocking
 from core.logging import configure_logging
+from core.ports.storage_port import StoredFile
+from core.services import retention
 from core.settings import get_settings
+from mcp_music_forge.tools.enqueue_download import EnqueueOptions
+from mcp_music_forge.tools.get_job_status import GetJobStatusResult
+from storage import final_artifact, get_storage
 
 # Configure logging
 configure_logging(logging.INFO)
@@ -21,6 +38,7 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 dp = Dispatcher()
+file_ids = FileIdCache()
 
 def is_valid_url(text: str) -> bool:
     if not text:
@@ -32,77 +50,125 @@ def is_valid_url(text: str) -> bool:
     domains = ["soundcloud.com", "youtube.com", "youtu.be", "m.soundcloud.com", "www.youtube.com"]
     return any(d in text for d in domains)
 
-async def monitor_job(message: Message, job_id: str, api_base: str):
-    """Poll API for job status and send file when done."""
-    status_msg = await message.answer(f"⏳ Job <code>{job_id}</code> queued. Waiting for result...", disable_notification=True)
-    
-    # Poll for result
-    # Max wait time: 5 minutes (100 * 3s = 300s)
-    for _ in range(100):
+def _artifact_key(
+    status: GetJobStatusResult, file_to_send: StoredFile, job_id: str
+) -> str:
+    """Prefer the artifact checksum; fall back to the (deduped) job id."""
+    for artifact in status.artifacts:
+        if (
+            artifact.kind is ArtifactKind.final
+            and artifact.filename == file_to_send.name
+            and artifact.sha256
+        ):
+            return f"sha256:{artifact.sha256}"
+    return f"job:{job_id}:{file_to_send.name}"
+
+
+async def _input_file(file_to_send: StoredFile, job_id: str) -> InputFile:
+    if file_to_send.path is not None:
+        return FSInputFile(path=file_to_send.path)
+    storage = get_storage()
+    url = await run_blocking(storage.url, job_id, "final", file_to_send.name)
+    if url:
+        return URLInputFile(url, filename=file_to_send.name)
+    data = await run_blocking(
+        lambda: b"".join(storage.iter_bytes(job_id, "final", file_to_send.name))
+    )
+    return BufferedInputFile(data, filename=file_to_send.name)
+
+
+async def send_audio(
+    message: Message,
+    file_to_send: StoredFile,
+    status: GetJobStatusResult,
+    job_id: str,
+) -> None:
+    """Send by cached Telegram file_id when possible, else upload once."""
+    key = _artifact_key(status, file_to_send, job_id)
+
+    async def answer(audio: str | InputFile) -> Message:
+        return await message.answer_audio(
+            audio=audio,
+            title=status.title,
+            performer=status.artist,
+            duration=status.duration,
+            caption=f"✅ Done! {status.title or ''}",
+        )
+
+    cached = await file_ids.get(key)
+    if cached:
+        try:
+            await answer(cached)
+            return
+        except TelegramBadRequest as e:
+            logger.warning(f"Cached file_id rejected, re-uploading: {e}")
+            await file_ids.forget(key)
+
+    sent = await answer(await _input_file(file_to_send, job_id))
+    if sent.audio:
+        await file_ids.set(key, sent.audio.file_id)
+
+
+async def deliver_result(
+    waiter: Waiter, job_id: str, data: GetJobStatusResult
+) -> None:
+    """Send the finished job (or its error) to a waiting chat."""
+    message, status_msg = waiter.message, waiter.status_msg
+    if data.status is JobStatus.expired:
+        # Evicted before we got to it; enqueueing again restarts the job
+        await status_msg.edit_text(
+            "❌ The files for this job have expired. Send the link again."
+        )
+        return
+    if data.status is not JobStatus.succeeded:
+        error = html.escape(data.error or "Unknown error")
+        await status_msg.edit_text(f"❌ Job {data.status.value}: {error}")
+        return
+
+    await status_msg.edit_text("⬇️ Downloading finished! Uploading to Telegram...")
+
+    # The primary output; a local file or, with object storage, a URL
+    primary = next((a.filename for a in data.artifacts if a.primary), None)
+    file_to_send = await run_blocking(
+        final_artifact, get_storage(), job_id, primary
+    )
+
+    if file_to_send:
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(f"{api_base}/jobs/{job_id}")
-                if resp.status_code != 200:
-                    await asyncio.sleep(3)
-                    continue
-                
-                data = resp.json()
-                status = data.get("status")
-                
-                if status == "succeeded":
-                    await status_msg.edit_text("⬇️ Downloading finished! Uploading to Telegram...")
-                    
-                    # Locate file on disk (shared volume)
-                    storage_dir = settings.storage_dir
-                    final_dir = storage_dir / "jobs" / job_id / "final"
-                    
-                    if not final_dir.exists():
-                         await status_msg.edit_text("❌ Job succeeded, but file directory not found.")
-                         return
-
-                    # Find audio file
-                    audio_extensions = {".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg", ".opus"}
-                    files = [f for f in final_dir.iterdir() if f.is_file() and not f.name.startswith(".")]
-                    audio_files = [f for f in files if f.suffix.lower() in audio_extensions]
-                    
-                    file_to_send = audio_files[0] if audio_files else (files[0] if files else None)
-                    
-                    if file_to_send:
-                        try:
-                            audio = FSInputFile(path=file_to_send)
-                            # Use title and artist from job data if available
-                            title = data.get("title")
-                            artist = data.get("artist")
-                            duration = data.get("duration")
-                            
-                            await message.answer_audio(
-                                audio, 
-                                title=title, 
-                                performer=artist, 
-                                duration=duration,
-                                caption=f"✅ Done! {title or ''}"
-                            )
-                            await status_msg.delete()
-                        except Exception as send_err:
-                            logger.error(f"Error sending file: {send_err}")
-                            await status_msg.edit_text(f"❌ Error sending file: {html.escape(str(send_err))}")
-                    else:
-                         await status_msg.edit_text("❌ Job succeeded, but no file found to send.")
-                    return
-                    
-                elif status == "failed":
-                    error = html.escape(data.get("error", "Unknown error"))
-                    await status_msg.edit_text(f"❌ Job failed: {error}")
-                    return
-                
-                # If queued or processing, wait
-                await asyncio.sleep(3)
-                
-        except Exception as e:
-            logger.error(f"Polling error: {e}")
-            await asyncio.sleep(3)
-            
-    await status_msg.edit_text("❌ Timeout waiting for job completion.")
+            await send_audio(message, file_to_send, data, job_id)
+            # A delivery counts as a download for retention
+            await run_blocking(retention.touch, job_id)
+            await status_msg.delete()
+        except Exception as send_err:
+            logger.error(f"Error sending file: {send_err}")
+            await status_msg.edit_text(f"❌ Error sending file: {html.escape(str(send_err))}")
+    else:
+         await status_msg.edit_text("❌ Job succeeded, but no file found to send.")
+
+
+async def report_timeout(waiter: Waiter, job_id: str) -> None:
+    await waiter.status_msg.edit_text("❌ Timeout waiting for job completion.")
+
+
+@dp.startup()
+async def on_startup(dispatcher: Dispatcher, forge: ForgeClient) -> None:
+    tracker = JobTracker(
+        forge,
+        deliver_result,
+        report_timeout,
+        interval=settings.bot_poll_interval,
+        timeout=settings.bot_job_timeout,
+        max_deliveries=settings.bot_max_concurrent_uploads,
+    )
+    tracker.start()
+    dispatcher["tracker"] = tracker
+
+
+@dp.shutdown()
+async def on_shutdown(dispatcher: Dispatcher) -> None:
+    tracker = dispatcher.workflow_data.pop("tracker", None)
+    if tracker is not None:
+        await tracker.stop()
 
 
 @dp.message(CommandStart())
@@ -110,7 +176,9 @@ async def command_start_handler(message: Message) -> None:
     await message.answer(f"Hello, {message.from_user.full_name}! Send me a SoundCloud or YouTube link to download.")
 
 @dp.message()
-async def handle_message(message: Message) -> None:
+async def handle_message(
+    message: Message, forge: ForgeClient, tracker: JobTracker
+) -> None:
     text = message.text
     
     if not text:
@@ -123,24 +191,16 @@ async def handle_message(message: Message) -> None:
         await message.answer("Please send a valid YouTube or SoundCloud link.")
         return
 
-    # Call API to enqueue
-    api_base = settings.api_base_url
-    target_url = f"{api_base}/download"
-    
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(target_url, params={"url": text}, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            job_id = data.get("job_id")
-            
-            # Start monitoring task
-            asyncio.create_task(monitor_job(message, job_id, api_base))
-            
+        result = await forge.enqueue(
+            text, EnqueueOptions(client_id=f"tg:{message.chat.id}")
+        )
+        status_msg = await message.answer(f"⏳ Job <code>{result.job_id}</code> queued. Waiting for result...", disable_notification=True)
+        tracker.track(result.job_id, message, status_msg)
     except httpx.ConnectError:
         await message.answer("❌ Error: Could not connect to the API server.")
     except Exception as e:
-        logger.error(f"Error calling API: {e}")
+        logger.error(f"Error queuing task: {e}")
         await message.answer(f"❌ Error queuing task: {html.escape(str(e))}")
 
 async def main() -> None:
@@ -151,8 +211,15 @@ async def main() -> None:
 
     bot = Bot(token=token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     
+    # Standalone bot: reach the API over HTTP with one pooled client
+    forge = HttpForgeClient(
+        settings.api_base_url, admin_token=settings.admin_token
+    )
     logger.info("Starting bot...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot, forge=forge)
+    finally:
+        await forge.aclose()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram.types import Message
+
+from bot.forge_client import ForgeClient
+from core.domain.job import JobStatus
+from mcp_music_forge.tools.get_job_status import GetJobStatusResult
+
+logger = logging.getLogger(__name__)
+
+_FINISHED = {
+    JobStatus.succeeded,
+    JobStatus.failed,
+    JobStatus.cancelled,
+    JobStatus.timed_out,
+    JobStatus.expired,
+}
+
+
+@dataclass
+class Waiter:
+    """A chat waiting for a job: the user's message and our status reply."""
+
+    message: Message
+    status_msg: Message
+    deadline: float
+
+
+OnFinished = Callable[[Waiter, str, GetJobStatusResult], Awaitable[None]]
+OnTimeout = Callable[[Waiter, str], Awaitable[None]]
+
+
+class JobTracker:
+    """
+    Single polling loop for every job the bot is waiting on.
+
+    Pending jobs live in one table (job_id -> waiters); each tick asks the
+    forge for all of their bare statuses in one batched call. Finished jobs
+    are then fetched in full once and handed to ``on_finished`` for each
+    waiter, with at most ``max_deliveries`` jobs being delivered at once.
+    """
+
+    def __init__(
+        self,
+        forge: ForgeClient,
+        on_finished: OnFinished,
+        on_timeout: OnTimeout,
+        *,
+        interval: float = 3.0,
+        timeout: float = 300.0,
+        max_deliveries: int = 4,
+    ) -> None:
+        self._forge = forge
+        self._on_finished = on_finished
+        self._on_timeout = on_timeout
+        self._interval = interval
+        self._timeout = timeout
+        self._deliveries = asyncio.Semaphore(max_deliveries)
+        self._pending: dict[str, list[Waiter]] = {}
+        self._wakeup = asyncio.Event()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._loop_task: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def track(self, job_id: str, message: Message, status_msg: Message) -> None:
+        deadline = time.monotonic() + self._timeout
+        self._pending.setdefault(job_id, []).append(
+            Waiter(message=message, status_msg=status_msg, deadline=deadline)
+        )
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            try:
+                await self.tick()
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Polling error: {e}")
+            await asyncio.sleep(self._interval)
+
+    async def tick(self) -> None:
+        job_ids = list(self._pending)
+        if not job_ids:
+            return
+        try:
+            # Bare id/status only: artifacts are resolved once a job finishes
+            statuses = await self._forge.get_statuses(job_ids, fields=[])
+        except Exception:
+            # Deadlines still apply while the forge is unreachable
+            self._expire(job_ids, time.monotonic())
+            raise
+        for job_id in job_ids:
+            status = statuses.get(job_id)
+            if status is not None and status.status in _FINISHED:
+                self._spawn(self._deliver, job_id, self._pending.pop(job_id))
+        self._expire(list(self._pending), time.monotonic())
+
+    def _expire(self, job_ids: list[str], now: float) -> None:
+        for job_id in job_ids:
+            waiters = self._pending.get(job_id, [])
+            expired = [w for w in waiters if w.deadline <= now]
+            if not expired:
+                continue
+            alive = [w for w in waiters if w.deadline > now]
+            if alive:
+                self._pending[job_id] = alive
+            else:
+                self._pending.pop(job_id, None)
+            for waiter in expired:
+                self._spawn(self._on_timeout, waiter, job_id)
+
+    async def _deliver(self, job_id: str, waiters: list[Waiter]) -> None:
+        status = await self._forge.get_status(job_id)
+        # Sequential on purpose: later chats reuse the first upload's file_id
+        for waiter in waiters:
+            try:
+                await self._on_finished(waiter, job_id, status)
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Delivery error: {e}")
+
+    def _spawn(self, fn: Callable[..., Awaitable[None]], *args: Any) -> None:
+        async def _bounded() -> None:
+            async with self._deliveries:
+                try:
+                    await fn(*args)
+                except Exception as e:  # noqa: BLE001
+                    logger.error(f"Delivery error: {e}")
+
+        task = asyncio.create_task(_bounded())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
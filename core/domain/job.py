@@ -4,7 +4,7 @@ import enum
 from datetime import datetime
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from sqlalchemy import JSON as SAJSON
 from sqlalchemy import Column
 from sqlmodel import Field as SQLField
@@ -16,6 +16,35 @@ class JobStatus(str, enum.Enum):
     running = "running"
     succeeded = "succeeded"
     failed = "failed"
+    cancelled = "cancelled"
+    # A pipeline stage ran past its DOWNLOAD/TRANSCODE_TIMEOUT_SECONDS
+    timed_out = "timed_out"
+    # Files evicted by retention; enqueueing it again re-runs it
+    expired = "expired"
+
+
+class JobPriority(str, enum.Enum):
+    """Named queue a job is scheduled on; interactive always goes first."""
+
+    interactive = "interactive"
+    bulk = "bulk"
+    # Very long media; assigned by the scheduler from the probed duration
+    long = "long"
+
+
+class OutputProfile(BaseModel):
+    format: str = Field(default="mp3")
+    quality: str = Field(default="v0")
+
+
+def output_profiles(
+    format: str, quality: str, outputs: list[OutputProfile]
+) -> list[OutputProfile]:
+    """Distinct profiles to produce; format/quality when outputs is empty."""
+    seen: dict[tuple[str, str], OutputProfile] = {}
+    for p in outputs or [OutputProfile(format=format, quality=quality)]:
+        seen.setdefault((p.format.lower(), p.quality.lower()), p)
+    return list(seen.values())
 
 
 class DownloadOptions(BaseModel):
@@ -40,6 +69,23 @@ class DownloadOptions(BaseModel):
         description="If true, only download when provider marks downloadable; "
         "if false, allow stream downloads (m3u8) where possible",
     )
+    outputs: list[OutputProfile] = Field(
+        default_factory=list,
+        description=(
+            "Several format/quality profiles from one download and decode; "
+            "the first one replaces format/quality"
+        ),
+    )
+
+    @model_validator(mode="after")
+    def _primary_output(self) -> DownloadOptions:
+        if self.outputs:
+            self.format = self.outputs[0].format
+            self.quality = self.outputs[0].quality
+        return self
+
+    def profiles(self) -> list[OutputProfile]:
+        return output_profiles(self.format, self.quality, self.outputs)
 
 
 class Job(SQLModel, table=True):
@@ -59,6 +105,28 @@ class Job(SQLModel, table=True):
     duration: int | None = None
     artwork_url: str | None = None
 
+    # Scheduling: named queue and submitting client (fair-share key)
+    priority: str | None = None
+    client_id: str | None = None
+    # W3C trace context of the latest enqueue, continued by the worker
+    trace_context: dict[str, str] | None = SQLField(
+        default=None, sa_column=Column(SAJSON, nullable=True)
+    )
+    # Worker lease while running; an expired lease means the worker died
+    lease_owner: str | None = None
+    lease_expires_at: datetime | None = None
+    # Times the reaper requeued the job after its lease expired
+    reaped: int | None = None
+    # Completed pipeline stages with their output files, so that a re-run
+    # resumes from the first incomplete one (see services.checkpoints)
+    checkpoints: dict[str, Any] | None = SQLField(
+        default=None, sa_column=Column(SAJSON, nullable=True)
+    )
+    # Retention: bytes under the job dir once finished, and the last time
+    # an artifact was downloaded (eviction is least recently downloaded)
+    size_bytes: int | None = None
+    last_accessed_at: datetime | None = None
+
     created_at: datetime = SQLField(default_factory=datetime.now)
     updated_at: datetime = SQLField(default_factory=datetime.now)
 
@@ -83,6 +151,22 @@ class ArtifactDTO(BaseModel):
     size: int
     sha256: str
     resource_uri: str | None = None
+    # The file of the job's first output profile, the one to hand out
+    primary: bool = False
+
+
+class JobProgressDTO(BaseModel):
+    stage: str
+    downloaded_bytes: int | None = None
+    total_bytes: int | None = None
+    speed: float | None = Field(default=None, description="Bytes per second")
+    eta: int | None = Field(default=None, description="Seconds left")
+    position: float | None = Field(
+        default=None, description="Transcoded seconds of audio"
+    )
+    duration: float | None = None
+    percent: float | None = None
+    updated_at: datetime | None = None
 
 
 class JobStatusDTO(BaseModel):
@@ -93,3 +177,4 @@ class JobStatusDTO(BaseModel):
     artist: str | None = None
     duration: int | None = None
     artifacts: list[ArtifactDTO] = Field(default_factory=list)
+    progress: JobProgressDTO | None = None
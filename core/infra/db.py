@@ -3,10 +3,11 @@ from __future__ import annotations
 from collections.abc import Iterator
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, inspect, text
 from sqlalchemy.orm import Session, sessionmaker
 from sqlmodel import SQLModel
 
+from core import tracing
 from core.settings import get_settings
 
 _engine = None
@@ -45,16 +46,41 @@ def get_session_maker() -> sessionmaker[Session]:
 def session_scope() -> Iterator[Session]:
     session_local = get_session_maker()
     session = session_local()
-    try:
-        yield session
-        session.commit()
-    except Exception:
-        session.rollback()
-        raise
-    finally:
-        session.close()
+    with tracing.span("db.session"):
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+def _add_missing_columns(engine: Engine) -> None:
+    """
+    create_all() never alters existing tables, so add columns introduced
+    after a table was created. New columns must be nullable.
+    """
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table.name} "
+                        f"ADD COLUMN {column.name} {ddl_type}"
+                    )
+                )
 
 
 def create_db_and_tables() -> None:
     engine = get_engine()
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns(engine)
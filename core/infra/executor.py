@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from core.settings import get_settings
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Shared pool for blocking file I/O (tagging inputs, copies, hashes).
+
+    Bounded by BLOCKING_IO_THREADS so a burst of jobs queues here instead
+    of piling threads onto the disk.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().blocking_io_threads,
+            thread_name_prefix="forge-io",
+        )
+    return _executor
+
+
+async def run_blocking(
+    fn: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Any:
+    """Run ``fn`` on the blocking I/O pool, keeping the current trace."""
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), call
+    )
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from core.settings import get_settings
+
+_client: Redis | None = None
+_async_client: AsyncRedis | None = None
+
+# Keep Redis hiccups from stalling the pipeline: progress and similar
+# bookkeeping is best-effort and must fail fast.
+_SOCKET_TIMEOUT = 2.0
+
+
+def get_redis() -> Redis:
+    """Shared sync client; safe to use from worker threads."""
+    global _client
+    if _client is None:
+        _client = Redis.from_url(
+            get_settings().redis_url,
+            socket_timeout=_SOCKET_TIMEOUT,
+            socket_connect_timeout=_SOCKET_TIMEOUT,
+            decode_responses=True,
+        )
+    return _client
+
+
+def get_async_redis() -> AsyncRedis:
+    """Shared asyncio client for use on the event loop."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncRedis.from_url(
+            get_settings().redis_url,
+            socket_timeout=_SOCKET_TIMEOUT,
+            socket_connect_timeout=_SOCKET_TIMEOUT,
+            decode_responses=True,
+        )
+    return _async_client
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import cast
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from core.infra.redis import get_redis
+from core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Audio stages run from sub-second to tens of minutes for long mixes
+_STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# Keep label cardinality bounded: formats come from user input
+_KNOWN_FORMATS = {"mp3", "flac", "aac", "opus", "wav"}
+
+# Walking the storage tree is expensive; reuse the total for this long
+_STORAGE_SCAN_TTL = 60.0
+
+STAGE_SECONDS = Histogram(
+    "forge_stage_seconds",
+    "Time spent in one pipeline stage",
+    ["stage", "provider", "format"],
+    buckets=_STAGE_BUCKETS,
+)
+JOB_SECONDS = Histogram(
+    "forge_job_seconds",
+    "Total processing time of a job, by outcome",
+    ["provider", "format", "outcome"],
+    buckets=_STAGE_BUCKETS,
+)
+JOBS_IN_FLIGHT = Gauge(
+    "forge_jobs_in_flight",
+    "Jobs being processed by this worker process",
+)
+RETRIES = Counter(
+    "forge_retries_total",
+    "Retried attempts of a pipeline stage",
+    ["provider", "stage"],
+)
+FAILURES = Counter(
+    "forge_job_failures_total",
+    "Jobs that ended failed",
+    ["provider", "format"],
+)
+CACHE_REQUESTS = Counter(
+    "forge_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+ADMISSION_REJECTED = Counter(
+    "forge_admission_rejected_total",
+    "Enqueue requests shed by admission control, by reason",
+    ["reason"],
+)
+
+LOOP_LAG_SECONDS = Histogram(
+    "forge_loop_lag_seconds",
+    "How late the event loop ran a scheduled wake-up",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+LOOP_STALLS = Counter(
+    "forge_loop_stalls_total",
+    "Event loop stalls longer than LOOP_LAG_THRESHOLD_MS",
+)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def format_label(fmt: str | None) -> str:
+    f = (fmt or "").lower()
+    return f if f in _KNOWN_FORMATS else "other"
+
+
+@contextmanager
+def stage_timer(stage: str, provider: str, fmt: str | None) -> Iterator[None]:
+    """Observe the duration of a stage, whether or not it succeeds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage, provider, format_label(fmt)).observe(
+            time.perf_counter() - started
+        )
+
+
+def observe_job(
+    provider: str, fmt: str | None, outcome: str, seconds: float
+) -> None:
+    JOB_SECONDS.labels(provider, format_label(fmt), outcome).observe(seconds)
+    if outcome == "failed":
+        FAILURES.labels(provider, format_label(fmt)).inc()
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class ClusterCollector(Collector):
+    """
+    Cluster-wide gauges read at scrape time: scheduler queue depth per lane,
+    arq tickets waiting, and bytes under the storage dir.
+
+    Registered by the API only, so that several workers don't report the
+    same numbers.
+    """
+
+    def __init__(self) -> None:
+        self._storage_bytes = 0
+        self._storage_scanned = 0.0
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        from core.services import scheduler
+
+        depth = GaugeMetricFamily(
+            "forge_queue_depth",
+            "Jobs waiting in the scheduler, per lane",
+            labels=["lane"],
+        )
+        tickets = GaugeMetricFamily(
+            "forge_arq_queue_depth", "arq tickets waiting for a worker"
+        )
+        try:
+            redis = get_redis()
+            for lane, count in scheduler.pending_sync(redis).items():
+                depth.add_metric([lane], count)
+            tickets.add_metric([], cast(int, redis.zcard("arq:queue")))
+        except Exception as e:  # noqa: BLE001
+            logger.debug("Queue depth unavailable: %s", e)
+        yield depth
+        yield tickets
+
+        storage = GaugeMetricFamily(
+            "forge_storage_bytes", "Bytes of job files in storage"
+        )
+        storage.add_metric([], self._storage_size())
+        yield storage
+
+    def _storage_size(self) -> int:
+        now = time.monotonic()
+        if now - self._storage_scanned >= _STORAGE_SCAN_TTL:
+            self._storage_bytes = _dir_size(get_settings().storage_dir / "jobs")
+            self._storage_scanned = now
+        return self._storage_bytes
+
+
+def _dir_size(root: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.stat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+_cluster_registered = False
+
+
+def register_cluster_collector() -> None:
+    global _cluster_registered
+    if not _cluster_registered:
+        REGISTRY.register(ClusterCollector())
+        _cluster_registered = True
+
+
+def render_latest() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+def start_exporter(port: int) -> None:
+    """Serve this process's metrics on ``port`` (worker side)."""
+    try:
+        start_http_server(port)
+        logger.info("Metrics exporter listening on :%s", port)
+    except OSError as e:
+        logger.warning("Metrics exporter not started on :%s: %s", port, e)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+from collections.abc import Callable
 from dataclasses import dataclass
 
 
@@ -16,6 +17,17 @@ class ProbeResult:
     reason_if_denied: str | None
 
 
+@dataclass
+class DownloadProgress:
+    downloaded_bytes: int
+    total_bytes: int | None
+    speed: float | None
+    eta: int | None
+
+
+ProgressHook = Callable[[DownloadProgress], None]
+
+
 class ProviderPort(abc.ABC):
     name: str
 
@@ -28,7 +40,12 @@ class ProviderPort(abc.ABC):
 
     @abc.abstractmethod
     async def download(
-        self, url: str, dest_dir: str, *, respect_tou: bool = True
+        self,
+        url: str,
+        dest_dir: str,
+        *,
+        respect_tou: bool = True,
+        progress: ProgressHook | None = None,
     ) -> tuple[str, ProbeResult]:
         """
         Download media into dest_dir and return (filepath, metadata).
@@ -42,5 +59,7 @@ class ProviderPort(abc.ABC):
                             downloadable;
                          if False, allow stream downloads (e.g., m3u8)
                             where possible
+            progress: optional callback for download progress; may be
+                        invoked from a worker thread
         """
         ...
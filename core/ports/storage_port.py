@@ -1,16 +1,76 @@
 from __future__ import annotations
 
 import abc
+from collections.abc import Iterator
+from dataclasses import dataclass
 from pathlib import Path
 
 
+@dataclass(frozen=True)
+class StoredFile:
+    """A stored artifact of a job, wherever the backend keeps it."""
+
+    subdir: str  # "original" or "final"
+    name: str
+    size: int
+    # Known without reading the file (e.g. object metadata); "" otherwise
+    sha256: str = ""
+    # Local file, when the backend has one
+    path: Path | None = None
+
+
 class StoragePort(abc.ABC):
+    """
+    Job artifact store.
+
+    job_dir/subdir/ensure_subdir are the local working tree a worker writes
+    into; ``publish`` hands a finished job to the store. Readers use
+    ``files``/``iter_bytes``/``url`` so they work without a shared volume.
+    """
+
     @abc.abstractmethod
     def job_dir(self, job_id: str) -> Path:  # pragma: no cover - trivial
         ...
 
+    @abc.abstractmethod
+    def subdir(self, job_id: str, name: str) -> Path:
+        """Path of a job subdirectory; never creates anything."""
+
     @abc.abstractmethod
     def ensure_subdir(self, job_id: str, name: str) -> Path: ...
 
     @abc.abstractmethod
     def list_files(self, job_id: str) -> list[Path]: ...
+
+    @abc.abstractmethod
+    def size(self, job_id: str) -> int:
+        """Bytes stored for the job."""
+
+    @abc.abstractmethod
+    def delete(self, job_id: str, subdir: str | None = None) -> None:
+        """Remove the job's files, or only those under ``subdir``."""
+
+    @abc.abstractmethod
+    def files(self, job_id: str) -> list[StoredFile]: ...
+
+    @abc.abstractmethod
+    def iter_bytes(
+        self,
+        job_id: str,
+        subdir: str,
+        name: str,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        """
+        Stream bytes ``start``..``end`` (inclusive) of an artifact; raises
+        FileNotFoundError if it does not exist.
+        """
+
+    def publish(self, job_id: str) -> None:
+        """Make a finished job's working files durable and shared."""
+        return None
+
+    def url(self, job_id: str, subdir: str, name: str) -> str | None:
+        """Short-lived direct download URL, if the backend can issue one."""
+        return None
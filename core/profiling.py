@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+from core import metrics
+from core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Redis flag armed by the admin API; the worker profiles that job once
+_JOB_FLAG = "forge:profile:job:"
+_JOB_FLAG_TTL = 24 * 3600
+
+# 200 Hz: enough resolution for stalls of a few ms, negligible overhead
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    where = "/".join(path.parts[-2:])
+    return f"{code.co_name} ({where}:{code.co_firstlineno})"
+
+
+def _fold(frame: FrameType | None) -> list[str]:
+    stack: list[str] = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampler built on sys._current_frames().
+
+    A daemon thread snapshots every thread's stack each ``interval`` seconds
+    and counts identical stacks; folded() renders them in the collapsed
+    format read by flamegraph.pl and speedscope. Blocked and idle time shows
+    up too, which is what we want when hunting loop stalls.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> SamplingProfiler:
+        self._thread = threading.Thread(
+            target=self._run, name="forge-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> SamplingProfiler:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def __enter__(self) -> SamplingProfiler:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = [names.get(ident, str(ident)), *_fold(frame)]
+                self._stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        lines = [f"{stack} {n}" for stack, n in self._stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+class LoopLagMonitor:
+    """
+    Detect callbacks that block the event loop.
+
+    A heartbeat task sleeps ``interval`` and records how late it woke up
+    (forge_loop_lag_seconds). A watchdog thread checks the heartbeat from
+    outside: while the loop is stuck it captures the loop thread's stack,
+    so the warning names the code that is blocking rather than whatever
+    runs next.
+    """
+
+    def __init__(
+        self, threshold: float, *, interval: float | None = None
+    ) -> None:
+        self.threshold = threshold
+        self.interval = interval or min(threshold / 2, 0.5)
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="forge-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - self._beat - self.interval
+            metrics.LOOP_LAG_SECONDS.observe(max(lag, 0.0))
+
+    def _watch(self) -> None:
+        reported = 0.0
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or beat == reported:
+                continue
+            # Once per stall; the heartbeat observes its full length later
+            reported = beat
+            metrics.LOOP_STALLS.inc()
+            frame = sys._current_frames().get(self._loop_thread or 0)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            logger.warning(
+                "Event loop blocked for %.0f ms; loop thread is at:\n%s",
+                stalled * 1000,
+                stack,
+            )
+
+
+def start_loop_monitor() -> LoopLagMonitor | None:
+    """Start a monitor on the running loop if LOOP_LAG_THRESHOLD_MS > 0."""
+    threshold_ms = get_settings().loop_lag_threshold_ms
+    if threshold_ms <= 0:
+        return None
+    monitor = LoopLagMonitor(threshold_ms / 1000)
+    monitor.start()
+    return monitor
+
+
+def profiles_dir() -> Path:
+    return get_settings().storage_dir / "profiles"
+
+
+def save_profile(name: str, profiler: SamplingProfiler) -> Path:
+    dest = profiles_dir() / f"{name}.folded"
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_text(profiler.folded(), encoding="utf-8")
+    return dest
+
+
+async def request_job_profile(redis, job_id: str) -> None:
+    await redis.set(_JOB_FLAG + job_id, 1, ex=_JOB_FLAG_TTL)
+
+
+async def job_profile_requested(redis, job_id: str) -> bool:
+    """Consume the flag set by request_job_profile(); False if Redis fails."""
+    try:
+        return bool(await redis.getdel(_JOB_FLAG + job_id))
+    except Exception as e:  # noqa: BLE001
+        logger.debug("Profile flag unavailable for %s: %s", job_id, e)
+        return False
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from redis.asyncio import Redis as AsyncRedis
+from sqlmodel import col
+
+from core import metrics
+from core.domain.job import Job, JobStatus
+from core.infra.db import session_scope
+from core.infra.executor import run_blocking
+from core.services import scheduler
+from core.settings import get_settings
+
+_IN_FLIGHT = (JobStatus.queued.value, JobStatus.running.value)
+
+
+@dataclass
+class Limit:
+    limit: int
+    current: int | None
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Enqueue refused because the service is over one of its limits.
+
+    The message is a JSON object (reason, limit, current, retry_after) so
+    MCP clients can act on it; the HTTP API answers 429 with Retry-After.
+    """
+
+    def __init__(
+        self, reason: str, limit: int, current: int, retry_after: int
+    ) -> None:
+        self.reason = reason
+        self.limit = limit
+        self.current = current
+        self.retry_after = retry_after
+        super().__init__(json.dumps(self.as_dict()))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "error": "overloaded",
+            "reason": self.reason,
+            "limit": self.limit,
+            "current": self.current,
+            "retry_after": self.retry_after,
+        }
+
+
+def _free_disk_mb() -> int:
+    return shutil.disk_usage(get_settings().storage_dir).free // 2**20
+
+
+def _client_jobs(client_id: str) -> int:
+    with session_scope() as s:
+        return (
+            s.query(Job)
+            .filter(
+                col(Job.client_id) == client_id,
+                col(Job.status).in_(_IN_FLIGHT),
+            )
+            .count()
+        )
+
+
+async def limits(
+    redis: AsyncRedis, client_id: str | None = None
+) -> dict[str, Limit]:
+    """Configured thresholds next to current usage (0 = check disabled)."""
+    settings = get_settings()
+    depth = sum((await scheduler.pending(redis)).values())
+    free_mb = await run_blocking(_free_disk_mb)
+    client_jobs = (
+        await run_blocking(_client_jobs, client_id) if client_id else None
+    )
+    return {
+        "queue_depth": Limit(settings.admission_max_queue_depth, depth),
+        "free_disk_mb": Limit(settings.admission_min_free_disk_mb, free_mb),
+        "client_jobs": Limit(settings.admission_max_client_jobs, client_jobs),
+    }
+
+
+def as_json(current: dict[str, Limit]) -> dict[str, dict[str, int | None]]:
+    return {name: asdict(limit) for name, limit in current.items()}
+
+
+async def check(redis: AsyncRedis, client_id: str | None) -> None:
+    """Raise AdmissionRejectedError if a new job should be shed now."""
+    current = await limits(redis, client_id)
+    depth = current["queue_depth"]
+    free = current["free_disk_mb"]
+    client = current["client_jobs"]
+    checks = [
+        ("queue_full", depth, 0 < depth.limit <= (depth.current or 0)),
+        ("disk_low", free, (free.current or 0) < free.limit),
+        ("client_busy", client, 0 < client.limit <= (client.current or 0)),
+    ]
+    for reason, limit, exceeded in checks:
+        if exceeded:
+            metrics.ADMISSION_REJECTED.labels(reason).inc()
+            raise AdmissionRejectedError(
+                reason,
+                limit.limit,
+                limit.current or 0,
+                get_settings().admission_retry_after,
+            )
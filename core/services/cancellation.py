@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlmodel import col
+
+from core.domain.job import Job, JobStatus
+from core.infra.db import session_scope
+from core.infra.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# How often a running job checks whether it was cancelled
+_POLL_SECONDS = 1.0
+
+_CANCELLABLE = (JobStatus.queued.value, JobStatus.running.value)
+
+
+class JobCancelledError(Exception):
+    """The job was cancelled while this worker was running it."""
+
+
+def cancel(job_id: str) -> JobStatus:
+    """
+    Mark a queued or running job cancelled and return its new status.
+
+    The worker running it notices within a second and stops; a queued
+    job is skipped when its ticket comes up. Finished jobs are left as
+    they are. Raises ValueError if the job does not exist.
+    """
+    stmt = (
+        update(Job)
+        .where(col(Job.id) == job_id, col(Job.status).in_(_CANCELLABLE))
+        .values(
+            status=JobStatus.cancelled.value,
+            error="Cancelled",
+            updated_at=datetime.now(),
+        )
+    )
+    with session_scope() as s:
+        if s.execute(stmt).rowcount == 1:
+            logger.info("Job %s cancelled", job_id)
+            return JobStatus.cancelled
+        job = s.get(Job, job_id)
+        if job is None:
+            raise ValueError("Job not found")
+        return JobStatus(job.status)
+
+
+def is_cancelled(job_id: str) -> bool:
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        return job is not None and job.status == JobStatus.cancelled.value
+
+
+@asynccontextmanager
+async def watch(job_id: str) -> AsyncIterator[None]:
+    """
+    Cancel the enclosed block as soon as ``job_id`` is cancelled.
+
+    The block sees a CancelledError at its current await (so ffmpeg is
+    killed and yt-dlp aborted by their own cleanup); on the way out it is
+    turned into JobCancelledError, as asyncio.timeout does with timeouts.
+    """
+    task = asyncio.current_task()
+    assert task is not None
+    fired = False
+
+    async def _poll() -> None:
+        nonlocal fired
+        while not await run_blocking(is_cancelled, job_id):
+            await asyncio.sleep(_POLL_SECONDS)
+        fired = True
+        task.cancel()
+
+    poller = asyncio.create_task(_poll())
+    try:
+        yield
+    except asyncio.CancelledError:
+        # Only ours: a worker shutdown must still propagate
+        if fired and task.uncancel() == 0:
+            raise JobCancelledError(job_id) from None
+        raise
+    finally:
+        poller.cancel()
+        try:
+            await poller
+        except asyncio.CancelledError:
+            pass
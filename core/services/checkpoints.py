@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from core.domain.job import Job
+from core.infra.db import session_scope
+from core.infra.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class Checkpoint:
+    paths: list[Path]
+    extra: dict[str, Any]
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _describe(paths: list[Path], base: Path) -> list[dict[str, Any]]:
+    return [
+        {
+            "path": str(p.relative_to(base)),
+            "size": p.stat().st_size,
+            "sha256": _sha256(p),
+        }
+        for p in paths
+    ]
+
+
+def _intact(files: list[dict[str, Any]], base: Path) -> list[Path] | None:
+    """Paths of the recorded files if all still match, else None."""
+    paths = []
+    for f in files:
+        p = base / f["path"]
+        # Size first: a cheap way to reject most damaged files
+        if not p.is_file() or p.stat().st_size != f["size"]:
+            return None
+        if _sha256(p) != f["sha256"]:
+            return None
+        paths.append(p)
+    return paths
+
+
+async def save(
+    job_id: str, stage: str, paths: list[Path], base: Path, **extra: Any
+) -> None:
+    """Record ``stage`` as done with its output files (relative to base)."""
+    files = await run_blocking(_describe, paths, base)
+    record = {"files": files, "at": datetime.now().isoformat(), **extra}
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        if job:
+            # Assign a new dict: in-place changes to JSON are not tracked
+            job.checkpoints = {**(job.checkpoints or {}), stage: record}
+            s.add(job)
+
+
+async def restore(job_id: str, stage: str, base: Path) -> Checkpoint | None:
+    """The checkpoint of ``stage`` if its files are intact, else None."""
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        record = (job.checkpoints or {}).get(stage) if job else None
+    if not record:
+        return None
+    paths = await run_blocking(_intact, record["files"], base)
+    if paths is None:
+        logger.info("Checkpoint %s of job %s is stale; redoing", stage, job_id)
+        return None
+    extra = {k: v for k, v in record.items() if k not in {"files", "at"}}
+    return Checkpoint(paths=paths, extra=extra)
+
+
+def clear(job_id: str, *stages: str) -> None:
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        if job and job.checkpoints:
+            job.checkpoints = {
+                k: v for k, v in job.checkpoints.items() if k not in stages
+            }
+            s.add(job)
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import shutil
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from pathlib import Path
 
 import httpx
@@ -12,24 +18,75 @@ from tenacity import (
 )
 
 import transcoder.ffmpeg_cli as ffmpeg_cli
-from core.domain.job import DownloadOptions, Job, JobStatus
+from core import metrics, tracing
+from core.domain.job import DownloadOptions, Job, JobPriority, JobStatus
 from core.infra.db import session_scope
-from core.services import provider_registry
-from storage.local_fs import LocalStorage
+from core.infra.executor import run_blocking
+from core.ports.provider_port import ProbeResult, ProviderPort
+from core.ports.storage_port import StoragePort
+from core.services import (
+    cancellation,
+    checkpoints,
+    leases,
+    provider_registry,
+    retention,
+    scheduler,
+)
+from core.services.progress import ProgressReporter
+from core.services.provider_limits import ProviderGate, ProviderPausedError
+from core.services.queue import enqueue_download_job
+from core.settings import get_settings
+from storage import get_storage
 
+logger = logging.getLogger(__name__)
 
-async def _download_cover(url: str, dest: Path) -> Path | None:
+
+class StageTimeoutError(Exception):
+    def __init__(self, stage: str, seconds: float) -> None:
+        super().__init__(f"{stage} timed out after {seconds:g}s")
+        self.stage = stage
+
+
+@asynccontextmanager
+async def _deadline(stage: str, seconds: float) -> AsyncIterator[None]:
+    """
+    Cancel the stage after ``seconds``: ffmpeg is killed and yt-dlp aborted
+    by their cancellation cleanup, then StageTimeoutError is raised.
+    """
     try:
-        async with httpx.AsyncClient(
-            timeout=20.0, follow_redirects=True
-        ) as client:
-            r = await client.get(url)
-            r.raise_for_status()
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            dest.write_bytes(r.content)
-            return dest
-    except Exception:
-        return None
+        async with asyncio.timeout(seconds) as cm:
+            yield
+    except TimeoutError as e:
+        # A TimeoutError from inside the stage is just an error
+        if not cm.expired():
+            raise
+        raise StageTimeoutError(stage, seconds) from e
+
+
+async def _download_cover(url: str, dest: Path) -> Path | None:
+    with tracing.span("cover.fetch", url=url) as span:
+        try:
+            async with httpx.AsyncClient(
+                timeout=20.0, follow_redirects=True
+            ) as client:
+                r = await client.get(url)
+                r.raise_for_status()
+                await run_blocking(_write_file, dest, r.content)
+                span.set_attribute("cover.bytes", len(r.content))
+                return dest
+        except Exception as e:
+            span.record_exception(e)
+            return None
+
+
+def _write_file(dest: Path, data: bytes) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    dest.write_bytes(data)
+
+
+def _copy_file(src: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(src, dest)
 
 
 def _ext_of(path: Path) -> str:
@@ -37,58 +94,251 @@ def _ext_of(path: Path) -> str:
 
 
 async def process_job(job_id: str) -> None:
-    storage = LocalStorage()
+    # Marks the job running under this worker's lease
+    if not leases.claim(job_id):
+        logger.info("Job %s is gone, cancelled or leased elsewhere", job_id)
+        return
+    try:
+        async with leases.heartbeat(job_id):
+            await _process_claimed(job_id)
+    except leases.LeaseLostError:
+        # The job was requeued; its new worker resumes from the checkpoints
+        logger.warning("Job %s abandoned after losing its lease", job_id)
+    finally:
+        leases.release(job_id)
+
 
-    # Load and mark running; capture essentials
+async def _process_claimed(job_id: str) -> None:
+    storage = get_storage()
+
+    # Capture essentials
     with session_scope() as s:
         job = s.get(Job, job_id)
         if not job:
             return
-        job.status = JobStatus.running.value
-        s.add(job)
         url = job.url
         options = job.options
+        priority = JobPriority(job.priority or JobPriority.interactive.value)
+        client_id = job.client_id
+        duration = job.duration
+        carrier = job.trace_context
 
-    provider = provider_registry.detect_provider(url)
-    if not provider:
-        _mark_failed(job_id, "No provider available")
-        return
+    # Continue the trace of the request that enqueued the job
+    with tracing.span(
+        "forge.job", carrier=carrier, **{"job.id": job_id}
+    ) as span:
+        with tracing.span("provider.detect", url=url):
+            provider = provider_registry.detect_provider(url)
+        if not provider:
+            _mark_failed(job_id, "No provider available")
+            return
+
+        # Resolve options
+        opts = DownloadOptions.model_validate(options)
+        span.set_attributes(
+            {"job.provider": provider.name, "job.format": opts.format}
+        )
+
+        metrics.JOBS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        outcome = JobStatus.failed.value
+        try:
+            async with cancellation.watch(job_id):
+                outcome = await _run_job(
+                    job_id,
+                    url,
+                    provider,
+                    opts,
+                    storage,
+                    priority,
+                    client_id,
+                    duration,
+                )
+        except cancellation.JobCancelledError:
+            logger.info("Job %s stopped after cancellation", job_id)
+            outcome = JobStatus.cancelled.value
+        finally:
+            metrics.JOBS_IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - started
+            metrics.observe_job(provider.name, opts.format, outcome, elapsed)
+            span.set_attributes(
+                {"job.outcome": outcome, "job.duration_s": elapsed}
+            )
 
-    # Resolve options
-    opts = DownloadOptions.model_validate(options)
 
-    # Download original with retries
+async def _run_job(
+    job_id: str,
+    url: str,
+    provider: ProviderPort,
+    opts: DownloadOptions,
+    storage: StoragePort,
+    priority: JobPriority,
+    client_id: str | None,
+    duration: int | None,
+) -> str:
+    """Run the pipeline for a loaded job; returns the outcome for metrics."""
+    reporter = ProgressReporter(job_id)
+    settings = get_settings()
     try:
+        async with _deadline("download", settings.download_timeout_seconds):
+            original_path, probe = await _download_stage(
+                job_id, url, provider, opts, storage, reporter
+            )
+    except StageTimeoutError as e:
+        _mark_timed_out(job_id, str(e))
+        return JobStatus.timed_out.value
+    except PermissionError as e:
+        _mark_failed(job_id, str(e))
+        return JobStatus.failed.value
+    except ProviderPausedError as e:
+        # Park the job instead of burning retries against a throttling host
+        _mark_queued(job_id)
+        reporter.stage("paused", eta=int(e.retry_after))
+        await enqueue_download_job(
+            job_id,
+            priority=priority,
+            client_id=client_id,
+            delay=e.retry_after,
+            cost=sum(
+                scheduler.estimate_cost(duration, p.format)
+                for p in opts.profiles()
+            ),
+        )
+        return "paused"
+
+    job_dir = storage.job_dir(job_id)
+    if await checkpoints.restore(job_id, "transcode", job_dir) is None:
+        try:
+            async with _deadline(
+                "transcode", settings.transcode_timeout_seconds
+            ):
+                await _transcode_stage(
+                    job_id,
+                    provider,
+                    opts,
+                    original_path,
+                    probe,
+                    storage,
+                    reporter,
+                )
+        except StageTimeoutError as e:
+            _mark_timed_out(job_id, str(e))
+            return JobStatus.timed_out.value
+    if not opts.prefer_original:
+        await run_blocking(retention.drop_original, job_id, storage)
+    # Upload to object storage; a no-op for the local volume
+    with metrics.stage_timer("publish", provider.name, opts.format):
+        await run_blocking(storage.publish, job_id)
+    if not job_dir.exists():
+        # The files moved to object storage: the checkpoints point nowhere
+        checkpoints.clear(job_id, "download", "transcode")
+    await run_blocking(retention.record_size, job_id, storage)
+    reporter.stage("done")
+
+    # Mark success
+    with session_scope() as s:
+        j = s.get(Job, job_id)
+        if j:
+            j.status = JobStatus.succeeded.value
+            s.add(j)
+    return JobStatus.succeeded.value
+
+
+async def _download_stage(
+    job_id: str,
+    url: str,
+    provider: ProviderPort,
+    opts: DownloadOptions,
+    storage: StoragePort,
+    reporter: ProgressReporter,
+) -> tuple[Path, ProbeResult]:
+    job_dir = storage.job_dir(job_id)
+    done = await checkpoints.restore(job_id, "download", job_dir)
+    if done is not None:
+        return done.paths[0], ProbeResult(**done.extra["probe"])
+    # Whatever was derived from a previous original is no longer trusted
+    checkpoints.clear(job_id, "transcode")
+    reporter.stage("download")
+
+    # Download original with retries, within the provider's shared limits
+    gate = ProviderGate(provider.name)
+    with (
+        metrics.stage_timer("download", provider.name, opts.format),
+        tracing.span("provider.download", url=url) as span,
+    ):
         async for attempt in AsyncRetrying(
             wait=wait_exponential(multiplier=1, min=1, max=8),
             stop=stop_after_attempt(3),
-            retry=retry_if_not_exception_type(PermissionError),
+            retry=retry_if_not_exception_type(
+                (PermissionError, ProviderPausedError)
+            ),
+            before_sleep=lambda _: metrics.RETRIES.labels(
+                provider.name, "download"
+            ).inc(),
         ):
             with attempt:
                 original_dir = storage.ensure_subdir(job_id, "original")
-                original_path_str, probe = await provider.download(
-                    url, str(original_dir), respect_tou=opts.respect_tou
-                )
-    except PermissionError as e:
-        _mark_failed(job_id, str(e))
-        return
+                async with gate.slot():
+                    original_path_str, probe = await provider.download(
+                        url,
+                        str(original_dir),
+                        respect_tou=opts.respect_tou,
+                        progress=reporter.on_download,
+                    )
+        span.set_attributes(
+            {
+                "download.bytes": Path(original_path_str).stat().st_size,
+                "download.attempts": attempt.retry_state.attempt_number,
+                "media.duration_s": probe.duration,
+            }
+        )
 
     # Update metadata
     _update_job_metadata(job_id, probe)
-
     original_path = Path(original_path_str)
+    await checkpoints.save(
+        job_id, "download", [original_path], job_dir, probe=asdict(probe)
+    )
+    return original_path, probe
+
+
+async def _transcode_stage(
+    job_id: str,
+    provider: ProviderPort,
+    opts: DownloadOptions,
+    original_path: Path,
+    probe: ProbeResult,
+    storage: StoragePort,
+    reporter: ProgressReporter,
+) -> None:
     final_dir = storage.ensure_subdir(job_id, "final")
-    final_path = await _produce_final(original_path, final_dir, opts)
+    cover = None
+    if opts.embed_cover and probe.artwork_url:
+        with metrics.stage_timer("cover", provider.name, opts.format):
+            cover = await _download_cover(
+                probe.artwork_url, final_dir / "cover.jpg"
+            )
+    # Tags and cover are written by the same ffmpeg pass
+    reporter.stage("transcode", duration=probe.duration)
+    with metrics.stage_timer("transcode", provider.name, opts.format):
+        paths = await _produce_final(
+            original_path,
+            final_dir,
+            opts,
+            probe.duration,
+            reporter,
+            metadata=_tags_for(opts, probe),
+            cover=cover,
+        )
+    await checkpoints.save(job_id, "transcode", paths, storage.job_dir(job_id))
 
-    # Embed tags and cover (best-effort)
-    await _embed_tags_and_cover(final_path, opts, probe, final_dir)
 
-    # Mark success
+def _mark_queued(job_id: str) -> None:
     with session_scope() as s:
-        j = s.get(Job, job_id)
-        if j:
-            j.status = JobStatus.succeeded.value
-            s.add(j)
+        job = s.get(Job, job_id)
+        if job:
+            job.status = JobStatus.queued.value
+            s.add(job)
 
 
 def _mark_failed(job_id: str, error: str) -> None:
@@ -100,6 +350,15 @@ def _mark_failed(job_id: str, error: str) -> None:
             s.add(job)
 
 
+def _mark_timed_out(job_id: str, error: str) -> None:
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        if job:
+            job.status = JobStatus.timed_out.value
+            job.error = error
+            s.add(job)
+
+
 def _update_job_metadata(job_id: str, probe) -> None:
     with session_scope() as s:
         j = s.get(Job, job_id)
@@ -111,76 +370,61 @@ def _update_job_metadata(job_id: str, probe) -> None:
             s.add(j)
 
 
-async def _produce_final(
-    original_path: Path, final_dir: Path, opts: DownloadOptions
-) -> Path:
-    if _ext_of(original_path) == opts.format.lower():
-        final_path = final_dir / original_path.name
-        if original_path != final_path:
-            final_dir.mkdir(parents=True, exist_ok=True)
-            final_path.write_bytes(original_path.read_bytes())
-        return final_path
-    return await ffmpeg_cli.transcode(
-        original_path, final_dir, opts.format, opts.quality
-    )
+def _tags_for(opts: DownloadOptions, probe) -> dict[str, str]:
+    """Title/artist from the provider, overridden by the caller's tags."""
+    tags: dict[str, object] = {"title": probe.title, "artist": probe.artist}
+    tags.update(opts.tags)
+    return {k: str(v) for k, v in tags.items() if v not in (None, "")}
 
 
-async def _embed_tags_and_cover(
-    final_path: Path, opts: DownloadOptions, probe, final_dir: Path
-) -> None:
+async def _produce_final(
+    original_path: Path,
+    final_dir: Path,
+    opts: DownloadOptions,
+    duration: int | None = None,
+    reporter: ProgressReporter | None = None,
+    *,
+    metadata: dict[str, str] | None = None,
+    cover: Path | None = None,
+) -> list[Path]:
+    """Write every requested profile into ``final_dir`` with one ffmpeg."""
+    profiles = opts.profiles()
+    exts = [ffmpeg_cli.output_extension(p.format) for p in profiles]
+    outputs = [
+        ffmpeg_cli.TranscodeOutput(
+            p.format,
+            p.quality,
+            # Same container: copy the audio stream, only rewrite the tags
+            remux=ext == _ext_of(original_path) and exts.count(ext) == 1,
+        ) for p, ext in zip(profiles, exts, strict=True)
+    ]
+    progress = reporter.on_transcode if reporter else None
     try:
-        suffix = final_path.suffix.lower()
-        if suffix == ".mp3":
-            await _tag_mp3(final_path, opts, probe, final_dir)
-        elif suffix == ".flac":
-            await _tag_flac(final_path, opts, probe, final_dir)
-    except Exception as e:  # pragma: no cover - best-effort
-        logging.getLogger(__name__).warning("Tagging skipped: %s", e)
-
-
-async def _tag_mp3(
-    final_path: Path, opts: DownloadOptions, probe, final_dir: Path
-) -> None:
-    from mutagen.id3 import APIC, ID3, TIT2, TPE1
-
-    tags = ID3(final_path)
-    if probe.title:
-        tags.add(TIT2(encoding=3, text=probe.title))
-    if probe.artist:
-        tags.add(TPE1(encoding=3, text=probe.artist))
-    if opts.embed_cover and probe.artwork_url:
-        cover = await _download_cover(
-            probe.artwork_url, final_dir / "cover.jpg"
+        return await ffmpeg_cli.transcode_many(
+            original_path,
+            final_dir,
+            outputs,
+            duration=duration,
+            progress=progress,
+            metadata=metadata,
+            cover=cover,
+        )
+    except RuntimeError as e:
+        if not any(o.remux for o in outputs):
+            raise
+        # Keep the untouched original rather than failing the job
+        logger.warning("Remux failed, copying: %s", e)
+        final_path = final_dir / original_path.name
+        await run_blocking(_copy_file, original_path, final_path)
+        rest = [o for o in outputs if not o.remux]
+        if not rest:
+            return [final_path]
+        return [final_path] + await ffmpeg_cli.transcode_many(
+            original_path,
+            final_dir,
+            rest,
+            duration=duration,
+            progress=progress,
+            metadata=metadata,
+            cover=cover,
         )
-        if cover and cover.exists():
-            tags.add(
-                APIC(
-                    encoding=3,
-                    mime="image/jpeg",
-                    type=3,
-                    desc="Cover",
-                    data=cover.read_bytes(),
-                )
-            )
-    tags.save(v2_version=3)
-
-
-async def _tag_flac(
-    final_path: Path, opts: DownloadOptions, probe, final_dir: Path
-) -> None:
-    from mutagen import File as MutagenFile
-    from mutagen.flac import Picture
-
-    mf = MutagenFile(final_path, easy=False)
-    f = mf
-    if f is not None and hasattr(f, "pictures"):
-        if opts.embed_cover and probe.artwork_url:
-            cover = await _download_cover(
-                probe.artwork_url, final_dir / "cover.jpg"
-            )
-            if cover and cover.exists():
-                pic = Picture()
-                pic.data = cover.read_bytes()
-                pic.mime = "image/jpeg"
-                f.add_picture(pic)
-                f.save()
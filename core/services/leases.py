@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+from sqlmodel import col
+
+from core.domain.job import DownloadOptions, Job, JobPriority, JobStatus
+from core.infra.db import session_scope
+from core.infra.executor import run_blocking
+from core.services import scheduler
+from core.services.queue import enqueue_download_job
+from core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_id() -> str:
+    """Identity written into leases taken by this process."""
+    return _OWNER
+
+
+def _expiry(now: datetime) -> datetime:
+    return now + timedelta(seconds=get_settings().job_lease_seconds)
+
+
+def _lease_expired(now: datetime):
+    return or_(
+        col(Job.lease_expires_at).is_(None),
+        col(Job.lease_expires_at) < now,
+    )
+
+
+def claim(job_id: str) -> bool:
+    """
+    Mark the job running under our lease.
+
+    Fails if the job is missing, was cancelled, or another worker holds a
+    live lease on it, so a duplicate ticket can't run the same job twice.
+    """
+    now = datetime.now()
+    stmt = (
+        update(Job)
+        .where(
+            col(Job.id) == job_id,
+            col(Job.status) != JobStatus.cancelled.value,
+            or_(
+                col(Job.status) != JobStatus.running.value,
+                _lease_expired(now),
+            ),
+        )
+        .values(
+            status=JobStatus.running.value,
+            lease_owner=_OWNER,
+            lease_expires_at=_expiry(now),
+            updated_at=now,
+        )
+    )
+    with session_scope() as s:
+        return s.execute(stmt).rowcount == 1
+
+
+def _renew(job_id: str) -> bool:
+    now = datetime.now()
+    stmt = (
+        update(Job)
+        .where(col(Job.id) == job_id, col(Job.lease_owner) == _OWNER)
+        .values(lease_expires_at=_expiry(now))
+    )
+    with session_scope() as s:
+        return s.execute(stmt).rowcount == 1
+
+
+def release(job_id: str) -> None:
+    stmt = (
+        update(Job)
+        .where(col(Job.id) == job_id, col(Job.lease_owner) == _OWNER)
+        .values(lease_owner=None, lease_expires_at=None)
+    )
+    with session_scope() as s:
+        s.execute(stmt)
+
+
+class LeaseLostError(Exception):
+    """Our lease lapsed and the job may now be running on another worker."""
+
+
+@asynccontextmanager
+async def heartbeat(job_id: str) -> AsyncIterator[None]:
+    """
+    Keep renewing our lease on ``job_id`` while the block runs.
+
+    If a renewal fails the reaper has given the job away, so the block is
+    cancelled like ``cancellation.watch`` does and LeaseLostError raised:
+    two workers must never process the same job.
+    """
+    task = asyncio.current_task()
+    assert task is not None
+    lost = False
+
+    async def _beat() -> None:
+        nonlocal lost
+        interval = get_settings().job_lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not await run_blocking(_renew, job_id):
+                # We stalled past the lease
+                logger.warning("Lost the lease on job %s, stopping", job_id)
+                lost = True
+                task.cancel()
+                return
+
+    beat = asyncio.create_task(_beat())
+    try:
+        yield
+    except asyncio.CancelledError:
+        # Only ours: a worker shutdown must still propagate
+        if lost and task.uncancel() == 0:
+            raise LeaseLostError(job_id) from None
+        raise
+    finally:
+        beat.cancel()
+        try:
+            await beat
+        except asyncio.CancelledError:
+            pass
+
+
+async def reap_expired() -> int:
+    """
+    Requeue running jobs whose lease expired, or fail them once they have
+    used up JOB_MAX_ATTEMPTS. Returns the number of jobs handled.
+    """
+    max_attempts = get_settings().job_max_attempts
+    now = datetime.now()
+    running = col(Job.status) == JobStatus.running.value
+    requeue: list[Job] = []
+    reaped = 0
+    with session_scope() as s:
+        stale = s.query(Job).filter(running, _lease_expired(now)).all()
+        for job in stale:
+            attempt = (job.reaped or 0) + 1
+            values: dict[str, object] = {
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": now,
+            }
+            if attempt >= max_attempts:
+                values["status"] = JobStatus.failed.value
+                values["error"] = f"Worker lost the job {attempt} times"
+            else:
+                values["status"] = JobStatus.queued.value
+                values["reaped"] = attempt
+            # Conditional, in case a worker claimed it since the select
+            updated = s.execute(
+                update(Job)
+                .where(col(Job.id) == job.id, running, _lease_expired(now))
+                .values(**values)
+            ).rowcount
+            reaped += updated
+            if updated and values["status"] == JobStatus.queued.value:
+                requeue.append(job)
+    for job in requeue:
+        logger.warning("Requeueing job %s after an expired lease", job.id)
+        opts = DownloadOptions.model_validate(job.options)
+        await enqueue_download_job(
+            job.id,
+            priority=JobPriority(job.priority or JobPriority.interactive.value),
+            client_id=job.client_id,
+            cost=sum(
+                scheduler.estimate_cost(job.duration, p.format)
+                for p in opts.profiles()
+            ),
+        )
+    return reaped
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Awaitable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, cast
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from core.domain.job import JobProgressDTO
+from core.infra.redis import get_async_redis, get_redis
+from core.ports.provider_port import DownloadProgress
+from core.settings import get_settings
+from transcoder.ffmpeg_cli import TranscodeProgress
+
+_KEY = "forge:progress:{job_id}"
+# Keep finished jobs' last snapshot around for a while, then let Redis drop it
+_TTL_SECONDS = 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+# One thread writes all progress, in order, so hooks on the event loop or
+# in yt-dlp threads never wait on Redis
+_writer: ThreadPoolExecutor | None = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> ThreadPoolExecutor:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="forge-progress"
+            )
+        return _writer
+
+
+def progress_key(job_id: str) -> str:
+    return _KEY.format(job_id=job_id)
+
+
+class ProgressReporter:
+    """
+    Throttled writer of per-job progress into a Redis hash.
+
+    Hooks may fire from yt-dlp worker threads and from the event loop, so
+    updates are serialized with a lock and written by a background thread.
+    Redis errors are logged and swallowed: progress is informational and
+    must never fail a job.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        *,
+        redis: Redis | None = None,
+        min_interval: float | None = None,
+    ) -> None:
+        self.job_id = job_id
+        self._redis = redis
+        self._min_interval = (
+            get_settings().progress_min_interval
+            if min_interval is None
+            else min_interval
+        )
+        self._lock = threading.Lock()
+        self._stage: str | None = None
+        self._last_write = 0.0
+        self._pending: Future[None] | None = None
+
+    def stage(self, name: str, **fields: Any) -> None:
+        """Enter a new stage; always written, dropping stale stage fields."""
+        with self._lock:
+            self._stage = name
+            self._write(name, fields, replace=True)
+
+    def on_download(self, p: DownloadProgress) -> None:
+        percent = (
+            p.downloaded_bytes * 100 / p.total_bytes if p.total_bytes else None
+        )
+        self._update(
+            "download",
+            downloaded_bytes=p.downloaded_bytes,
+            total_bytes=p.total_bytes,
+            speed=p.speed,
+            eta=p.eta,
+            percent=percent,
+        )
+
+    def on_transcode(self, p: TranscodeProgress) -> None:
+        percent = (
+            min(p.position * 100 / p.duration, 100.0) if p.duration else None
+        )
+        self._update(
+            "transcode",
+            position=p.position,
+            duration=p.duration,
+            percent=percent,
+        )
+
+    def _update(self, stage: str, **fields: Any) -> None:
+        with self._lock:
+            now = time.monotonic()
+            changed = stage != self._stage
+            if not changed and now - self._last_write < self._min_interval:
+                return
+            self._stage = stage
+            self._write(stage, fields, replace=changed)
+
+    def _write(self, stage: str, fields: dict[str, Any], replace: bool) -> None:
+        mapping: dict[str, Any] = {
+            k: v for k, v in fields.items() if v is not None
+        }
+        mapping["stage"] = stage
+        mapping["updated_at"] = datetime.now().isoformat()
+        key = progress_key(self.job_id)
+        # Throttle failures too, so an unreachable Redis doesn't pile up
+        self._last_write = time.monotonic()
+        self._pending = _get_writer().submit(self._send, key, mapping, replace)
+
+    def _send(self, key: str, mapping: dict[str, Any], replace: bool) -> None:
+        try:
+            pipe = (self._redis or get_redis()).pipeline(transaction=True)
+            if replace:
+                pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, _TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:  # noqa: BLE001
+            logger.debug("Progress write skipped for %s: %s", self.job_id, e)
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Block until the writes queued so far are done (or ``timeout``)."""
+        pending = self._pending
+        if pending is not None:
+            pending.exception(timeout)
+
+
+async def read_progress(
+    job_id: str, *, redis: AsyncRedis | None = None
+) -> JobProgressDTO | None:
+    try:
+        raw = await cast(
+            Awaitable[dict[str, str]],
+            (redis or get_async_redis()).hgetall(progress_key(job_id)),
+        )
+    except Exception as e:  # noqa: BLE001
+        logger.debug("Progress read skipped for %s: %s", job_id, e)
+        return None
+    if not raw:
+        return None
+    return JobProgressDTO.model_validate(raw)
+
+
+async def read_progress_many(
+    job_ids: list[str], *, redis: AsyncRedis | None = None
+) -> dict[str, JobProgressDTO]:
+    """Progress of several jobs in one pipelined round trip."""
+    if not job_ids:
+        return {}
+    try:
+        pipe = (redis or get_async_redis()).pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hgetall(progress_key(job_id))
+        rows = await pipe.execute()
+    except Exception as e:  # noqa: BLE001
+        logger.debug("Progress read skipped: %s", e)
+        return {}
+    return {
+        job_id: JobProgressDTO.model_validate(raw)
+        for job_id, raw in zip(job_ids, rows, strict=True)
+        if raw
+    }
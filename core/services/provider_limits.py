@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+from typing import Any, cast
+
+from redis.asyncio import Redis as AsyncRedis
+
+from core.infra.redis import get_async_redis
+from core.settings import AppSettings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Per provider, shared by every worker:
+#   forge:provider:<name>:bucket  hash tokens/ts (token bucket)
+#   forge:provider:<name>:aimd    hash limit/strikes (adaptive concurrency)
+#   forge:provider:<name>:slots   zset lease -> expiry (in-flight downloads)
+#   forge:provider:<name>:open    set while the circuit breaker is open
+_PREFIX = "forge:provider:"
+
+# A crashed worker's slot is reclaimed after this long
+_SLOT_LEASE_SECONDS = 30 * 60
+# Poll interval while waiting for a concurrency slot
+_SLOT_POLL_SECONDS = 0.5
+
+# Every caller takes its token up front, letting the balance go negative,
+# so concurrent waiters queue up 1/rate apart instead of all waking at once.
+# A caller that would wait longer than max_wait takes nothing.
+_BUCKET_SCRIPT = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = math.max(0, 1 - tokens) / rate
+if wait <= max_wait then
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+_ACQUIRE_SLOT = """
+local now, lease, ttl = tonumber(ARGV[1]), ARGV[2], tonumber(ARGV[3])
+local start = tonumber(ARGV[4])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local limit = tonumber(redis.call('HGET', KEYS[2], 'limit')) or start
+if redis.call('ZCARD', KEYS[1]) < math.floor(limit) then
+    redis.call('ZADD', KEYS[1], now + ttl, lease)
+    return 1
+end
+return 0
+"""
+
+# ARGV: outcome ("ok"|"throttled"), min, max, increase, decrease factor,
+#       breaker threshold, breaker cooldown (seconds), starting limit
+_RECORD = """
+local limit = tonumber(redis.call('HGET', KEYS[1], 'limit'))
+limit = limit or tonumber(ARGV[8])
+local lo, hi = tonumber(ARGV[2]), tonumber(ARGV[3])
+if ARGV[1] == 'ok' then
+    limit = math.min(hi, limit + tonumber(ARGV[4]) / math.max(limit, 1))
+    redis.call('HSET', KEYS[1], 'limit', limit, 'strikes', 0)
+    return 0
+end
+limit = math.max(lo, limit * tonumber(ARGV[5]))
+local strikes = redis.call('HINCRBY', KEYS[1], 'strikes', 1)
+redis.call('HSET', KEYS[1], 'limit', limit)
+if strikes >= tonumber(ARGV[6]) then
+    redis.call('SET', KEYS[2], 1, 'PX', math.floor(tonumber(ARGV[7]) * 1000))
+    redis.call('HSET', KEYS[1], 'strikes', 0)
+    return 1
+end
+return 0
+"""
+
+_THROTTLE_STATUSES = frozenset({429, 503})
+# Messages of errors that lost their status (yt-dlp reports them as text)
+_THROTTLE_MARKERS = (
+    "http error 429",
+    "http error 503",
+    "too many requests",
+    "rate limit",
+    "rate-limit",
+)
+
+
+class ProviderPausedError(Exception):
+    """The provider is throttling us; retry the job after ``retry_after``."""
+
+    def __init__(self, provider: str, retry_after: float) -> None:
+        super().__init__(
+            f"Provider {provider} paused, retry in {retry_after:.0f}s"
+        )
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def _status(exc: BaseException) -> int | None:
+    # yt-dlp's networking HTTPError has .status, urllib's has .code
+    for attr in ("status", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """True for HTTP 429/503 from the provider, wherever it is wrapped."""
+    seen: set[int] = set()
+    todo: list[BaseException | None] = [exc]
+    while todo:
+        e = todo.pop()
+        if e is None or id(e) in seen:
+            continue
+        seen.add(id(e))
+        if _status(e) in _THROTTLE_STATUSES:
+            return True
+        text = str(e).lower()
+        if any(m in text for m in _THROTTLE_MARKERS):
+            return True
+        # yt_dlp.utils.DownloadError keeps the original in exc_info
+        info = getattr(e, "exc_info", None)
+        if isinstance(info, tuple) and len(info) > 1:
+            todo.append(info[1])
+        todo += [e.__cause__, e.__context__]
+    return False
+
+
+class ProviderGate:
+    """
+    Distributed limits for calls into one provider.
+
+    Combines a token bucket (request rate), an AIMD concurrency limit that
+    grows on success and shrinks on throttling, and a circuit breaker that
+    pauses the provider after repeated throttling. State lives in Redis so
+    all workers share it. If Redis is unreachable the gate fails open.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        *,
+        redis: AsyncRedis | None = None,
+        settings: AppSettings | None = None,
+    ) -> None:
+        self.provider = provider
+        self._redis = redis
+        self._s = settings or get_settings()
+
+    @property
+    def redis(self) -> AsyncRedis:
+        return self._redis or get_async_redis()
+
+    def _key(self, suffix: str) -> str:
+        return f"{_PREFIX}{self.provider}:{suffix}"
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        lease = await self._acquire()
+        try:
+            yield
+        except Exception as e:
+            if is_throttle_error(e):
+                await self._record("throttled")
+            raise
+        else:
+            await self._record("ok")
+        finally:
+            if lease is not None:
+                await self._release(lease)
+
+    async def _acquire(self) -> str | None:
+        """Wait for a token and a concurrency slot; None if failing open."""
+        deadline = time.monotonic() + self._s.provider_max_wait
+        try:
+            await self._check_open()
+            wait = float(
+                await cast(
+                    Awaitable[str],
+                    self.redis.eval(
+                        _BUCKET_SCRIPT,
+                        1,
+                        self._key("bucket"),
+                        str(self._s.provider_rate),
+                        str(self._s.provider_burst),
+                        str(time.time()),
+                        str(self._s.provider_max_wait),
+                    ),
+                )
+            )
+            if wait > self._s.provider_max_wait:
+                raise ProviderPausedError(self.provider, wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            lease = uuid.uuid4().hex
+            while not await cast(
+                Awaitable[int],
+                self.redis.eval(
+                    _ACQUIRE_SLOT,
+                    2,
+                    self._key("slots"),
+                    self._key("aimd"),
+                    str(time.time()),
+                    lease,
+                    str(_SLOT_LEASE_SECONDS),
+                    str(self._s.provider_max_concurrency),
+                ),
+            ):
+                if time.monotonic() > deadline:
+                    raise ProviderPausedError(
+                        self.provider, self._s.provider_max_wait
+                    )
+                await asyncio.sleep(_SLOT_POLL_SECONDS)
+                await self._check_open()
+            return lease
+        except ProviderPausedError:
+            raise
+        except Exception as e:  # noqa: BLE001
+            logger.warning(
+                "Provider limits skipped for %s: %s", self.provider, e
+            )
+            return None
+
+    async def _check_open(self) -> None:
+        ttl_ms = await self.redis.pttl(self._key("open"))
+        if ttl_ms and ttl_ms > 0:
+            raise ProviderPausedError(self.provider, ttl_ms / 1000)
+
+    async def _record(self, outcome: str) -> None:
+        try:
+            opened = await cast(
+                Awaitable[int],
+                self.redis.eval(
+                    _RECORD,
+                    2,
+                    self._key("aimd"),
+                    self._key("open"),
+                    outcome,
+                    str(self._s.provider_min_concurrency),
+                    str(self._s.provider_max_concurrency),
+                    "1.0",
+                    "0.5",
+                    str(self._s.provider_breaker_threshold),
+                    str(self._s.provider_breaker_cooldown),
+                    str(self._s.provider_max_concurrency),
+                ),
+            )
+            if opened:
+                logger.warning(
+                    "Circuit open for provider %s for %ss",
+                    self.provider,
+                    self._s.provider_breaker_cooldown,
+                )
+        except Exception as e:  # noqa: BLE001
+            logger.warning(
+                "Provider limits skipped for %s: %s", self.provider, e
+            )
+
+    async def _release(self, lease: str) -> None:
+        try:
+            await self.redis.zrem(self._key("slots"), lease)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(
+                "Provider limits skipped for %s: %s", self.provider, e
+            )
+
+    async def state(self) -> dict[str, Any]:
+        """Current limit, in-flight count and breaker TTL (for diagnostics)."""
+        aimd = await cast(
+            Awaitable[dict[str, str]], self.redis.hgetall(self._key("aimd"))
+        )
+        return {
+            "limit": float(aimd.get("limit", self._s.provider_max_concurrency)),
+            "in_flight": await self.redis.zcard(self._key("slots")),
+            "paused_for": (
+                max(await self.redis.pttl(self._key("open")), 0) / 1000
+            ),
+        }
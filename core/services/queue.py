@@ -1,16 +1,48 @@
 from __future__ import annotations
 
-from arq import create_pool
+from arq import ArqRedis, create_pool
 from arq.connections import RedisSettings
 
+from core.domain.job import JobPriority
+from core.services import scheduler
 from core.settings import get_settings
 
+_pool: ArqRedis | None = None
 
-async def enqueue_download_job(job_id: str) -> None:
-    settings = get_settings()
-    async with await create_pool(
-        RedisSettings.from_dsn(settings.redis_url)
-    ) as redis:
+
+async def get_queue_pool() -> ArqRedis:
+    global _pool
+    if _pool is None:
+        settings = get_settings()
+        _pool = await create_pool(RedisSettings.from_dsn(settings.redis_url))
+    return _pool
+
+
+async def enqueue_download_job(
+    job_id: str,
+    *,
+    priority: JobPriority = JobPriority.interactive,
+    client_id: str | None = None,
+    delay: float = 0,
+    cost: float = 0,
+) -> None:
+    """
+    Submit a job to the fair-share scheduler and wake a worker for it.
+
+    The arq job is only a ticket: the worker asks the scheduler which job
+    to run when it picks the ticket up (workers.tasks.process_next).
+    ``delay`` keeps the job (and its ticket) back for that many seconds;
+    ``cost`` is the scheduler's work estimate (shortest job first).
+    """
+    redis = await get_queue_pool()
+    if await scheduler.submit(
+        redis,
+        job_id,
+        priority=priority,
+        client_id=client_id,
+        delay=delay,
+        cost=cost,
+    ):
         await redis.enqueue_job(
-            "process_download", job_id
-        )  # workers.tasks.process_download
+            "process_next", _defer_by=delay if delay > 0 else None
+        )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlmodel import col
+
+from core.domain.job import Job, JobStatus
+from core.infra.db import session_scope
+from core.ports.storage_port import StoragePort
+from core.services import checkpoints
+from core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs whose files may be evicted; queued/running ones never are
+_EVICTABLE = (
+    JobStatus.succeeded.value,
+    JobStatus.failed.value,
+    JobStatus.cancelled.value,
+    JobStatus.timed_out.value,
+)
+
+
+def record_size(job_id: str, storage: StoragePort) -> int:
+    """Refresh the job's entry in the size index."""
+    size = storage.size(job_id)
+    with session_scope() as s:
+        s.execute(
+            update(Job).where(col(Job.id) == job_id).values(size_bytes=size)
+        )
+    return size
+
+
+def touch(job_id: str) -> None:
+    """Note an artifact download; eviction goes least recently touched."""
+    with session_scope() as s:
+        s.execute(
+            update(Job)
+            .where(col(Job.id) == job_id)
+            .values(last_accessed_at=datetime.now())
+        )
+
+
+def drop_original(job_id: str, storage: StoragePort) -> None:
+    """Delete the source download once finals exist (prefer_original off)."""
+    storage.delete(job_id, "original")
+    # A re-run has to download again
+    checkpoints.clear(job_id, "download")
+
+
+def evict(job_id: str, storage: StoragePort) -> bool:
+    """
+    Delete a finished job's files and mark it expired.
+
+    The status flips first and only from a finished state, so a job that
+    was just re-enqueued or claimed is left alone.
+    """
+    stmt = (
+        update(Job)
+        .where(col(Job.id) == job_id, col(Job.status).in_(_EVICTABLE))
+        .values(
+            status=JobStatus.expired.value,
+            size_bytes=0,
+            checkpoints=None,
+            updated_at=datetime.now(),
+        )
+    )
+    with session_scope() as s:
+        if s.execute(stmt).rowcount != 1:
+            return False
+    storage.delete(job_id)
+    return True
+
+
+def enforce_quota(storage: StoragePort) -> list[str]:
+    """
+    Evict least recently downloaded finished jobs until the job files fit
+    in STORAGE_QUOTA_MB. Returns the evicted job ids.
+    """
+    quota = get_settings().storage_quota_mb * 2**20
+    if quota <= 0:
+        return []
+    finished = col(Job.status).in_(_EVICTABLE)
+    with session_scope() as s:
+        # Jobs from before the index existed
+        unsized = s.scalars(
+            select(col(Job.id)).where(finished, col(Job.size_bytes).is_(None))
+        ).all()
+    for job_id in unsized:
+        record_size(job_id, storage)
+
+    with session_scope() as s:
+        total = s.scalar(select(func.sum(col(Job.size_bytes)))) or 0
+        if total <= quota:
+            return []
+        last_used = func.coalesce(
+            col(Job.last_accessed_at), col(Job.updated_at)
+        )
+        candidates = s.execute(
+            select(col(Job.id), col(Job.size_bytes))
+            .where(finished, col(Job.size_bytes) > 0)
+            .order_by(last_used)
+        ).all()
+    evicted: list[str] = []
+    for job_id, size in candidates:
+        if total <= quota:
+            break
+        if evict(job_id, storage):
+            total -= size
+            evicted.append(job_id)
+    if evicted:
+        logger.info(
+            "Evicted %d jobs to fit the %d MB quota",
+            len(evicted),
+            get_settings().storage_quota_mb,
+        )
+    return evicted
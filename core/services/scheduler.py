@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable
+from typing import Any, cast
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from core.domain.job import JobPriority
+from core.settings import get_settings
+
+# Layout, per lane (named queue):
+#   forge:sched:<lane>:ring        list of clients with pending jobs (RR order)
+#   forge:sched:<lane>:q:<client>  zset job_id -> score (lowest runs first)
+#   forge:sched:<lane>:size        number of pending jobs in the lane
+#   forge:sched:<lane>:delayed     zset "<job> <penalty> <client>" -> ready-at
+#   forge:sched:<lane>:served      last time the lane was served (unset: idle)
+#
+# A job's score is its submit time plus a penalty proportional to its
+# estimated cost, so short jobs overtake long ones submitted a little
+# earlier, while a long job only ever waits behind a bounded amount of
+# later work (aging).
+#
+# Scripts build per-client keys at runtime, so this layout needs a single
+# Redis node (no cluster), which is what arq requires anyway.
+_PREFIX = "forge:sched:"
+
+# Lanes in priority order: bulk only runs when interactive is empty; the long
+# lane (very long media) runs last unless it has not been served for
+# SCHEDULE_LONG_MAX_WAIT seconds
+LANES: tuple[JobPriority, ...] = (
+    JobPriority.interactive,
+    JobPriority.bulk,
+    JobPriority.long,
+)
+
+DEFAULT_CLIENT = "anonymous"
+
+# Relative transcode cost per second of audio, by target format
+_FORMAT_COST: dict[str, float] = {
+    "flac": 0.6,
+    "mp3": 1.0,
+    "aac": 1.0,
+    "opus": 1.2,
+}
+
+# KEYS: ring, q, size, delayed, served
+# ARGV: client, score, job_id, ready_at (0 = now), penalty, now
+_SUBMIT = """
+if tonumber(ARGV[4]) > 0 then
+    local member = ARGV[3] .. ' ' .. ARGV[5] .. ' ' .. ARGV[1]
+    if redis.call('ZADD', KEYS[4], 'NX', ARGV[4], member) == 1 then
+        redis.call('INCR', KEYS[3])
+        return 1
+    end
+    return 0
+end
+if redis.call('ZCARD', KEYS[2]) == 0 then
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+end
+if redis.call('ZADD', KEYS[2], 'NX', ARGV[2], ARGV[3]) == 1 then
+    redis.call('INCR', KEYS[3])
+    redis.call('SET', KEYS[5], ARGV[6], 'NX')
+    return 1
+end
+return 0
+"""
+
+# ARGV: prefix, now, then (lane, max_wait) pairs in priority order
+_NEXT = """
+local prefix, now = ARGV[1], tonumber(ARGV[2])
+
+-- move delayed jobs whose time has come into their client queues
+local function promote(lane)
+    local delayed = lane .. ':delayed'
+    local ready = redis.call(
+        'ZRANGEBYSCORE', delayed, '-inf', now, 'WITHSCORES')
+    for j = 1, #ready, 2 do
+        local member = ready[j]
+        local s1 = string.find(member, ' ', 1, true)
+        local s2 = string.find(member, ' ', s1 + 1, true)
+        local job = string.sub(member, 1, s1 - 1)
+        local penalty = tonumber(string.sub(member, s1 + 1, s2 - 1))
+        local client = string.sub(member, s2 + 1)
+        local q = lane .. ':q:' .. client
+        if redis.call('ZCARD', q) == 0 then
+            redis.call('RPUSH', lane .. ':ring', client)
+        end
+        local score = tonumber(ready[j + 1]) + penalty
+        if redis.call('ZADD', q, 'NX', score, job) == 0 then
+            redis.call('DECR', lane .. ':size')
+        else
+            redis.call('SET', lane .. ':served', now, 'NX')
+        end
+        redis.call('ZREM', delayed, member)
+    end
+end
+
+local function pop(name)
+    local lane = prefix .. name
+    local ring = lane .. ':ring'
+    for _ = 1, redis.call('LLEN', ring) do
+        local client = redis.call('LMOVE', ring, ring, 'LEFT', 'RIGHT')
+        if not client then
+            break
+        end
+        local q = lane .. ':q:' .. client
+        local popped = redis.call('ZPOPMIN', q)
+        if redis.call('ZCARD', q) == 0 then
+            redis.call('LREM', ring, 0, client)
+        end
+        if #popped > 0 then
+            redis.call('DECR', lane .. ':size')
+            if redis.call('LLEN', ring) == 0 then
+                redis.call('DEL', lane .. ':served')
+            else
+                redis.call('SET', lane .. ':served', now)
+            end
+            return {name, client, popped[1]}
+        end
+    end
+    return false
+end
+
+for i = 3, #ARGV, 2 do
+    promote(prefix .. ARGV[i])
+end
+-- a lane left unserved for max_wait seconds jumps the priority order
+for i = 3, #ARGV, 2 do
+    local max_wait = tonumber(ARGV[i + 1])
+    if max_wait > 0 then
+        local served = redis.call('GET', prefix .. ARGV[i] .. ':served')
+        if served and now - tonumber(served) >= max_wait then
+            local res = pop(ARGV[i])
+            if res then
+                return res
+            end
+        end
+    end
+end
+for i = 3, #ARGV, 2 do
+    local res = pop(ARGV[i])
+    if res then
+        return res
+    end
+end
+return false
+"""
+
+
+def estimate_cost(duration: float | None, fmt: str | None = None) -> float:
+    """
+    Estimated work for a job, in seconds of mp3-equivalent audio.
+
+    Unknown durations count as a typical track (SCHEDULE_DEFAULT_DURATION).
+    """
+    settings = get_settings()
+    if duration is None or duration <= 0:
+        duration = settings.schedule_default_duration
+    return duration * _FORMAT_COST.get((fmt or "mp3").lower(), 1.0)
+
+
+def lane_for(priority: JobPriority, duration: float | None) -> JobPriority:
+    """Route very long media to the long lane, whatever its priority."""
+    threshold = get_settings().schedule_long_threshold
+    if duration is not None and threshold > 0 and duration >= threshold:
+        return JobPriority.long
+    return priority
+
+
+def _lane_key(lane: JobPriority | str, suffix: str) -> str:
+    return f"{_PREFIX}{JobPriority(lane).value}:{suffix}"
+
+
+def _decode(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+async def submit(
+    redis: AsyncRedis,
+    job_id: str,
+    *,
+    priority: JobPriority = JobPriority.interactive,
+    client_id: str | None = None,
+    delay: float = 0,
+    cost: float = 0,
+) -> bool:
+    """
+    Put a job into its lane under the submitting client.
+
+    ``cost`` (see estimate_cost) pushes the job back by
+    SCHEDULE_COST_WEIGHT seconds per unit, so cheaper jobs of the same
+    client run first. With ``delay`` the job only becomes eligible after
+    that many seconds. Returns False if the job is already pending there,
+    so callers can avoid creating a second worker ticket for it.
+    """
+    client = client_id or DEFAULT_CLIENT
+    now = time.time()
+    penalty = max(cost, 0) * get_settings().schedule_cost_weight
+    added = await cast(
+        Awaitable[int],
+        redis.eval(
+            _SUBMIT,
+            5,
+            _lane_key(priority, "ring"),
+            _lane_key(priority, f"q:{client}"),
+            _lane_key(priority, "size"),
+            _lane_key(priority, "delayed"),
+            _lane_key(priority, "served"),
+            client,
+            str(now + penalty),
+            job_id,
+            str(now + delay if delay > 0 else 0),
+            str(penalty),
+            str(now),
+        ),
+    )
+    return bool(added)
+
+
+async def next_job(redis: AsyncRedis) -> tuple[JobPriority, str, str] | None:
+    """
+    Pop the next job to run as (lane, client, job_id).
+
+    Lanes are served in priority order, except that the long lane jumps
+    ahead once it has waited SCHEDULE_LONG_MAX_WAIT seconds. Within a lane
+    clients take turns (round-robin), each client's own jobs in score order.
+    """
+    long_max_wait = get_settings().schedule_long_max_wait
+    lanes: list[str] = []
+    for lane in LANES:
+        max_wait = long_max_wait if lane is JobPriority.long else 0
+        lanes += [lane.value, str(max_wait)]
+    res = await cast(
+        Awaitable[list[Any] | None],
+        redis.eval(_NEXT, 0, _PREFIX, str(time.time()), *lanes),
+    )
+    if not res:
+        return None
+    name, client, job_id = (_decode(v) for v in res)
+    return JobPriority(name), client, job_id
+
+
+async def pending(redis: AsyncRedis) -> dict[str, int]:
+    """Pending job count per lane."""
+    values = await redis.mget([_lane_key(lane, "size") for lane in LANES])
+    return {
+        lane.value: int(_decode(v)) if v is not None else 0
+        for lane, v in zip(LANES, values, strict=True)
+    }
+
+
+def pending_sync(redis: Redis) -> dict[str, int]:
+    """pending() for sync callers, e.g. metrics collected at scrape time."""
+    values = cast(
+        list[Any], redis.mget([_lane_key(lane, "size") for lane in LANES])
+    )
+    return {
+        lane.value: int(_decode(v)) if v is not None else 0
+        for lane, v in zip(LANES, values, strict=True)
+    }
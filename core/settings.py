@@ -20,6 +20,34 @@ class AppSettings(BaseSettings):
     )
 
     storage_dir: Path = Field(default=Path("data"), alias="STORAGE_DIR")
+    # "local" (STORAGE_DIR shared by API and workers) or "s3", where
+    # STORAGE_DIR only holds jobs in progress (pip install '.[s3]')
+    storage_backend: str = Field(default="local", alias="STORAGE_BACKEND")
+    s3_bucket: str | None = Field(default=None, alias="S3_BUCKET")
+    s3_prefix: str = Field(default="", alias="S3_PREFIX")
+    # MinIO, R2, etc.; credentials come from the usual AWS_* variables
+    s3_endpoint_url: str | None = Field(default=None, alias="S3_ENDPOINT_URL")
+    s3_region: str | None = Field(default=None, alias="S3_REGION")
+    s3_part_size_mb: int = Field(default=16, alias="S3_PART_SIZE_MB")
+    # Lifetime of presigned download URLs; 0 streams through the API
+    s3_presign_seconds: int = Field(default=3600, alias="S3_PRESIGN_SECONDS")
+
+    # Local files: let the front proxy send them. "nginx" answers with
+    # X-Accel-Redirect to DOWNLOAD_OFFLOAD_PREFIX (an internal location
+    # aliased to STORAGE_DIR), "sendfile" with X-Sendfile (Apache, lighttpd)
+    download_offload: str = Field(default="none", alias="DOWNLOAD_OFFLOAD")
+    download_offload_prefix: str = Field(
+        default="/_protected/", alias="DOWNLOAD_OFFLOAD_PREFIX"
+    )
+    # Set to redirect downloads to HMAC-signed DOWNLOAD_LINK_PREFIX URLs
+    # that the proxy (or the API) checks without a database lookup
+    download_link_secret: str = Field(default="", alias="DOWNLOAD_LINK_SECRET")
+    download_link_prefix: str = Field(
+        default="/files/", alias="DOWNLOAD_LINK_PREFIX"
+    )
+    download_link_ttl_seconds: int = Field(
+        default=3600, alias="DOWNLOAD_LINK_TTL_SECONDS"
+    )
 
     database_url: str = Field(
         default="sqlite:///data/db.sqlite3", alias="DATABASE_URL"
@@ -36,6 +64,99 @@ class AppSettings(BaseSettings):
 
     ffmpeg_bin: str = Field(default="ffmpeg", alias="FFMPEG_BIN")
 
+    # Per-provider limits shared by all workers (see provider_limits.py)
+    provider_rate: float = Field(default=1.0, alias="PROVIDER_RATE")
+    provider_burst: int = Field(default=5, alias="PROVIDER_BURST")
+    provider_min_concurrency: int = Field(
+        default=1, alias="PROVIDER_MIN_CONCURRENCY"
+    )
+    provider_max_concurrency: int = Field(
+        default=4, alias="PROVIDER_MAX_CONCURRENCY"
+    )
+    # Longer waits for a token/slot defer the job instead of holding a worker
+    provider_max_wait: float = Field(default=30.0, alias="PROVIDER_MAX_WAIT")
+    provider_breaker_threshold: int = Field(
+        default=3, alias="PROVIDER_BREAKER_THRESHOLD"
+    )
+    provider_breaker_cooldown: float = Field(
+        default=120.0, alias="PROVIDER_BREAKER_COOLDOWN"
+    )
+
+    # Shortest-job-first: probe duration at enqueue, then delay each job by
+    # SCHEDULE_COST_WEIGHT seconds per second of estimated work (aging bound)
+    schedule_probe_on_enqueue: bool = Field(
+        default=False, alias="SCHEDULE_PROBE_ON_ENQUEUE"
+    )
+    schedule_probe_timeout: float = Field(
+        default=15.0, alias="SCHEDULE_PROBE_TIMEOUT"
+    )
+    schedule_cost_weight: float = Field(
+        default=0.1, alias="SCHEDULE_COST_WEIGHT"
+    )
+    schedule_default_duration: float = Field(
+        default=240.0, alias="SCHEDULE_DEFAULT_DURATION"
+    )
+    # Media at least this long (seconds) goes to the "long" lane; 0 disables
+    schedule_long_threshold: float = Field(
+        default=1800.0, alias="SCHEDULE_LONG_THRESHOLD"
+    )
+    schedule_long_max_wait: float = Field(
+        default=600.0, alias="SCHEDULE_LONG_MAX_WAIT"
+    )
+
+    # Admission control on enqueue (429 + Retry-After); 0 disables a check
+    admission_max_queue_depth: int = Field(
+        default=1000, alias="ADMISSION_MAX_QUEUE_DEPTH"
+    )
+    admission_min_free_disk_mb: int = Field(
+        default=1024, alias="ADMISSION_MIN_FREE_DISK_MB"
+    )
+    admission_max_client_jobs: int = Field(
+        default=20, alias="ADMISSION_MAX_CLIENT_JOBS"
+    )
+    admission_retry_after: int = Field(
+        default=30, alias="ADMISSION_RETRY_AFTER"
+    )
+
+    # Minimal delay between progress writes to Redis for a single job
+    progress_min_interval: float = Field(
+        default=1.0, alias="PROGRESS_MIN_INTERVAL"
+    )
+
+    # Running jobs hold a lease renewed every third of this many seconds;
+    # the reaper requeues jobs whose lease ran out, up to JOB_MAX_ATTEMPTS
+    job_lease_seconds: float = Field(default=60.0, alias="JOB_LEASE_SECONDS")
+    job_max_attempts: int = Field(default=3, alias="JOB_MAX_ATTEMPTS")
+
+    # Hard limits per pipeline stage; the job is then marked timed_out and
+    # its yt-dlp download or ffmpeg process is stopped
+    download_timeout_seconds: float = Field(
+        default=900.0, alias="DOWNLOAD_TIMEOUT_SECONDS"
+    )
+    transcode_timeout_seconds: float = Field(
+        default=1800.0, alias="TRANSCODE_TIMEOUT_SECONDS"
+    )
+
+    # Retention: past this many MB of job files the least recently
+    # downloaded finished jobs are evicted (marked expired); 0 = no quota
+    storage_quota_mb: int = Field(default=0, alias="STORAGE_QUOTA_MB")
+
+    # Threads for blocking file/tagging I/O off the event loop, per process
+    blocking_io_threads: int = Field(default=4, alias="BLOCKING_IO_THREADS")
+
+    # Prometheus exporter of each arq worker process (0 disables)
+    worker_metrics_port: int = Field(default=9108, alias="WORKER_METRICS_PORT")
+
+    # Warn (with the loop's stack) when a callback blocks longer; 0 disables
+    loop_lag_threshold_ms: float = Field(
+        default=100.0, alias="LOOP_LAG_THRESHOLD_MS"
+    )
+    # Enables /debug/profile* endpoints (X-Admin-Token header); unset = off
+    admin_token: str | None = Field(default=None, alias="ADMIN_TOKEN")
+    profile_max_seconds: float = Field(
+        default=120.0, alias="PROFILE_MAX_SECONDS"
+    )
+
     api_host: str = Field(default="0.0.0.0", alias="API_HOST")
     api_port: int = Field(default=8033, alias="API_PORT")
 
@@ -50,6 +171,13 @@ class AppSettings(BaseSettings):
     # Telegram Bot
     telegram_bot_token: str | None = Field(default=None, alias="TELEGRAM_BOT_TOKEN")
 
+    # Bot job tracking: one poll per tick for all pending jobs
+    bot_poll_interval: float = Field(default=3.0, alias="BOT_POLL_INTERVAL")
+    bot_job_timeout: float = Field(default=300.0, alias="BOT_JOB_TIMEOUT")
+    bot_max_concurrent_uploads: int = Field(
+        default=4, alias="BOT_MAX_CONCURRENT_UPLOADS"
+    )
+
     # Internal API base URL (bot → api). Default for merged process; override in docker-compose
     api_base_url: str = Field(default="http://localhost:8033", alias="API_BASE_URL")
 
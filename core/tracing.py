@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from core.settings import AppSettings, get_settings
+
+try:  # the "otel" extra is optional; without it spans are no-ops
+    from opentelemetry import propagate, trace
+except ImportError:  # pragma: no cover - depends on installed extras
+    propagate = None  # type: ignore[assignment]
+    trace = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_TRACER_NAME = "mcp_music_forge"
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        return None
+
+    def record_exception(self, exc: BaseException) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def configure_tracing(
+    settings: AppSettings | None = None, *, service_suffix: str = ""
+) -> bool:
+    """
+    Install an OTLP span exporter when OTEL_EXPORTER_OTLP_ENDPOINT is set.
+
+    Returns True if tracing is active. Failures (e.g. the "otel" extra is
+    missing) are logged and leave tracing off.
+    """
+    settings = settings or get_settings()
+    if not settings.otel_endpoint:
+        return False
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = TracerProvider(
+            resource=Resource.create(
+                {SERVICE_NAME: settings.otel_service_name + service_suffix}
+            )
+        )
+        provider.add_span_processor(
+            BatchSpanProcessor(
+                OTLPSpanExporter(endpoint=settings.otel_endpoint)
+            )
+        )
+        trace.set_tracer_provider(provider)
+        return True
+    except Exception as e:
+        # Observability is optional; continue without failing, but log why
+        logger.warning("OTEL setup skipped: %s", e)
+        return False
+
+
+@contextmanager
+def span(
+    name: str,
+    *,
+    carrier: dict[str, str] | None = None,
+    **attributes: Any,
+) -> Iterator[Any]:
+    """
+    Run a block inside a span; attributes with None values are dropped.
+
+    ``carrier`` continues a trace started elsewhere (see inject()).
+    """
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+    parent = propagate.extract(carrier) if carrier else None
+    attrs = {k: v for k, v in attributes.items() if v is not None}
+    tracer = trace.get_tracer(_TRACER_NAME)
+    with tracer.start_as_current_span(
+        name, context=parent, attributes=attrs
+    ) as current:
+        yield current
+
+
+def inject() -> dict[str, str]:
+    """Current trace context as a plain dict, to store with a job."""
+    carrier: dict[str, str] = {}
+    if propagate is not None:
+        propagate.inject(carrier)
+    return carrier
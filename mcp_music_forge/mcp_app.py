@@ -38,6 +38,8 @@ mcp = FastMCP(
 from .tools import probe_url as _probe_url  # noqa: F401,E402
 from .tools import enqueue_download as _enqueue_download  # noqa: F401,E402
 from .tools import get_job_status as _get_job_status  # noqa: F401,E402
+from .tools import get_jobs_status as _get_jobs_status  # noqa: F401,E402
+from .tools import cancel_job as _cancel_job  # noqa: F401,E402
 from .resources import files as _files  # noqa: F401,E402
 
 # isort: on
@@ -1,31 +1,24 @@
 from __future__ import annotations
 
-from pathlib import Path
-
+from core.infra.executor import run_blocking
+from core.services import retention
 from mcp_music_forge.mcp_app import mcp
-from storage.local_fs import LocalStorage
+from storage import get_storage
 
 
-def _read(path: Path) -> bytes:
-    with path.open("rb") as f:
-        return f.read()
+def _read(job_id: str, subdir: str, name: str) -> bytes:
+    data = b"".join(get_storage().iter_bytes(job_id, subdir, name))
+    retention.touch(job_id)
+    return data
 
 
 @mcp.resource("music-forge://jobs/{job_id}/original/{name}")
-def read_original(job_id: str, name: str) -> bytes:
+async def read_original(job_id: str, name: str) -> bytes:
     """Read bytes of an original artifact."""
-    storage = LocalStorage()
-    p = storage.ensure_subdir(job_id, "original") / name
-    if not p.exists() or not p.is_file():
-        raise FileNotFoundError(str(p))
-    return _read(p)
+    return await run_blocking(_read, job_id, "original", name)
 
 
 @mcp.resource("music-forge://jobs/{job_id}/final/{name}")
-def read_final(job_id: str, name: str) -> bytes:
+async def read_final(job_id: str, name: str) -> bytes:
     """Read bytes of a final artifact."""
-    storage = LocalStorage()
-    p = storage.ensure_subdir(job_id, "final") / name
-    if not p.exists() or not p.is_file():
-        raise FileNotFoundError(str(p))
-    return _read(p)
+    return await run_blocking(_read, job_id, "final", name)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+from core.domain.job import JobStatus
+from core.infra.executor import run_blocking
+from core.services import cancellation
+from mcp_music_forge.mcp_app import mcp
+
+
+class CancelJobResult(BaseModel):
+    job_id: str
+    status: JobStatus
+
+
+@mcp.tool()
+async def cancel_job(job_id: str) -> CancelJobResult:
+    """
+    Cancel a queued or running job. A running job stops within about a
+    second; finished jobs are returned unchanged with their final status.
+    """
+    status = await run_blocking(cancellation.cancel, job_id)
+    return CancelJobResult(job_id=job_id, status=status)
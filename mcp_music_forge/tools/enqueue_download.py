@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
+import logging
 import uuid
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
-from core.domain.job import Job, JobStatus
+from core import metrics, tracing
+from core.domain.job import (
+    Job,
+    JobPriority,
+    JobStatus,
+    OutputProfile,
+    output_profiles,
+)
 from core.infra.db import session_scope
+from core.ports.provider_port import ProbeResult, ProviderPort
+from core.services import admission, scheduler
 from core.services.provider_registry import detect_provider
-from core.services.queue import enqueue_download_job
+from core.services.queue import enqueue_download_job, get_queue_pool
 from core.settings import get_settings
 from mcp_music_forge.mcp_app import mcp
 
+logger = logging.getLogger(__name__)
+
+_RESTARTABLE = {JobStatus.cancelled.value, JobStatus.expired.value}
+# Done or being worked on: another ticket would only run the job again
+_SETTLED = {JobStatus.succeeded.value, JobStatus.running.value}
+
 
 class EnqueueOptions(BaseModel):
     format: str = Field(default="mp3")
@@ -23,6 +40,47 @@ class EnqueueOptions(BaseModel):
     # If None, derive from settings.ALLOW_STREAM_DOWNLOADS
     # (False -> respect_tou=True)
     respect_tou: bool | None = Field(default=None)
+    outputs: list[OutputProfile] = Field(
+        default_factory=list,
+        description=(
+            "Produce several format/quality profiles from one download; "
+            "the first one replaces format/quality"
+        ),
+    )
+    # Scheduling only; not part of the job fingerprint
+    priority: JobPriority = Field(
+        default=JobPriority.interactive,
+        description="Named queue: 'interactive' runs before 'bulk'",
+    )
+    client_id: str | None = Field(
+        default=None,
+        description=(
+            "Submitter id; queued work is shared fairly per client. Taken "
+            "as given over MCP, which has no caller identity to check it "
+            "against; the HTTP API keys callers by address instead"
+        ),
+    )
+    probe: bool | None = Field(
+        default=None,
+        description=(
+            "Probe duration before queueing so shorter jobs run first; "
+            "defaults to SCHEDULE_PROBE_ON_ENQUEUE"
+        ),
+    )
+
+    @model_validator(mode="after")
+    def _primary_output(self) -> EnqueueOptions:
+        if self.outputs:
+            self.format = self.outputs[0].format
+            self.quality = self.outputs[0].quality
+        return self
+
+    def profiles(self) -> list[OutputProfile]:
+        return output_profiles(self.format, self.quality, self.outputs)
+
+
+# Options that affect scheduling but not the produced artifacts
+_SCHEDULING_FIELDS = {"priority", "client_id", "probe"}
 
 
 class EnqueueResult(BaseModel):
@@ -32,21 +90,52 @@ class EnqueueResult(BaseModel):
 
 def _fingerprint(url: str, opts: EnqueueOptions) -> str:
     h = hashlib.sha256()
-    key = json.dumps({"url": url, "opts": opts.model_dump()}, sort_keys=True)
+    dumped = opts.model_dump(exclude=_SCHEDULING_FIELDS)
+    if not dumped["outputs"]:
+        # Single-format jobs keep the fingerprints they had before outputs
+        del dumped["outputs"]
+    key = json.dumps({"url": url, "opts": dumped}, sort_keys=True)
     h.update(key.encode("utf-8"))
     return h.hexdigest()
 
 
+async def _probe(
+    provider: ProviderPort, url: str, fmt: str
+) -> ProbeResult | None:
+    """Best-effort metadata probe; scheduling falls back to a default cost."""
+    timeout = get_settings().schedule_probe_timeout
+    try:
+        with metrics.stage_timer("probe", provider.name, fmt):
+            return await asyncio.wait_for(provider.probe(url), timeout)
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Probe on enqueue failed for %s: %s", url, e)
+        return None
+
+
 @mcp.tool()
 async def enqueue_download(
     url: str, options: EnqueueOptions | None = None
 ) -> EnqueueResult:
     """Create or dedupe a job and enqueue it for processing."""
-    options = options or EnqueueOptions()
+    with tracing.span("forge.enqueue", url=url) as span:
+        result = await _enqueue(url, options or EnqueueOptions())
+        span.set_attributes(
+            {"job.id": result.job_id, "job.status": result.status.value}
+        )
+        return result
+
+
+def _apply_defaults(options: EnqueueOptions) -> None:
+    settings = get_settings()
     # Resolve respect_tou default from settings if not provided
     if options.respect_tou is None:
-        settings = get_settings()
         options.respect_tou = not settings.allow_stream_downloads
+    if options.probe is None:
+        options.probe = settings.schedule_probe_on_enqueue
+
+
+async def _enqueue(url: str, options: EnqueueOptions) -> EnqueueResult:
+    _apply_defaults(options)
     provider = detect_provider(url)
     if not provider:
         raise ValueError("No provider can handle this URL")
@@ -57,9 +146,36 @@ async def enqueue_download(
         # Our primary key is id; fingerprint is indexed unique.
         # Query by fingerprint.
         existing = s.query(Job).filter_by(fingerprint=fp).first()
+        duration = existing.duration if existing else None
+    metrics.cache_lookup("job", existing is not None)
+    if existing and existing.status in _SETTLED:
+        return EnqueueResult(
+            job_id=existing.id, status=JobStatus(existing.status)
+        )
+    if existing is None or existing.status != JobStatus.queued.value:
+        # New or re-run work: shed load before probing or writing anything
+        await admission.check(await get_queue_pool(), options.client_id)
+
+    probe = None
+    if existing is None and options.probe:
+        probe = await _probe(provider, url, options.format)
+        duration = probe.duration if probe else None
+    lane = scheduler.lane_for(options.priority, duration)
+
+    trace_context = tracing.inject() or None
+    with session_scope() as s:
         if existing:
             job_id = existing.id
+            if existing.status in _RESTARTABLE:
+                # Enqueueing a cancelled or evicted job again restarts it
+                existing.status = JobStatus.queued.value
+                existing.error = None
+                s.add(existing)
             status = JobStatus(existing.status)
+            if trace_context:
+                # Let the next run of this job join the latest request's trace
+                existing.trace_context = trace_context
+                s.add(existing)
         else:
             job_id = uuid.uuid4().hex
             job = Job(
@@ -68,10 +184,26 @@ async def enqueue_download(
                 url=url,
                 fingerprint=fp,
                 status=JobStatus.queued.value,
-                options=options.model_dump(),
+                options=options.model_dump(exclude=_SCHEDULING_FIELDS),
+                priority=lane.value,
+                client_id=options.client_id,
+                trace_context=trace_context,
             )
+            if probe:
+                job.title = probe.title
+                job.artist = probe.artist
+                job.duration = probe.duration
+                job.artwork_url = probe.artwork_url
             s.add(job)
             status = JobStatus.queued
     # enqueue outside session
-    await enqueue_download_job(job_id)
+    await enqueue_download_job(
+        job_id,
+        priority=lane,
+        client_id=options.client_id,
+        cost=sum(
+            scheduler.estimate_cost(duration, p.format)
+            for p in options.profiles()
+        ),
+    )
     return EnqueueResult(job_id=job_id, status=status)
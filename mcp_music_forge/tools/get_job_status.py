@@ -1,14 +1,25 @@
 from __future__ import annotations
 
 import hashlib
+from typing import Any
 
 from pydantic import BaseModel, Field
 
-from core.domain.job import ArtifactDTO, ArtifactKind, Job, JobStatus
+from core.domain.job import (
+    ArtifactDTO,
+    ArtifactKind,
+    DownloadOptions,
+    Job,
+    JobProgressDTO,
+    JobStatus,
+)
 from core.infra.db import session_scope
+from core.infra.executor import run_blocking
 from core.ports.storage_port import StoragePort
+from core.services.progress import read_progress
 from mcp_music_forge.mcp_app import mcp
-from storage.local_fs import LocalStorage
+from storage import get_storage, pick_final
+from transcoder.ffmpeg_cli import output_suffixes
 
 
 class GetJobStatusResult(BaseModel):
@@ -19,35 +30,51 @@ class GetJobStatusResult(BaseModel):
     artist: str | None = None
     duration: int | None = None
     artifacts: list[ArtifactDTO] = Field(default_factory=list)
+    progress: JobProgressDTO | None = None
 
 
-def _gather_artifacts(job_id: str, storage: StoragePort) -> list[ArtifactDTO]:
+def primary_suffix(options: dict[str, Any]) -> str:
+    """File name ending of a job's primary (first) output profile."""
+    profiles = DownloadOptions.model_validate(options).profiles()
+    return output_suffixes(profiles)[0]
+
+
+def gather_artifacts(
+    job_id: str, storage: StoragePort, prefer: str | None = None
+) -> list[ArtifactDTO]:
     artifacts: list[ArtifactDTO] = []
-    for p in storage.list_files(job_id):
+    files = storage.files(job_id)
+    primary = pick_final(files, prefer)
+    for f in files:
         # Simple heuristic: files in 'final/' are final, others original
         kind = (
-            ArtifactKind.final if "/final/" in str(p) else ArtifactKind.original
+            ArtifactKind.final if f.subdir == "final" else ArtifactKind.original
         )
-        # Compute sha256
-        h = hashlib.sha256()
-        try:
-            h.update(p.read_bytes())
-            sha = h.hexdigest()
-        except Exception:
-            sha = ""
+        # Hash local files the store has no checksum for; never download
+        # a remote object just for this
+        sha = f.sha256
+        if not sha and f.path is not None:
+            h = hashlib.sha256()
+            try:
+                for chunk in storage.iter_bytes(job_id, f.subdir, f.name):
+                    h.update(chunk)
+                sha = h.hexdigest()
+            except Exception:
+                sha = ""
         # Build resource URI matching resource templates
         if kind is ArtifactKind.final:
-            resource_uri = f"forge://jobs/{job_id}/final/{p.name}"
+            resource_uri = f"forge://jobs/{job_id}/final/{f.name}"
         else:
-            resource_uri = f"forge://jobs/{job_id}/original/{p.name}"
+            resource_uri = f"forge://jobs/{job_id}/original/{f.name}"
         artifacts.append(
             ArtifactDTO(
                 kind=kind,
-                filename=p.name,
+                filename=f.name,
                 mime="application/octet-stream",
-                size=p.stat().st_size,
+                size=f.size,
                 sha256=sha,
                 resource_uri=resource_uri,
+                primary=f is primary,
             )
         )
     return artifacts
@@ -55,19 +82,24 @@ def _gather_artifacts(job_id: str, storage: StoragePort) -> list[ArtifactDTO]:
 
 @mcp.tool()
 async def get_job_status(job_id: str) -> GetJobStatusResult:
-    """Return job status and artifact list."""
+    """Return job status, artifact list and live progress if any."""
+    progress = await read_progress(job_id)
     with session_scope() as s:
         job: Job | None = s.get(Job, job_id)
         if not job:
             raise ValueError("Job not found")
-        storage = LocalStorage()
-        artifacts = _gather_artifacts(job_id, storage)
-        return GetJobStatusResult(
+        result = GetJobStatusResult(
             id=job.id,
             status=JobStatus(job.status),
             error=job.error,
             title=job.title,
             artist=job.artist,
             duration=job.duration,
-            artifacts=artifacts,
+            progress=progress,
         )
+        prefer = primary_suffix(job.options)
+    # Storage listing (an S3 request with object storage) stays off the loop
+    result.artifacts = await run_blocking(
+        gather_artifacts, job_id, get_storage(), prefer
+    )
+    return result
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+from sqlmodel import col
+
+from core.domain.job import ArtifactDTO, Job, JobStatus
+from core.infra.db import session_scope
+from core.infra.executor import run_blocking
+from core.services.progress import read_progress_many
+from mcp_music_forge.mcp_app import mcp
+from mcp_music_forge.tools.get_job_status import (
+    GetJobStatusResult,
+    gather_artifacts,
+    primary_suffix,
+)
+from storage import get_storage
+
+# Optional fields of GetJobStatusResult; id and status are always returned
+JOB_FIELDS = frozenset(
+    {"error", "title", "artist", "duration", "artifacts", "progress"}
+)
+# Artifacts mean a storage scan (and hashing) per job, so they are opt-in
+DEFAULT_FIELDS = JOB_FIELDS - {"artifacts"}
+MAX_BATCH = 500
+
+
+class GetJobsStatusResult(BaseModel):
+    jobs: list[GetJobStatusResult] = Field(default_factory=list)
+    missing: list[str] = Field(
+        default_factory=list, description="Requested ids that do not exist"
+    )
+
+
+@mcp.tool()
+async def get_jobs_status(
+    job_ids: list[str], fields: list[str] | None = None
+) -> GetJobsStatusResult:
+    """
+    Return status of many jobs at once. Pass ``fields`` to choose what is
+    resolved; by default every field except "artifacts", which scans each
+    job's files and has to be asked for.
+    """
+    if len(job_ids) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} job ids per call")
+    wanted = DEFAULT_FIELDS if fields is None else frozenset(fields)
+    unknown = wanted - JOB_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    ids = list(dict.fromkeys(job_ids))
+    progress = await read_progress_many(ids) if "progress" in wanted else {}
+    with session_scope() as s:
+        rows = s.query(Job).filter(col(Job.id).in_(ids)).all()
+        found = {job.id: job for job in rows}
+    artifacts = (
+        await run_blocking(
+            _gather_all,
+            {j: primary_suffix(found[j].options) for j in ids if j in found},
+        )
+        if "artifacts" in wanted
+        else {}
+    )
+
+    jobs: list[GetJobStatusResult] = []
+    for job_id in ids:
+        job = found.get(job_id)
+        if job is None:
+            continue
+        data: dict[str, object] = {
+            "id": job.id,
+            "status": JobStatus(job.status),
+        }
+        for name in wanted & {"error", "title", "artist", "duration"}:
+            data[name] = getattr(job, name)
+        if "artifacts" in wanted:
+            data["artifacts"] = artifacts[job_id]
+        if "progress" in wanted:
+            data["progress"] = progress.get(job_id)
+        jobs.append(GetJobStatusResult.model_validate(data))
+    return GetJobsStatusResult(
+        jobs=jobs, missing=[j for j in ids if j not in found]
+    )
+
+
+def _gather_all(prefer: dict[str, str]) -> dict[str, list[ArtifactDTO]]:
+    storage = get_storage()
+    return {
+        job_id: gather_artifacts(job_id, storage, suffix)
+        for job_id, suffix in prefer.items()
+    }
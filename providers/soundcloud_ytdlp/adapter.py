@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import yt_dlp as ytdlp
-from anyio import to_thread
 
-from core.ports.provider_port import ProbeResult, ProviderPort
+from core import tracing
+from core.ports.provider_port import ProbeResult, ProgressHook, ProviderPort
 from core.settings import get_settings
+from providers.ytdlp_common import (
+    RESUME_OPTS,
+    SizeCheck,
+    abort_hook,
+    downloaded_file,
+    progress_hook,
+    run_abortable,
+)
 
 _SOUNDCLOUD_HOSTS = (
     "soundcloud.com",
@@ -30,7 +39,11 @@ class SoundCloudYtDlpProvider(ProviderPort):
         return any(h in url for h in _SOUNDCLOUD_HOSTS)
 
     async def _extract_info(
-        self, url: str, download: bool, outtmpl: str | None = None
+        self,
+        url: str,
+        download: bool,
+        outtmpl: str | None = None,
+        progress: ProgressHook | None = None,
     ) -> dict[str, Any]:
         settings = get_settings()
         ydl_opts: dict[str, Any] = {
@@ -57,11 +70,25 @@ class SoundCloudYtDlpProvider(ProviderPort):
             except Exception:
                 print("lol")
 
+        abort = threading.Event()
+        hooks: list[Any] = [abort_hook(abort)]
+        if progress is not None:
+            hooks.append(progress_hook(progress))
+        size_check = SizeCheck()
+        if download:
+            ydl_opts.update(RESUME_OPTS)
+            hooks.append(size_check)
+        ydl_opts["progress_hooks"] = hooks
+
         def _run() -> dict[str, Any]:
             with ytdlp.YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(url, download=download)
+                info = ydl.extract_info(url, download=download)
+            size_check.raise_if_failed()
+            return info
 
-        return await to_thread.run_sync(_run)
+        stage = "download" if download else "extract"
+        with tracing.span(f"provider.{stage}.ytdlp", provider=self.name):
+            return await run_abortable(_run, abort)
 
     async def probe(self, url: str) -> ProbeResult:
         info = await self._extract_info(url, download=False)
@@ -101,7 +128,12 @@ class SoundCloudYtDlpProvider(ProviderPort):
         )
 
     async def download(
-        self, url: str, dest_dir: str, *, respect_tou: bool = True
+        self,
+        url: str,
+        dest_dir: str,
+        *,
+        respect_tou: bool = True,
+        progress: ProgressHook | None = None,
     ) -> tuple[str, ProbeResult]:
         Path(dest_dir).mkdir(parents=True, exist_ok=True)
         # Enforce can_download prior to downloading to respect ToU
@@ -112,19 +144,10 @@ class SoundCloudYtDlpProvider(ProviderPort):
             )
 
         outtmpl = str(Path(dest_dir) / "%(title)s.%(ext)s")
-        info = await self._extract_info(url, download=True, outtmpl=outtmpl)
-        # Construct filepath like yt-dlp would have produced
-        title = info.get("title") or info.get("id")
-        ext = (
-            info.get("ext")
-            or (
-                info.get("requested_downloads", [{}])[0].get("ext")
-                if info.get("requested_downloads")
-                else None
-            )
-            or "mp3"
+        info = await self._extract_info(
+            url, download=True, outtmpl=outtmpl, progress=progress
         )
-        filename = f"{title}.{ext}"
-        filepath = str(Path(dest_dir) / filename)
+        # yt-dlp reports the (sanitized) path it actually wrote
+        filepath = downloaded_file(info, dest_dir, "mp3")
 
         return filepath, probe
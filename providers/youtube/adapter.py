@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import yt_dlp as ytdlp
-from anyio import to_thread
 
-from core.ports.provider_port import ProbeResult, ProviderPort
+from core import tracing
+from core.ports.provider_port import ProbeResult, ProgressHook, ProviderPort
+from providers.ytdlp_common import (
+    RESUME_OPTS,
+    SizeCheck,
+    abort_hook,
+    downloaded_file,
+    progress_hook,
+    run_abortable,
+)
 
 
 _YOUTUBE_HOSTS = (
@@ -35,7 +44,11 @@ class YouTubeProvider(ProviderPort):
         return any(h in url for h in _YOUTUBE_HOSTS)
 
     async def _extract_info(
-        self, url: str, download: bool, outtmpl: str | None = None
+        self,
+        url: str,
+        download: bool,
+        outtmpl: str | None = None,
+        progress: ProgressHook | None = None,
     ) -> dict[str, Any]:
         ydl_opts: dict[str, Any] = {
             "quiet": True,
@@ -57,11 +70,25 @@ class YouTubeProvider(ProviderPort):
             except Exception:
                 pass
 
+        abort = threading.Event()
+        hooks: list[Any] = [abort_hook(abort)]
+        if progress is not None:
+            hooks.append(progress_hook(progress))
+        size_check = SizeCheck()
+        if download:
+            ydl_opts.update(RESUME_OPTS)
+            hooks.append(size_check)
+        ydl_opts["progress_hooks"] = hooks
+
         def _run() -> dict[str, Any]:
             with ytdlp.YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(url, download=download)
+                info = ydl.extract_info(url, download=download)
+            size_check.raise_if_failed()
+            return info
 
-        return await to_thread.run_sync(_run)
+        stage = "download" if download else "extract"
+        with tracing.span(f"provider.{stage}.ytdlp", provider=self.name):
+            return await run_abortable(_run, abort)
 
     async def probe(self, url: str) -> ProbeResult:
         try:
@@ -112,7 +139,12 @@ class YouTubeProvider(ProviderPort):
         )
 
     async def download(
-        self, url: str, dest_dir: str, *, respect_tou: bool = True
+        self,
+        url: str,
+        dest_dir: str,
+        *,
+        respect_tou: bool = True,
+        progress: ProgressHook | None = None,
     ) -> tuple[str, ProbeResult]:
         # We ignore respect_tou for YouTube as per user request to "force download"
         # and "download best mp3 from video".
@@ -126,36 +158,10 @@ class YouTubeProvider(ProviderPort):
             )
 
         outtmpl = str(Path(dest_dir) / "%(title)s.%(ext)s")
-        info = await self._extract_info(url, download=True, outtmpl=outtmpl)
-
-        title = info.get("title") or info.get("id")
-        ext = (
-            info.get("ext")
-            or (
-                info.get("requested_downloads", [{}])[0].get("ext")
-                if info.get("requested_downloads")
-                else None
-            )
-            or "webm" # Fallback
+        info = await self._extract_info(
+            url, download=True, outtmpl=outtmpl, progress=progress
         )
-        
-        # Sanitize filename characters if needed, but yt-dlp usually handles it.
-        # However, we need to match what yt-dlp wrote.
-        # Since we used %(title)s.%(ext)s, we need the exact title yt-dlp used.
-        # Ideally, we should use 'prepare_filename' from yt-dlp, but here we assume 
-        # it matches info['title']. Note: yt-dlp might sanitize filename.
-        
-        # Safer approach: Find the file in dest_dir that was just created or rely on return?
-        # yt-dlp extract_info returns the info dict, which *should* contain the filename
-        # if we look at 'requested_downloads' -> 'filepath'.
-        
-        filepath = None
-        if info.get("requested_downloads"):
-            filepath = info["requested_downloads"][0].get("filepath")
-        
-        if not filepath:
-             # Fallback construction
-             filename = f"{title}.{ext}"
-             filepath = str(Path(dest_dir) / filename)
+
+        filepath = downloaded_file(info, dest_dir, "webm")
 
         return filepath, probe
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from anyio import to_thread
+
+from core.ports.provider_port import DownloadProgress, ProgressHook
+
+# yt-dlp leaves "<name>.part" (plus "<name>.ytdl" holding the fragment index
+# for HLS/DASH) next to the target. With a stable output path in the job's
+# original/ dir, a retry or a restarted worker continues from there.
+RESUME_OPTS: dict[str, Any] = {
+    "continuedl": True,
+    "nopart": False,
+    # The native HLS downloader resumes per fragment; ffmpeg's cannot
+    "hls_prefer_native": True,
+    # A lost fragment must fail the attempt, not leave a short file behind
+    "skip_unavailable_fragments": False,
+}
+
+
+class DownloadIncompleteError(RuntimeError):
+    """The downloaded file is missing or not the size the source announced."""
+
+
+class DownloadAbortedError(RuntimeError):
+    """Raised inside yt-dlp to stop a download whose caller went away."""
+
+
+def progress_hook(cb: ProgressHook) -> Callable[[dict[str, Any]], None]:
+    """Adapt a ProgressHook to yt-dlp's ``progress_hooks`` dict protocol."""
+
+    def _hook(d: dict[str, Any]) -> None:
+        if d.get("status") not in {"downloading", "finished"}:
+            return
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        speed = d.get("speed")
+        eta = d.get("eta")
+        cb(
+            DownloadProgress(
+                downloaded_bytes=int(d.get("downloaded_bytes") or 0),
+                total_bytes=int(total) if total else None,
+                speed=float(speed) if speed else None,
+                eta=int(eta) if eta is not None else None,
+            )
+        )
+
+    return _hook
+
+
+class SizeCheck:
+    """
+    yt-dlp progress hook comparing each finished file with its exact
+    expected size (estimates are ignored).
+
+    Runs before post-processing, which may legitimately change the size.
+    A wrong-sized file cannot be resumed, so it is deleted and the next
+    attempt starts over.
+    """
+
+    def __init__(self) -> None:
+        self.errors: list[str] = []
+
+    def __call__(self, d: dict[str, Any]) -> None:
+        if d.get("status") != "finished":
+            return
+        expected = d.get("total_bytes")
+        filename = d.get("filename")
+        if not expected or not filename:
+            return
+        actual = os.path.getsize(filename) if os.path.isfile(filename) else 0
+        if actual != expected:
+            Path(filename).unlink(missing_ok=True)
+            self.errors.append(
+                f"{Path(filename).name}: {actual} of {expected} bytes"
+            )
+
+    def raise_if_failed(self) -> None:
+        if self.errors:
+            raise DownloadIncompleteError("; ".join(self.errors))
+
+
+def abort_hook(abort: threading.Event) -> Callable[[dict[str, Any]], None]:
+    """yt-dlp progress hook that stops the download once ``abort`` is set."""
+
+    def _hook(_: dict[str, Any]) -> None:
+        if abort.is_set():
+            raise DownloadAbortedError("Download aborted")
+
+    return _hook
+
+
+async def run_abortable(fn: Callable[[], Any], abort: threading.Event) -> Any:
+    """
+    Run a blocking yt-dlp call in a thread that can be walked away from.
+
+    Threads can't be killed: on cancellation (job cancelled or timed out)
+    we return at once and set ``abort``, so an ``abort_hook`` ends the
+    download at its next progress callback and the partial file is kept
+    for a later resume.
+    """
+    try:
+        return await to_thread.run_sync(fn, abandon_on_cancel=True)
+    finally:
+        abort.set()
+
+
+def downloaded_file(
+    info: dict[str, Any], dest_dir: str, default_ext: str
+) -> str:
+    """Path yt-dlp wrote for ``info``; raises if it is missing or empty."""
+    requested = info.get("requested_downloads") or [{}]
+    filepath = requested[0].get("filepath")
+    if not filepath:
+        title = info.get("title") or info.get("id")
+        ext = info.get("ext") or requested[0].get("ext") or default_ext
+        filepath = str(Path(dest_dir) / f"{title}.{ext}")
+    path = Path(filepath)
+    if not path.is_file() or path.stat().st_size == 0:
+        raise DownloadIncompleteError(f"{path.name} is missing or empty")
+    return filepath
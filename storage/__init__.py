@@ -1 +1,56 @@
 # Storage package
+from __future__ import annotations
+
+from core.ports.storage_port import StoragePort, StoredFile
+from core.settings import get_settings
+from storage.local_fs import LocalStorage
+
+_AUDIO_EXTENSIONS = {".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg", ".opus"}
+_NOT_AUDIO_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".json"}
+
+# One client per process: boto3 clients are slow to build and thread-safe
+_s3: StoragePort | None = None
+
+
+def get_storage() -> StoragePort:
+    """The artifact store selected by STORAGE_BACKEND."""
+    global _s3
+    settings = get_settings()
+    if settings.storage_backend == "s3":
+        if _s3 is None:
+            from storage.s3 import S3Storage
+
+            _s3 = S3Storage.from_settings(settings)
+        return _s3
+    return LocalStorage()
+
+
+def pick_final(
+    files: list[StoredFile], prefer: str | None = None
+) -> StoredFile | None:
+    """
+    The file to hand out among a job's files: the one whose name ends with
+    ``prefer`` (the primary output), else audio first, then anything else.
+    """
+    finals = [
+        f for f in files if f.subdir == "final" and not f.name.startswith(".")
+    ]
+    finals.sort(key=lambda f: f.name)
+    for pick in (
+        lambda f: prefer is not None and f.name.endswith(prefer),
+        lambda f: f.name.lower().endswith(tuple(_AUDIO_EXTENSIONS)),
+        lambda f: not f.name.lower().endswith(tuple(_NOT_AUDIO_EXTENSIONS)),
+        # Last resort, e.g. only the cover survived a partial failure
+        lambda f: True,
+    ):
+        for f in finals:
+            if pick(f):
+                return f
+    return None
+
+
+def final_artifact(
+    storage: StoragePort, job_id: str, prefer: str | None = None
+) -> StoredFile | None:
+    """The file to hand out for a job; see ``pick_final``."""
+    return pick_final(storage.files(job_id), prefer)
@@ -1,28 +1,125 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import shutil
+from collections.abc import Iterator
 from pathlib import Path
 
-from core.ports.storage_port import StoragePort
+from core.ports.storage_port import StoragePort, StoredFile
+from core.services import download_links
 from core.settings import get_settings
 
+_CHUNK_SIZE = 1 << 20
+
+
+def shard_of(job_id: str) -> tuple[str, str]:
+    """Two hex levels (65536 buckets) so no directory grows unbounded."""
+    digest = hashlib.sha256(job_id.encode()).hexdigest()
+    return digest[:2], digest[2:4]
+
 
 class LocalStorage(StoragePort):
+    """
+    Job files under ``<root>/jobs/<aa>/<bb>/<job_id>/{original,final}``.
+
+    Only ``ensure_subdir`` creates directories; every other method is
+    side-effect free, so status and resource reads never write. A job
+    still in the old flat ``<root>/jobs/<job_id>`` layout is used where it
+    is until ``storage.migrate`` moves it.
+    """
+
     def __init__(self, root: Path | None = None) -> None:
         self.root = root or get_settings().storage_dir
-        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def jobs_root(self) -> Path:
+        return self.root / "jobs"
+
+    def sharded_dir(self, job_id: str) -> Path:
+        return self.jobs_root.joinpath(*shard_of(job_id), job_id)
 
     def job_dir(self, job_id: str) -> Path:
-        p = self.root / "jobs" / job_id
-        p.mkdir(parents=True, exist_ok=True)
-        return p
+        sharded = self.sharded_dir(job_id)
+        if not sharded.exists():
+            legacy = self.jobs_root / job_id
+            if legacy.is_dir():
+                return legacy
+        return sharded
+
+    def subdir(self, job_id: str, name: str) -> Path:
+        return self.job_dir(job_id) / name
 
     def ensure_subdir(self, job_id: str, name: str) -> Path:
-        d = self.job_dir(job_id) / name
+        d = self.subdir(job_id, name)
         d.mkdir(parents=True, exist_ok=True)
         return d
 
     def list_files(self, job_id: str) -> list[Path]:
+        return [p for p in self.job_dir(job_id).rglob("*") if p.is_file()]
+
+    def size(self, job_id: str) -> int:
+        total = 0
+        for dirpath, _, filenames in os.walk(self.job_dir(job_id)):
+            for name in filenames:
+                try:
+                    total += os.stat(os.path.join(dirpath, name)).st_size
+                except OSError:
+                    continue
+        return total
+
+    def delete(self, job_id: str, subdir: str | None = None) -> None:
         d = self.job_dir(job_id)
-        if not d.exists():
-            return []
-        return [p for p in d.rglob("*") if p.is_file()]
+        shutil.rmtree(d / subdir if subdir else d, ignore_errors=True)
+
+    def files(self, job_id: str) -> list[StoredFile]:
+        base = self.job_dir(job_id)
+        return [
+            StoredFile(
+                subdir=p.relative_to(base).parts[0],
+                name=p.name,
+                size=p.stat().st_size,
+                path=p,
+            )
+            for p in self.list_files(job_id)
+        ]
+
+    def iter_bytes(
+        self,
+        job_id: str,
+        subdir: str,
+        name: str,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        path = self.subdir(job_id, subdir) / name
+        if path.name != name or not path.is_file():
+            raise FileNotFoundError(str(path))
+        return _read_range(path, start, end)
+
+    def url(self, job_id: str, subdir: str, name: str) -> str | None:
+        settings = get_settings()
+        if not settings.download_link_secret:
+            return None
+        # The link prefix is served from STORAGE_DIR, like the proxy's alias
+        rel = (self.subdir(job_id, subdir) / name).relative_to(self.root)
+        return download_links.sign(
+            settings.download_link_prefix + rel.as_posix(),
+            secret=settings.download_link_secret,
+            ttl=settings.download_link_ttl_seconds,
+        )
+
+
+def _read_range(path: Path, start: int, end: int | None) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        f.seek(start)
+        left = None if end is None else end - start + 1
+        while left is None or left > 0:
+            chunk = f.read(
+                _CHUNK_SIZE if left is None else min(left, _CHUNK_SIZE)
+            )
+            if not chunk:
+                return
+            if left is not None:
+                left -= len(chunk)
+            yield chunk
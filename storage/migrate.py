@@ -0,0 +1,70 @@
+"""
+Move job directories from the flat ``jobs/<job_id>`` layout into the
+sharded ``jobs/<aa>/<bb>/<job_id>`` one used by LocalStorage.
+
+    python -m storage.migrate [--root DIR] [--dry-run]
+
+Each job is a single rename within the same filesystem, so the tool is
+safe to interrupt and re-run; stop workers while it runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from pathlib import Path
+
+from storage.local_fs import LocalStorage
+
+logger = logging.getLogger(__name__)
+
+# Shard levels are two hex characters; job directories never are
+_SHARD_NAME_LEN = 2
+
+
+def migrate_layout(root: Path, *, dry_run: bool = False) -> int:
+    """Move flat job dirs under ``root`` into shards; returns how many."""
+    storage = LocalStorage(root)
+    if not storage.jobs_root.is_dir():
+        return 0
+    moved = 0
+    with os.scandir(storage.jobs_root) as entries:
+        flat = [
+            e.name
+            for e in entries
+            if e.is_dir(follow_symlinks=False)
+            and len(e.name) != _SHARD_NAME_LEN
+        ]
+    for job_id in flat:
+        src = storage.jobs_root / job_id
+        dest = storage.sharded_dir(job_id)
+        if dest.exists():
+            logger.warning("Skipping %s: %s already exists", job_id, dest)
+            continue
+        if not dry_run:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            src.rename(dest)
+        moved += 1
+    return moved
+
+
+def main(argv: list[str] | None = None) -> int:
+    from core.settings import get_settings
+
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--root", type=Path, default=None, help="STORAGE_DIR")
+    p.add_argument(
+        "--dry-run", action="store_true", help="Only count the jobs to move"
+    )
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    root = args.root or get_settings().storage_dir
+    moved = migrate_layout(root, dry_run=args.dry_run)
+    verb = "Would move" if args.dry_run else "Moved"
+    print(f"{verb} {moved} job directories under {root / 'jobs'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import shutil
+from collections.abc import Iterator
+from dataclasses import replace
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote
+
+from core.ports.storage_port import StoredFile
+from core.settings import AppSettings
+from storage.local_fs import LocalStorage, shard_of
+
+_CHUNK_SIZE = 1 << 20
+# Per job: {"<subdir>/<name>": sha256}, so listing needs no per-object HEAD
+_MANIFEST = "manifest.json"
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class S3Storage(LocalStorage):
+    """
+    Artifacts in an S3-compatible bucket under
+    ``<prefix>jobs/<aa>/<bb>/<job_id>/{original,final}/<name>``.
+
+    The inherited local tree is scratch space: workers write there while a
+    job runs, ``publish`` uploads it with multipart transfers streamed from
+    disk and then drops it. Reads only go to the bucket, so the API and
+    workers need no shared volume.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        client: Any,
+        prefix: str = "",
+        root: Path | None = None,
+        part_size: int = 16 * 2**20,
+        presign_seconds: int = 3600,
+    ) -> None:
+        super().__init__(root)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+        self.presign_seconds = presign_seconds
+        from boto3.s3.transfer import TransferConfig
+
+        # Files above one part go up as parallel parts, read piecewise
+        self._transfer = TransferConfig(
+            multipart_threshold=part_size, multipart_chunksize=part_size
+        )
+
+    @classmethod
+    def from_settings(cls, settings: AppSettings) -> S3Storage:
+        try:
+            import boto3
+        except ImportError as e:  # pragma: no cover - depends on extras
+            raise RuntimeError(
+                "STORAGE_BACKEND=s3 needs boto3: pip install '.[s3]'"
+            ) from e
+        if not settings.s3_bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs S3_BUCKET")
+        client = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url,
+            region_name=settings.s3_region,
+        )
+        return cls(
+            settings.s3_bucket,
+            client=client,
+            prefix=settings.s3_prefix,
+            root=settings.storage_dir,
+            part_size=settings.s3_part_size_mb * 2**20,
+            presign_seconds=settings.s3_presign_seconds,
+        )
+
+    def _key(self, job_id: str, *parts: str) -> str:
+        return "/".join(
+            [f"{self.prefix}jobs", *shard_of(job_id), job_id, *parts]
+        )
+
+    def _objects(self, prefix: str) -> Iterator[dict[str, Any]]:
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket, Prefix=prefix
+        )
+        for page in pages:
+            yield from page.get("Contents", [])
+
+    def publish(self, job_id: str) -> None:
+        base = self.job_dir(job_id)
+        manifest = self._manifest(job_id)
+        for path in self.list_files(job_id):
+            rel = path.relative_to(base).as_posix()
+            mime = mimetypes.guess_type(path.name)[0]
+            self.client.upload_file(
+                str(path),
+                self.bucket,
+                self._key(job_id, rel),
+                ExtraArgs={"ContentType": mime or "application/octet-stream"},
+                Config=self._transfer,
+            )
+            manifest[rel] = _sha256(path)
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(job_id, _MANIFEST),
+            Body=json.dumps(manifest).encode(),
+            ContentType="application/json",
+        )
+        shutil.rmtree(base, ignore_errors=True)
+
+    def _manifest(self, job_id: str) -> dict[str, str]:
+        try:
+            chunks = self._iter_key(self._key(job_id, _MANIFEST))
+        except FileNotFoundError:
+            return {}
+        return json.loads(b"".join(chunks))
+
+    def files(self, job_id: str) -> list[StoredFile]:
+        prefix = self._key(job_id) + "/"
+        found: list[StoredFile] = []
+        for obj in self._objects(prefix):
+            rel = obj["Key"][len(prefix) :]
+            subdir, _, name = rel.partition("/")
+            if not name:  # the manifest
+                continue
+            found.append(StoredFile(subdir=subdir, name=name, size=obj["Size"]))
+        if not found:
+            return found
+        shas = self._manifest(job_id)
+        return [
+            replace(f, sha256=shas.get(f"{f.subdir}/{f.name}", ""))
+            for f in found
+        ]
+
+    def size(self, job_id: str) -> int:
+        # Scratch files of a job in progress count until they are uploaded
+        manifest = self._key(job_id, _MANIFEST)
+        stored = sum(
+            o["Size"]
+            for o in self._objects(self._key(job_id) + "/")
+            if o["Key"] != manifest
+        )
+        return stored + super().size(job_id)
+
+    def delete(self, job_id: str, subdir: str | None = None) -> None:
+        super().delete(job_id, subdir)
+        prefix = self._key(job_id, *([subdir] if subdir else [])) + "/"
+        keys = [{"Key": o["Key"]} for o in self._objects(prefix)]
+        for i in range(0, len(keys), 1000):  # DeleteObjects limit
+            self.client.delete_objects(
+                Bucket=self.bucket, Delete={"Objects": keys[i : i + 1000]}
+            )
+
+    def iter_bytes(
+        self,
+        job_id: str,
+        subdir: str,
+        name: str,
+        start: int = 0,
+        end: int | None = None,
+    ) -> Iterator[bytes]:
+        return self._iter_key(self._key(job_id, subdir, name), start, end)
+
+    def _iter_key(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> Iterator[bytes]:
+        from botocore.exceptions import ClientError
+
+        kwargs: dict[str, Any] = {}
+        if start or end is not None:
+            kwargs["Range"] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key, **kwargs)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in {"NoSuchKey", "404"}:
+                raise FileNotFoundError(key) from e
+            raise
+        return obj["Body"].iter_chunks(_CHUNK_SIZE)
+
+    def url(self, job_id: str, subdir: str, name: str) -> str | None:
+        if self.presign_seconds <= 0:
+            return None
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._key(job_id, subdir, name),
+                "ResponseContentDisposition": (
+                    f"attachment; filename*=utf-8''{quote(name)}"
+                ),
+            },
+            ExpiresIn=self.presign_seconds,
+        )
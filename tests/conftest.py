@@ -6,6 +6,7 @@ from pathlib import Path
 
 import pytest
 
+import core.infra.db as db
 from core.settings import get_settings
 
 
@@ -14,8 +15,12 @@ def _isolate_env(tmp_path: Path) -> Iterator[None]:
     # isolate storage and db per test session
     os.environ["STORAGE_DIR"] = str(tmp_path / "data")
     os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path}/db.sqlite3"
-    # reset cached settings
+    # reset cached settings and the engine bound to the previous database
     get_settings.cache_clear()
+    db._engine = None
+    db._SessionLocal = None
     yield
     # cleanup
     get_settings.cache_clear()
+    db._engine = None
+    db._SessionLocal = None
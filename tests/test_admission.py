@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+
+import fakeredis
+import pytest
+
+from core.domain.job import DownloadOptions, Job, JobStatus
+from core.infra.db import create_db_and_tables, session_scope
+from core.services import admission, scheduler
+from core.settings import get_settings
+
+
+def _add_jobs(client_id: str, *statuses: JobStatus) -> None:
+    create_db_and_tables()
+    with session_scope() as s:
+        for i, status in enumerate(statuses):
+            s.add(
+                Job(
+                    id=f"{client_id}-{i}",
+                    provider="soundcloud",
+                    url=f"http://example.com/{client_id}/{i}",
+                    fingerprint=f"fp-{client_id}-{i}",
+                    status=status.value,
+                    options=DownloadOptions().model_dump(),
+                    client_id=client_id,
+                )
+            )
+
+
+@pytest.mark.asyncio
+async def test_client_over_its_in_flight_limit_is_shed() -> None:
+    settings = get_settings()
+    settings.admission_min_free_disk_mb = 0
+    settings.admission_max_client_jobs = 2
+    redis = fakeredis.FakeAsyncRedis()
+    _add_jobs("agent", JobStatus.queued, JobStatus.running)
+    _add_jobs("user", JobStatus.queued, JobStatus.succeeded)
+
+    await admission.check(redis, "user")
+    await admission.check(redis, None)
+    with pytest.raises(admission.AdmissionRejectedError) as e:
+        await admission.check(redis, "agent")
+
+    assert json.loads(str(e.value)) == {
+        "error": "overloaded",
+        "reason": "client_busy",
+        "limit": 2,
+        "current": 2,
+        "retry_after": settings.admission_retry_after,
+    }
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_and_disk_limits() -> None:
+    settings = get_settings()
+    settings.admission_min_free_disk_mb = 0
+    settings.admission_max_queue_depth = 2
+    create_db_and_tables()
+    redis = fakeredis.FakeAsyncRedis()
+    for i in range(2):
+        await scheduler.submit(redis, f"j{i}", client_id="c")
+
+    with pytest.raises(admission.AdmissionRejectedError) as e:
+        await admission.check(redis, "c")
+    assert e.value.reason == "queue_full"
+
+    settings.admission_max_queue_depth = 0
+    await admission.check(redis, "c")
+    settings.admission_min_free_disk_mb = 2**40  # a petabyte
+    with pytest.raises(admission.AdmissionRejectedError) as e:
+        await admission.check(redis, "c")
+    assert e.value.reason == "disk_low"
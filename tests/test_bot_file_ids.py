@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import fakeredis
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendAudio
+from aiogram.types import FSInputFile
+
+import bot.main as bot_main
+from bot.file_id_cache import FileIdCache
+from bot.tracker import Waiter
+from core.domain.job import ArtifactDTO, ArtifactKind, JobStatus
+from core.ports.storage_port import StoredFile
+from mcp_music_forge.tools.get_job_status import GetJobStatusResult
+from storage.local_fs import LocalStorage
+
+
+class _FakeMessage:
+    """Records answer_audio calls; rejects file_ids listed in ``stale``."""
+
+    def __init__(self, stale: set[str] | None = None) -> None:
+        self.sent: list[Any] = []
+        self.stale = stale or set()
+
+    async def answer_audio(self, audio: Any, **_: Any) -> SimpleNamespace:
+        self.sent.append(audio)
+        if isinstance(audio, str) and audio in self.stale:
+            raise TelegramBadRequest(
+                SendAudio(chat_id=1, audio=audio), "wrong file identifier"
+            )
+        return SimpleNamespace(audio=SimpleNamespace(file_id="fresh-id"))
+
+
+def _status(sha256: str = "") -> GetJobStatusResult:
+    return GetJobStatusResult(
+        id="j1",
+        status=JobStatus.succeeded,
+        title="Song",
+        artifacts=[
+            ArtifactDTO(
+                kind=ArtifactKind.final,
+                filename="a.mp3",
+                mime="audio/mpeg",
+                size=3,
+                sha256=sha256,
+            )
+        ],
+    )
+
+
+@pytest.fixture()
+def cache(monkeypatch: pytest.MonkeyPatch) -> FileIdCache:
+    cache = FileIdCache(fakeredis.FakeAsyncRedis(decode_responses=True))
+    monkeypatch.setattr(bot_main, "file_ids", cache)
+    return cache
+
+
+@pytest.fixture()
+def stored(tmp_path: Any) -> StoredFile:
+    path = tmp_path / "a.mp3"
+    path.write_bytes(b"mp3")
+    return StoredFile(subdir="final", name="a.mp3", size=3, path=path)
+
+
+def test_artifact_key_prefers_checksum(stored: StoredFile) -> None:
+    key = bot_main._artifact_key(_status("abc"), stored, "j1")
+    assert key == "sha256:abc"
+    # No checksum (or another file): keyed by job and name
+    assert bot_main._artifact_key(_status(), stored, "j1") == "job:j1:a.mp3"
+    other = StoredFile(subdir="final", name="b.mp3", size=1)
+    assert bot_main._artifact_key(_status("abc"), other, "j1") == (
+        "job:j1:b.mp3"
+    )
+
+
+@pytest.mark.asyncio
+async def test_uploads_once_then_reuses_file_id(
+    cache: FileIdCache, stored: StoredFile
+) -> None:
+    first, second = _FakeMessage(), _FakeMessage()
+
+    await bot_main.send_audio(first, stored, _status("abc"), "j1")  # type: ignore[arg-type]
+    await bot_main.send_audio(second, stored, _status("abc"), "j2")  # type: ignore[arg-type]
+
+    assert isinstance(first.sent[0], FSInputFile)
+    assert second.sent == ["fresh-id"]
+    assert await cache.get("sha256:abc") == "fresh-id"
+
+
+@pytest.mark.asyncio
+async def test_stale_file_id_is_forgotten_and_reuploaded(
+    cache: FileIdCache, stored: StoredFile
+) -> None:
+    await cache.set("sha256:abc", "stale-id")
+    message = _FakeMessage(stale={"stale-id"})
+
+    await bot_main.send_audio(message, stored, _status("abc"), "j1")  # type: ignore[arg-type]
+
+    assert message.sent[0] == "stale-id"
+    assert isinstance(message.sent[1], FSInputFile)
+    assert await cache.get("sha256:abc") == "fresh-id"
+
+
+class _StatusMessage:
+    def __init__(self) -> None:
+        self.texts: list[str] = []
+        self.deleted = False
+
+    async def edit_text(self, text: str) -> None:
+        self.texts.append(text)
+
+    async def delete(self) -> None:
+        self.deleted = True
+
+
+@pytest.mark.asyncio
+async def test_delivery_counts_as_a_download(
+    cache: FileIdCache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    touched: list[str] = []
+    monkeypatch.setattr(bot_main.retention, "touch", touched.append)
+    LocalStorage().ensure_subdir("j1", "final").joinpath("a.mp3").write_bytes(
+        b"mp3"
+    )
+    status_msg = _StatusMessage()
+    waiter = Waiter(
+        message=_FakeMessage(),  # type: ignore[arg-type]
+        status_msg=status_msg,  # type: ignore[arg-type]
+        deadline=0,
+    )
+
+    await bot_main.deliver_result(waiter, "j1", _status("abc"))
+
+    assert status_msg.deleted
+    assert touched == ["j1"]
+
+
+@pytest.mark.asyncio
+async def test_expired_job_asks_to_send_the_link_again() -> None:
+    status_msg = _StatusMessage()
+    waiter = Waiter(
+        message=_FakeMessage(),  # type: ignore[arg-type]
+        status_msg=status_msg,  # type: ignore[arg-type]
+        deadline=0,
+    )
+    expired = GetJobStatusResult(id="j1", status=JobStatus.expired)
+
+    await bot_main.deliver_result(waiter, "j1", expired)
+
+    assert "expired" in status_msg.texts[-1]
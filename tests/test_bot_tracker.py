@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from bot.tracker import JobTracker, Waiter
+from core.domain.job import JobStatus
+from mcp_music_forge.tools.get_job_status import GetJobStatusResult
+
+
+class _FakeForge:
+    def __init__(self) -> None:
+        self.statuses: dict[str, JobStatus] = {}
+        self.calls: list[list[str]] = []
+
+    async def get_status(self, job_id: str) -> GetJobStatusResult:
+        return GetJobStatusResult(
+            id=job_id, status=self.statuses[job_id], title="Full"
+        )
+
+    async def get_statuses(
+        self, job_ids: list[str], fields: list[str] | None = None
+    ) -> dict[str, GetJobStatusResult]:
+        self.calls.append(job_ids)
+        return {
+            j: GetJobStatusResult(id=j, status=self.statuses[j])
+            for j in job_ids
+            if j in self.statuses
+        }
+
+
+@pytest.mark.asyncio
+async def test_tracker_batches_polls_and_fans_out() -> None:
+    forge = _FakeForge()
+    delivered: list[tuple[Any, str]] = []
+
+    async def on_finished(w: Waiter, job_id: str, st: Any) -> None:
+        assert st.title == "Full"
+        delivered.append((w.message, job_id))
+
+    async def on_timeout(w: Waiter, job_id: str) -> None:
+        raise AssertionError("unexpected timeout")
+
+    tracker = JobTracker(forge, on_finished, on_timeout)  # type: ignore[arg-type]
+    for chat in ("a", "b"):
+        tracker.track("j1", chat, chat)  # type: ignore[arg-type]
+    tracker.track("j2", "c", "c")  # type: ignore[arg-type]
+
+    forge.statuses = {"j1": JobStatus.running, "j2": JobStatus.queued}
+    await tracker.tick()
+    assert forge.calls == [["j1", "j2"]]
+    assert tracker.pending == 2
+
+    forge.statuses["j1"] = JobStatus.succeeded
+    await tracker.tick()
+    await asyncio.sleep(0)
+    assert sorted(delivered) == [("a", "j1"), ("b", "j1")]
+    assert tracker.pending == 1
+    assert forge.calls[-1] == ["j1", "j2"]
+
+
+@pytest.mark.asyncio
+async def test_tracker_times_out_waiters() -> None:
+    forge = _FakeForge()
+    timed_out: list[str] = []
+
+    async def on_finished(w: Waiter, job_id: str, st: Any) -> None:
+        raise AssertionError("unexpected delivery")
+
+    async def on_timeout(w: Waiter, job_id: str) -> None:
+        timed_out.append(job_id)
+
+    tracker = JobTracker(
+        forge, on_finished, on_timeout, timeout=0  # type: ignore[arg-type]
+    )
+    tracker.track("j1", "a", "a")  # type: ignore[arg-type]
+    await tracker.tick()
+    await asyncio.sleep(0)
+    assert timed_out == ["j1"]
+    assert tracker.pending == 0
+
+
+class _DownForge(_FakeForge):
+    async def get_statuses(
+        self, job_ids: list[str], fields: list[str] | None = None
+    ) -> dict[str, GetJobStatusResult]:
+        self.calls.append(job_ids)
+        raise ConnectionError("API is down")
+
+
+@pytest.mark.asyncio
+async def test_tracker_times_out_waiters_while_forge_is_down() -> None:
+    forge = _DownForge()
+    timed_out: list[str] = []
+
+    async def on_finished(w: Waiter, job_id: str, st: Any) -> None:
+        raise AssertionError("unexpected delivery")
+
+    async def on_timeout(w: Waiter, job_id: str) -> None:
+        timed_out.append(job_id)
+
+    tracker = JobTracker(
+        forge, on_finished, on_timeout, timeout=0  # type: ignore[arg-type]
+    )
+    tracker.track("j1", "a", "a")  # type: ignore[arg-type]
+    with pytest.raises(ConnectionError):
+        await tracker.tick()
+    await asyncio.sleep(0)
+    assert timed_out == ["j1"]
+    assert tracker.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_tracker_delivers_evicted_jobs() -> None:
+    forge = _FakeForge()
+    delivered: list[JobStatus] = []
+
+    async def on_finished(w: Waiter, job_id: str, st: Any) -> None:
+        delivered.append(st.status)
+
+    async def on_timeout(w: Waiter, job_id: str) -> None:
+        raise AssertionError("unexpected timeout")
+
+    tracker = JobTracker(forge, on_finished, on_timeout)  # type: ignore[arg-type]
+    tracker.track("j1", "a", "a")  # type: ignore[arg-type]
+    forge.statuses = {"j1": JobStatus.expired}
+    await tracker.tick()
+    await asyncio.sleep(0)
+    assert delivered == [JobStatus.expired]
+    assert tracker.pending == 0
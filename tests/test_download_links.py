@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.infra.db import create_db_and_tables
+from core.services import download_links
+from core.settings import get_settings
+from storage.local_fs import LocalStorage
+
+
+def _params(url: str) -> tuple[str, dict[str, str]]:
+    parts = urlsplit(url)
+    return parts.path, {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+
+def test_signed_link_verifies_until_expiry() -> None:
+    url = download_links.sign(
+        "/files/jobs/ab/cd/j1/final/a b.mp3", secret="s", ttl=60, now=1000
+    )
+    path, q = _params(url)
+
+    assert path == "/files/jobs/ab/cd/j1/final/a%20b.mp3"
+    # nginx $uri is decoded, and so is the signed path
+    path = "/files/jobs/ab/cd/j1/final/a b.mp3"
+    assert download_links.verify(path, **q, secret="s", now=1060)
+    assert not download_links.verify(path, **q, secret="s", now=1061)
+    assert not download_links.verify(path, **q, secret="other", now=1000)
+    assert not download_links.verify(
+        path.replace("j1", "j2"), **q, secret="s", now=1000
+    )
+    assert not download_links.verify(
+        path, **{**q, "e": "3600"}, secret="s", now=1000
+    )
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    from api.main import app
+
+    create_db_and_tables()
+    storage = LocalStorage()
+    storage.ensure_subdir("j1", "final").joinpath("a.mp3").write_bytes(b"mp3")
+    return TestClient(app)
+
+
+def test_download_redirects_to_signed_link(client: TestClient) -> None:
+    get_settings().download_link_secret = "s"  # noqa: S105
+
+    r = client.get("/jobs/j1/download", follow_redirects=False)
+    assert r.status_code == 307
+    link = r.headers["location"]
+    assert link.startswith("/files/jobs/")
+
+    assert client.get(link).content == b"mp3"
+    assert client.get(link.replace("st=", "st=x")).status_code == 403
+    get_settings().download_link_secret = ""
+    assert client.get(link).status_code == 403
+
+
+def test_signed_link_for_name_with_url_delimiters(client: TestClient) -> None:
+    get_settings().download_link_secret = "s"  # noqa: S105
+    name = "Track #1?.mp3"
+    LocalStorage().subdir("j1", "final").joinpath(name).write_bytes(b"one")
+
+    link = LocalStorage().url("j1", "final", name)
+    assert link is not None
+
+    r = client.get(link)
+    assert r.status_code == 200
+    assert r.content == b"one"
+
+
+def test_download_offloads_to_proxy(client: TestClient) -> None:
+    settings = get_settings()
+    settings.download_offload = "nginx"
+
+    r = client.get("/jobs/j1/download")
+    assert r.content == b""
+    assert r.headers["x-accel-redirect"].startswith("/_protected/jobs/")
+    assert r.headers["x-accel-redirect"].endswith("/j1/final/a.mp3")
+    assert r.headers["content-type"] == "audio/mpeg"
+
+    settings.download_offload = "sendfile"
+    r = client.get("/jobs/j1/download")
+    path = LocalStorage().subdir("j1", "final") / "a.mp3"
+    assert r.headers["x-sendfile"] == str(path.resolve())
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import asyncio
+import shutil
+import time
 from pathlib import Path
 
 import pytest
 
 from core.domain.job import DownloadOptions, Job, JobStatus
 from core.infra.db import create_db_and_tables, session_scope
-from core.ports.provider_port import ProbeResult, ProviderPort
+from core.ports.provider_port import ProbeResult, ProgressHook, ProviderPort
+from core.services import cancellation, leases
 from core.services.download_orchestrator import process_job
 from core.settings import get_settings
+from storage.local_fs import LocalStorage
 
 
 class _FakeProvider(ProviderPort):
@@ -30,7 +35,12 @@ class _FakeProvider(ProviderPort):
         )
 
     async def download(
-        self, url: str, dest_dir: str, *, respect_tou: bool = True
+        self,
+        url: str,
+        dest_dir: str,
+        *,
+        respect_tou: bool = True,
+        progress: ProgressHook | None = None,
     ) -> tuple[str, ProbeResult]:
         d = Path(dest_dir)
         d.mkdir(parents=True, exist_ok=True)
@@ -59,17 +69,20 @@ async def test_process_job_success(
     )
 
     # Patch transcode to just copy with new extension
-    async def fake_transcode(
-        input_path: Path, output_dir: Path, target_format: str, quality: str
-    ) -> Path:
+    async def fake_transcode_many(
+        input_path: Path,
+        output_dir: Path,
+        outputs: list[object],
+        **_: object,
+    ) -> list[Path]:
         output_dir.mkdir(parents=True, exist_ok=True)
         out = output_dir / (input_path.stem + ".mp3")
         out.write_bytes(Path(input_path).read_bytes())
-        return out
+        return [out]
 
     import transcoder.ffmpeg_cli as ffmpeg_cli
 
-    monkeypatch.setattr(ffmpeg_cli, "transcode", fake_transcode)
+    monkeypatch.setattr(ffmpeg_cli, "transcode_many", fake_transcode_many)
 
     # Create job
     with session_scope() as s:
@@ -91,7 +104,254 @@ async def test_process_job_success(
         job_db = s.get(Job, "job1")
         assert job_db is not None
         assert job_db.status == JobStatus.succeeded.value
-        job_dir = settings.storage_dir / "jobs" / "job1" / "final"
+        job_dir = LocalStorage(settings.storage_dir).subdir("job1", "final")
         assert job_dir.exists()
         files = list(job_dir.glob("*"))
         assert files, "No output files created"
+
+
+@pytest.mark.asyncio
+async def test_rerun_resumes_from_first_incomplete_stage(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    settings = get_settings()
+    settings.storage_dir = tmp_path / "data"
+    create_db_and_tables()
+
+    downloads: list[str] = []
+
+    class _CountingProvider(_FakeProvider):
+        async def download(self, url: str, dest_dir: str, **kw: object):
+            downloads.append(url)
+            return await super().download(url, dest_dir)
+
+    from core.services import provider_registry
+
+    monkeypatch.setattr(
+        provider_registry, "detect_provider", lambda url: _CountingProvider()
+    )
+
+    transcodes: list[Path] = []
+    fail = [True]
+
+    async def flaky_transcode_many(
+        input_path: Path, output_dir: Path, outputs: list[object], **_: object
+    ) -> list[Path]:
+        transcodes.append(input_path)
+        if fail[0]:
+            raise RuntimeError("ffmpeg died")
+        out = output_dir / (input_path.stem + ".mp3")
+        out.write_bytes(b"mp3")
+        return [out]
+
+    import transcoder.ffmpeg_cli as ffmpeg_cli
+
+    monkeypatch.setattr(ffmpeg_cli, "transcode_many", flaky_transcode_many)
+
+    with session_scope() as s:
+        s.add(
+            Job(
+                id="job2",
+                provider="soundcloud",
+                url="http://example.com/y",
+                fingerprint="fp2",
+                status=JobStatus.queued.value,
+                options=DownloadOptions().model_dump(),
+            )
+        )
+
+    with pytest.raises(RuntimeError):
+        await process_job("job2")
+    fail[0] = False
+    await process_job("job2")
+    assert len(downloads) == 1
+    assert len(transcodes) == 2
+
+    # Everything is checkpointed: a third run does no work at all
+    await process_job("job2")
+    assert (len(downloads), len(transcodes)) == (1, 2)
+
+    # A damaged original invalidates the download and what came after it
+    transcodes[0].write_bytes(b"truncated")
+    await process_job("job2")
+    assert (len(downloads), len(transcodes)) == (2, 3)
+    with session_scope() as s:
+        job = s.get(Job, "job2")
+        assert job is not None
+        assert job.status == JobStatus.succeeded.value
+        assert set(job.checkpoints or {}) == {"download", "transcode"}
+
+
+class _UploadingStorage(LocalStorage):
+    """Drops the scratch tree on publish, as object storage does."""
+
+    def publish(self, job_id: str) -> None:
+        shutil.rmtree(self.job_dir(job_id))
+
+
+@pytest.mark.asyncio
+async def test_publish_to_object_storage_clears_checkpoints(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import core.services.download_orchestrator as orchestrator
+    from core.services import provider_registry
+
+    _add_job("job3")
+    monkeypatch.setattr(
+        provider_registry, "detect_provider", lambda url: _FakeProvider()
+    )
+    monkeypatch.setattr(orchestrator, "get_storage", _UploadingStorage)
+
+    async def fake_transcode_many(
+        input_path: Path, output_dir: Path, outputs: list[object], **_: object
+    ) -> list[Path]:
+        out = output_dir / (input_path.stem + ".mp3")
+        out.write_bytes(b"mp3")
+        return [out]
+
+    import transcoder.ffmpeg_cli as ffmpeg_cli
+
+    monkeypatch.setattr(ffmpeg_cli, "transcode_many", fake_transcode_many)
+
+    await process_job("job3")
+
+    with session_scope() as s:
+        job = s.get(Job, "job3")
+        assert job is not None
+        assert job.status == JobStatus.succeeded.value
+        # They named scratch files that are gone now
+        assert not job.checkpoints
+
+
+@pytest.mark.asyncio
+async def test_artifact_copy_and_hash_keep_event_loop_responsive(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    import core.services.download_orchestrator as orchestrator
+    import transcoder.ffmpeg_cli as ffmpeg_cli
+    from core.services import checkpoints
+
+    create_db_and_tables()
+    original = tmp_path / "original" / "big.mp3"
+    original.parent.mkdir()
+    original.write_bytes(b"\x00" * (64 * 1024 * 1024))
+    real_copy = orchestrator._copy_file
+
+    def slow_copy(src: Path, dest: Path) -> None:
+        time.sleep(0.3)  # a slow disk on top of the big file
+        real_copy(src, dest)
+
+    async def failing_remux(*_: object, **__: object) -> list[Path]:
+        raise RuntimeError("remux failed")
+
+    monkeypatch.setattr(orchestrator, "_copy_file", slow_copy)
+    monkeypatch.setattr(ffmpeg_cli, "transcode_many", failing_remux)
+
+    gaps: list[float] = []
+
+    async def ticker(stop: asyncio.Event) -> None:
+        last = time.monotonic()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.monotonic()
+            gaps.append(now - last)
+            last = now
+
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    paths = await orchestrator._produce_final(
+        original, tmp_path / "final", DownloadOptions()
+    )
+    await checkpoints.save("missing", "transcode", paths, tmp_path)
+    stop.set()
+    await tick
+
+    assert paths == [tmp_path / "final" / "big.mp3"]
+    assert paths[0].stat().st_size == original.stat().st_size
+    assert len(gaps) > 10
+    assert max(gaps) < 0.1
+
+
+def _add_job(job_id: str) -> None:
+    create_db_and_tables()
+    with session_scope() as s:
+        s.add(
+            Job(
+                id=job_id,
+                provider="soundcloud",
+                url=f"http://example.com/{job_id}",
+                fingerprint=f"fp-{job_id}",
+                status=JobStatus.queued.value,
+                options=DownloadOptions().model_dump(),
+            )
+        )
+
+
+@pytest.fixture()
+def hung_transcode(monkeypatch: pytest.MonkeyPatch) -> asyncio.Event:
+    """Fake provider plus a transcode that never finishes."""
+    from core.services import provider_registry
+
+    monkeypatch.setattr(
+        provider_registry, "detect_provider", lambda url: _FakeProvider()
+    )
+    started = asyncio.Event()
+
+    async def never_done(*_: object, **__: object) -> list[Path]:
+        started.set()
+        await asyncio.sleep(3600)
+        return []
+
+    import transcoder.ffmpeg_cli as ffmpeg_cli
+
+    monkeypatch.setattr(ffmpeg_cli, "transcode_many", never_done)
+    return started
+
+
+@pytest.mark.asyncio
+async def test_cancel_stops_a_running_job(
+    hung_transcode: asyncio.Event,
+) -> None:
+    _add_job("job3")
+    run = asyncio.create_task(process_job("job3"))
+    await asyncio.wait_for(hung_transcode.wait(), 5)
+
+    assert cancellation.cancel("job3") is JobStatus.cancelled
+    await asyncio.wait_for(run, 5)
+
+    with session_scope() as s:
+        job = s.get(Job, "job3")
+        assert job is not None
+        assert job.status == JobStatus.cancelled.value
+        assert job.lease_owner is None
+    # Its ticket coming up again does not restart it
+    assert not leases.claim("job3")
+
+
+@pytest.mark.asyncio
+async def test_stage_timeout_marks_job_timed_out(
+    hung_transcode: asyncio.Event,
+) -> None:
+    get_settings().transcode_timeout_seconds = 0.2
+    _add_job("job4")
+
+    await asyncio.wait_for(process_job("job4"), 5)
+
+    with session_scope() as s:
+        job = s.get(Job, "job4")
+        assert job is not None
+        assert job.status == JobStatus.timed_out.value
+        assert job.error == "transcode timed out after 0.2s"
+
+
+def test_cancel_leaves_finished_jobs_alone() -> None:
+    _add_job("job5")
+    with session_scope() as s:
+        job = s.get(Job, "job5")
+        assert job is not None
+        job.status = JobStatus.succeeded.value
+        s.add(job)
+
+    assert cancellation.cancel("job5") is JobStatus.succeeded
+    with pytest.raises(ValueError):
+        cancellation.cancel("nope")
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import pytest
+
+import mcp_music_forge.tools.enqueue_download as enqueue
+from core.domain.job import Job, JobStatus
+from core.infra.db import create_db_and_tables, session_scope
+
+_URL = "https://soundcloud.com/artist/track"
+
+
+@pytest.fixture()
+def tickets(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Job ids handed to the scheduler instead of Redis."""
+    create_db_and_tables()
+    sent: list[str] = []
+
+    async def fake_enqueue(job_id: str, **_: object) -> None:
+        sent.append(job_id)
+
+    async def fake_pool() -> None:
+        return None
+
+    monkeypatch.setattr(enqueue, "enqueue_download_job", fake_enqueue)
+    monkeypatch.setattr(enqueue, "get_queue_pool", fake_pool)
+    return sent
+
+
+def _set_status(job_id: str, status: JobStatus) -> None:
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        assert job is not None
+        job.status = status.value
+        s.add(job)
+
+
+@pytest.mark.asyncio
+async def test_finished_or_running_job_is_not_run_again(
+    tickets: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def admit(*_: object) -> None:
+        return None
+
+    monkeypatch.setattr(enqueue.admission, "check", admit)
+    options = enqueue.EnqueueOptions(probe=False)
+    first = await enqueue._enqueue(_URL, options)
+    assert tickets == [first.job_id]
+
+    for status in (JobStatus.running, JobStatus.succeeded):
+        _set_status(first.job_id, status)
+        again = await enqueue._enqueue(_URL, options)
+        assert (again.job_id, again.status) == (first.job_id, status)
+    assert tickets == [first.job_id]
+
+    _set_status(first.job_id, JobStatus.failed)
+    await enqueue._enqueue(_URL, options)
+    assert tickets == [first.job_id, first.job_id]
+
+
+@pytest.mark.asyncio
+async def test_only_new_or_rerun_work_is_admission_checked(
+    tickets: list[str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    checked: list[str | None] = []
+
+    async def admit(redis: object, client_id: str | None) -> None:
+        checked.append(client_id)
+        if len(checked) > 1:
+            raise enqueue.admission.AdmissionRejectedError(
+                "queue_full", 1, 1, 5
+            )
+
+    monkeypatch.setattr(enqueue.admission, "check", admit)
+    options = enqueue.EnqueueOptions(probe=False, client_id="c")
+    first = await enqueue._enqueue(_URL, options)
+
+    # Asking again for the queued or finished job adds no work
+    await enqueue._enqueue(_URL, options)
+    _set_status(first.job_id, JobStatus.succeeded)
+    await enqueue._enqueue(_URL, options)
+    assert checked == ["c"]
+
+    _set_status(first.job_id, JobStatus.cancelled)
+    with pytest.raises(enqueue.admission.AdmissionRejectedError):
+        await enqueue._enqueue(_URL, options)
+
+
+def test_http_callers_are_keyed_by_address(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from fastapi.testclient import TestClient
+
+    import api.main as api_main
+    from core.settings import get_settings
+
+    seen: list[str | None] = []
+
+    async def fake_enqueue(
+        url: str, options: enqueue.EnqueueOptions
+    ) -> enqueue.EnqueueResult:
+        seen.append(options.client_id)
+        return enqueue.EnqueueResult(job_id="j1", status=JobStatus.queued)
+
+    monkeypatch.setattr(api_main, "enqueue_download", fake_enqueue)
+    get_settings().admin_token = "t"  # noqa: S105
+    client = TestClient(api_main.app)
+    body = {"client_id": "fresh-id"}
+
+    client.post("/download", params={"url": _URL}, json=body)
+    client.post(
+        "/download",
+        params={"url": _URL},
+        json=body,
+        headers={"X-Admin-Token": "wrong"},
+    )
+    client.post(
+        "/download",
+        params={"url": _URL},
+        json=body,
+        headers={"X-Admin-Token": "t"},
+    )
+
+    assert seen == ["http:testclient", "http:testclient", "fresh-id"]
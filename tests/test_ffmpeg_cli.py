@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import shutil
+import subprocess
+import time
+import wave
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import transcoder.ffmpeg_cli as ffmpeg_cli
+from core.settings import get_settings
+
+_JPEG_HEAD = b"\xff\xd8\xff\xe0" + b"\x00" * 60
+
+
+def test_opus_cover_goes_into_vorbis_comment(tmp_path: Path) -> None:
+    cover = tmp_path / "cover.jpg"
+    cover.write_bytes(_JPEG_HEAD)
+
+    inputs, (outputs,) = ffmpeg_cli._tagging_args(
+        ["opus"], {"title": "A=B; #1"}, cover, tmp_path
+    )
+
+    ogg = tmp_path / "ogg.ffmeta"
+    assert inputs[-4:] == ["-f", "ffmetadata", "-i", str(ogg)]
+    assert outputs[outputs.index("-map_metadata") + 1] == "2"
+    assert "attached_pic" not in outputs
+    lines = ogg.read_text().splitlines()
+    assert lines[1] == r"title=A\=B\; \#1"
+    key, _, value = lines[2].partition("=")
+    assert key == "METADATA_BLOCK_PICTURE"
+    block = base64.b64decode(value.replace("\\=", "="))
+    assert block.endswith(_JPEG_HEAD)
+
+
+def test_picture_stream_formats_attach_the_cover(tmp_path: Path) -> None:
+    cover = tmp_path / "cover.webp"
+    cover.write_bytes(b"RIFF\x00\x00\x00\x00WEBP")
+
+    inputs, (outputs,) = ffmpeg_cli._tagging_args(["mp3"], {}, cover, tmp_path)
+
+    assert inputs == ["-i", str(cover)]
+    # webp is not allowed in ID3/MP4: re-encoded as JPEG
+    assert outputs[outputs.index("-c:v") + 1] == "mjpeg"
+    assert outputs[-2:] == ["-id3v2_version", "3"]
+    assert not list(tmp_path.glob("*.ffmeta"))
+
+
+def test_repeated_containers_are_named_by_quality(tmp_path: Path) -> None:
+    outputs = [
+        ffmpeg_cli.TranscodeOutput("mp3", "V0"),
+        ffmpeg_cli.TranscodeOutput("mp3", "320"),
+        ffmpeg_cli.TranscodeOutput("aac", "256"),
+    ]
+    paths = ffmpeg_cli.output_paths(tmp_path / "in.wav", tmp_path, outputs)
+    assert [p.name for p in paths] == ["in-v0.mp3", "in-320.mp3", "in.m4a"]
+
+
+def _write_wav(path: Path, seconds: float = 1.0) -> None:
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(8000)
+        w.writeframes(b"\x00\x01" * int(8000 * seconds))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["mp3", "flac", "aac", "opus"])
+async def test_transcode_writes_tags_and_cover(
+    fmt: str, tmp_path: Path
+) -> None:
+    ffmpeg = get_settings().ffmpeg_bin
+    if not shutil.which(ffmpeg):
+        pytest.skip("ffmpeg not available")
+    mutagen = pytest.importorskip("mutagen")
+    src = tmp_path / "src.wav"
+    _write_wav(src)
+    cover = tmp_path / "cover.jpg"
+    subprocess.run(  # noqa: S603 - fixed arguments
+        [ffmpeg, "-v", "error", "-f", "lavfi", "-i", "color=red:s=32x32"]
+        + ["-frames:v", "1", str(cover)],
+        check=True,
+    )
+
+    out = await ffmpeg_cli.transcode(
+        src,
+        tmp_path / "final",
+        fmt,
+        "default",
+        metadata={"title": "Song", "artist": "Band"},
+        cover=cover,
+    )
+
+    assert out.suffix == "." + ffmpeg_cli.output_extension(fmt)
+    easy = mutagen.File(out, easy=True)
+    assert easy["title"] == ["Song"]
+    assert easy["artist"] == ["Band"]
+    raw = mutagen.File(out)
+    if fmt == "mp3":
+        assert raw.tags.getall("APIC")
+    elif fmt == "flac":
+        assert raw.pictures
+    elif fmt == "aac":
+        assert raw.tags["covr"]
+    else:
+        assert raw.tags["metadata_block_picture"]
+
+
+@pytest.mark.asyncio
+async def test_transcode_many_encodes_every_profile_in_one_pass(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    if not shutil.which(get_settings().ffmpeg_bin):
+        pytest.skip("ffmpeg not available")
+    mutagen = pytest.importorskip("mutagen")
+    src = tmp_path / "src.wav"
+    _write_wav(src)
+    runs: list[list[str]] = []
+    real_run = ffmpeg_cli._run
+
+    async def counting_run(args: list[str], *rest: Any) -> None:
+        runs.append(args)
+        await real_run(args, *rest)
+
+    monkeypatch.setattr(ffmpeg_cli, "_run", counting_run)
+
+    paths = await ffmpeg_cli.transcode_many(
+        src,
+        tmp_path / "final",
+        [
+            ffmpeg_cli.TranscodeOutput("mp3", "v0"),
+            ffmpeg_cli.TranscodeOutput("flac", "lossless"),
+            ffmpeg_cli.TranscodeOutput("opus", "96"),
+        ],
+        metadata={"title": "Song"},
+    )
+
+    assert len(runs) == 1
+    assert runs[0].count(str(src)) == 1
+    assert [p.suffix for p in paths] == [".mp3", ".flac", ".opus"]
+    for p in paths:
+        assert mutagen.File(p, easy=True)["title"] == ["Song"]
+
+
+@pytest.mark.asyncio
+async def test_tagging_io_keeps_event_loop_responsive(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    # Opus takes the whole cover base64-encoded into its ffmetadata file
+    cover = tmp_path / "cover.jpg"
+    cover.write_bytes(_JPEG_HEAD + b"\x00" * (16 * 1024 * 1024))
+    written: list[Path] = []
+    real_tagging_args = ffmpeg_cli._tagging_args
+
+    def slow_tagging_args(
+        formats: list[str],
+        metadata: dict[str, str],
+        cover: Path | None,
+        meta_dir: Path,
+    ) -> tuple[list[str], list[list[str]]]:
+        time.sleep(0.3)  # a slow disk on top of the big cover
+        res = real_tagging_args(formats, metadata, cover, meta_dir)
+        written.extend(meta_dir.iterdir())
+        return res
+
+    async def no_ffmpeg(*_: object) -> None:
+        return None
+
+    monkeypatch.setattr(ffmpeg_cli, "_tagging_args", slow_tagging_args)
+    monkeypatch.setattr(ffmpeg_cli, "_run", no_ffmpeg)
+
+    gaps: list[float] = []
+
+    async def ticker(stop: asyncio.Event) -> None:
+        last = time.monotonic()
+        while not stop.is_set():
+            await asyncio.sleep(0.005)
+            now = time.monotonic()
+            gaps.append(now - last)
+            last = now
+
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(stop))
+    await ffmpeg_cli.transcode_many(
+        tmp_path / "src.wav",
+        tmp_path / "final",
+        [
+            ffmpeg_cli.TranscodeOutput("mp3", "v0"),
+            ffmpeg_cli.TranscodeOutput("opus", "96"),
+        ],
+        metadata={"title": "Song"},
+        cover=cover,
+    )
+    stop.set()
+    await tick
+
+    assert {p.name for p in written} == {"tags.ffmeta", "ogg.ffmeta"}
+    assert len(gaps) > 10
+    assert max(gaps) < 0.1
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+
+import httpx
+import pytest
+
+from bot.forge_client import HttpForgeClient
+from core.domain.job import JobPriority, JobStatus
+from mcp_music_forge.tools.enqueue_download import EnqueueOptions
+
+
+def _client(
+    handler: Callable[[httpx.Request], httpx.Response],
+) -> HttpForgeClient:
+    return HttpForgeClient(
+        "http://forge", transport=httpx.MockTransport(handler)
+    )
+
+
+@pytest.mark.asyncio
+async def test_http_client_round_trips() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url.path == "/download":
+            return httpx.Response(
+                200, json={"job_id": "j1", "status": "queued"}
+            )
+        if request.url.path == "/jobs/status":
+            return httpx.Response(
+                200,
+                json={
+                    "jobs": [{"id": "j1", "status": "running"}],
+                    "missing": ["nope"],
+                },
+            )
+        return httpx.Response(
+            200, json={"id": "j1", "status": "succeeded", "title": "T"}
+        )
+
+    client = _client(handler)
+    try:
+        enqueued = await client.enqueue("https://soundcloud.com/a/b")
+        statuses = await client.get_statuses(["j1", "nope"], fields=[])
+        status = await client.get_status("j1")
+    finally:
+        await client.aclose()
+
+    assert enqueued.job_id == "j1"
+    assert seen[0].url.params["url"] == "https://soundcloud.com/a/b"
+    assert json.loads(seen[1].content) == {
+        "job_ids": ["j1", "nope"],
+        "fields": [],
+    }
+    assert list(statuses) == ["j1"]
+    assert statuses["j1"].status is JobStatus.running
+    assert status.title == "T"
+    assert seen[2].url.path == "/jobs/j1"
+
+
+@pytest.mark.asyncio
+async def test_http_client_raises_on_error_status() -> None:
+    client = _client(
+        lambda request: httpx.Response(429, json={"detail": "queue_full"})
+    )
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        await client.enqueue("https://soundcloud.com/a/b")
+    assert exc.value.response.status_code == 429
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http_client_raises_on_timeout() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = _client(handler)
+    with pytest.raises(httpx.TimeoutException):
+        await client.get_statuses(["j1"])
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_http_client_sends_admin_token() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"job_id": "j1", "status": "queued"})
+
+    client = HttpForgeClient(
+        "http://forge",
+        transport=httpx.MockTransport(handler),
+        admin_token="t",  # noqa: S106
+    )
+    await client.enqueue("https://soundcloud.com/a/b")
+    await client.aclose()
+    assert seen[0].headers["x-admin-token"] == "t"
+
+
+@pytest.mark.asyncio
+async def test_http_client_sends_options_as_json() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"job_id": "j1", "status": "queued"})
+
+    client = _client(handler)
+    await client.enqueue(
+        "https://soundcloud.com/a/b",
+        EnqueueOptions(priority=JobPriority.bulk, client_id="tg:1"),
+    )
+    await client.aclose()
+
+    body = json.loads(seen[0].content)
+    assert EnqueueOptions.model_validate(body) == EnqueueOptions(
+        priority=JobPriority.bulk, client_id="tg:1"
+    )
+    assert body["priority"] == "bulk"
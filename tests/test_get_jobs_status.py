@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+
+from core.domain.job import DownloadOptions, Job, JobStatus, OutputProfile
+from core.infra.db import create_db_and_tables, session_scope
+from mcp_music_forge.tools.get_jobs_status import get_jobs_status
+from storage.local_fs import LocalStorage
+
+
+def _add_jobs() -> None:
+    create_db_and_tables()
+    with session_scope() as s:
+        for i, status in enumerate((JobStatus.queued, JobStatus.succeeded)):
+            s.add(
+                Job(
+                    id=f"j{i}",
+                    provider="soundcloud",
+                    url=f"http://example.com/{i}",
+                    fingerprint=f"fp{i}",
+                    status=status.value,
+                    title=f"T{i}",
+                )
+            )
+
+
+@pytest.mark.asyncio
+async def test_get_jobs_status_batch_with_field_selection() -> None:
+    _add_jobs()
+
+    res = await get_jobs_status(["j1", "nope", "j0", "j1"], fields=["title"])
+
+    assert [j.id for j in res.jobs] == ["j1", "j0"]
+    assert [j.status for j in res.jobs] == [
+        JobStatus.succeeded,
+        JobStatus.queued,
+    ]
+    assert res.jobs[0].title == "T1"
+    assert res.jobs[0].model_fields_set == {"id", "status", "title"}
+    assert res.missing == ["nope"]
+
+
+@pytest.mark.asyncio
+async def test_get_jobs_status_rejects_unknown_fields() -> None:
+    _add_jobs()
+    with pytest.raises(ValueError):
+        await get_jobs_status(["j0"], fields=["bogus"])
+
+
+@pytest.mark.asyncio
+async def test_get_jobs_status_artifacts_are_opt_in() -> None:
+    _add_jobs()
+    final = LocalStorage().ensure_subdir("j1", "final")
+    final.joinpath("a.mp3").write_bytes(b"mp3")
+
+    res = await get_jobs_status(["j0", "j1"])
+    assert all("artifacts" not in j.model_fields_set for j in res.jobs)
+    assert res.jobs[1].title == "T1"
+
+    res = await get_jobs_status(["j0", "j1"], fields=["artifacts"])
+    assert res.jobs[0].artifacts == []
+    assert [a.filename for a in res.jobs[1].artifacts] == ["a.mp3"]
+
+
+@pytest.mark.asyncio
+async def test_artifacts_mark_the_primary_output() -> None:
+    _add_jobs()
+    with session_scope() as s:
+        job = s.get(Job, "j1")
+        assert job is not None
+        job.options = DownloadOptions(
+            outputs=[
+                OutputProfile(format="mp3", quality="320"),
+                OutputProfile(format="flac", quality="lossless"),
+            ]
+        ).model_dump()
+        s.add(job)
+    final = LocalStorage().ensure_subdir("j1", "final")
+    for name in ("t.flac", "t.mp3", "cover.jpg"):
+        final.joinpath(name).write_bytes(b"x")
+
+    res = await get_jobs_status(["j1"], fields=["artifacts"])
+
+    primary = [a.filename for a in res.jobs[0].artifacts if a.primary]
+    assert primary == ["t.mp3"]
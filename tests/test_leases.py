@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+from sqlalchemy import false
+
+from core.domain.job import DownloadOptions, Job, JobStatus
+from core.infra.db import create_db_and_tables, session_scope
+from core.services import leases
+from core.settings import get_settings
+
+
+def _add_job(job_id: str, **fields: object) -> None:
+    create_db_and_tables()
+    with session_scope() as s:
+        s.add(
+            Job(
+                id=job_id,
+                provider="soundcloud",
+                url=f"http://example.com/{job_id}",
+                fingerprint=f"fp-{job_id}",
+                options=DownloadOptions().model_dump(),
+                **fields,
+            )
+        )
+
+
+def _get(job_id: str) -> Job:
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        assert job is not None
+        return job
+
+
+def test_live_lease_blocks_a_second_claim() -> None:
+    _add_job("j1")
+    assert leases.claim("j1")
+    assert not leases.claim("j1")
+    assert _get("j1").status == JobStatus.running.value
+
+    job = _get("j1")
+    with session_scope() as s:
+        job.lease_expires_at = datetime.now() - timedelta(seconds=1)
+        s.add(job)
+    assert leases.claim("j1")
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_the_lease_alive() -> None:
+    get_settings().job_lease_seconds = 0.3
+    _add_job("j2")
+    assert leases.claim("j2")
+    async with leases.heartbeat("j2"):
+        await asyncio.sleep(0.6)
+        expires = _get("j2").lease_expires_at
+        assert expires is not None and expires > datetime.now()
+    leases.release("j2")
+    assert _get("j2").lease_owner is None
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_stops_the_work() -> None:
+    get_settings().job_lease_seconds = 0.3
+    _add_job("j3")
+    assert leases.claim("j3")
+    # The reaper handed the job to another worker
+    job = _get("j3")
+    with session_scope() as s:
+        job.lease_owner = "other:1"
+        s.add(job)
+
+    finished = False
+    with pytest.raises(leases.LeaseLostError):
+        async with leases.heartbeat("j3"):
+            await asyncio.sleep(5)
+            finished = True
+
+    assert not finished
+    leases.release("j3")
+    assert _get("j3").lease_owner == "other:1"
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_then_gives_up(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requeued: list[str] = []
+
+    async def fake_enqueue(job_id: str, **_: object) -> None:
+        requeued.append(job_id)
+
+    monkeypatch.setattr(leases, "enqueue_download_job", fake_enqueue)
+    expired = datetime.now() - timedelta(seconds=5)
+    live = datetime.now() + timedelta(seconds=60)
+    _add_job("dead", status="running", lease_expires_at=expired)
+    _add_job("legacy", status="running")  # from before leases existed
+    _add_job("alive", status="running", lease_expires_at=live)
+    _add_job("doomed", status="running", lease_expires_at=expired, reaped=2)
+
+    assert await leases.reap_expired() == 3
+
+    assert sorted(requeued) == ["dead", "legacy"]
+    assert _get("dead").status == JobStatus.queued.value
+    assert _get("dead").reaped == 1
+    assert _get("alive").status == JobStatus.running.value
+    doomed = _get("doomed")
+    assert doomed.status == JobStatus.failed.value
+    assert doomed.error == "Worker lost the job 3 times"
+
+
+@pytest.mark.asyncio
+async def test_reaper_counts_only_jobs_it_took(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def fake_enqueue(job_id: str, **_: object) -> None:
+        return None
+
+    monkeypatch.setattr(leases, "enqueue_download_job", fake_enqueue)
+    _add_job(
+        "renewed",
+        status="running",
+        lease_expires_at=datetime.now() - timedelta(seconds=5),
+    )
+    real_expired = leases._lease_expired
+    calls: list[datetime] = []
+
+    def renewed_after_select(now: datetime) -> Any:
+        # The job's heartbeat lands between the select and the update
+        calls.append(now)
+        return real_expired(now) if len(calls) == 1 else false()
+
+    monkeypatch.setattr(leases, "_lease_expired", renewed_after_select)
+
+    assert await leases.reap_expired() == 0
+    assert _get("renewed").status == JobStatus.running.value
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from storage import final_artifact
+from storage.local_fs import LocalStorage, shard_of
+from storage.migrate import migrate_layout
+
+
+def test_read_paths_create_nothing(tmp_path: Path) -> None:
+    storage = LocalStorage(tmp_path / "data")
+
+    assert storage.list_files("abc") == []
+    assert storage.size("abc") == 0
+    assert not storage.subdir("abc", "final").exists()
+    assert not (tmp_path / "data").exists()
+
+    final = storage.ensure_subdir("abc", "final")
+    aa, bb = shard_of("abc")
+    assert final == tmp_path / "data" / "jobs" / aa / bb / "abc" / "final"
+
+
+def test_migration_moves_flat_job_dirs(tmp_path: Path) -> None:
+    jobs = tmp_path / "jobs"
+    for job_id in ("0f" * 16, "job-b"):
+        (jobs / job_id / "final").mkdir(parents=True)
+        (jobs / job_id / "final" / "t.mp3").write_bytes(b"mp3")
+    storage = LocalStorage(tmp_path)
+
+    assert migrate_layout(tmp_path, dry_run=True) == 2
+    assert migrate_layout(tmp_path) == 2
+    assert migrate_layout(tmp_path) == 0
+
+    for job_id in ("0f" * 16, "job-b"):
+        assert not (jobs / job_id).exists()
+        [f] = storage.list_files(job_id)
+        assert f.read_bytes() == b"mp3"
+
+
+def test_unmigrated_flat_job_dirs_stay_readable(tmp_path: Path) -> None:
+    legacy = tmp_path / "jobs" / "job-a" / "final"
+    legacy.mkdir(parents=True)
+    (legacy / "t.mp3").write_bytes(b"mp3")
+    storage = LocalStorage(tmp_path)
+
+    assert storage.job_dir("job-a") == legacy.parent
+    [f] = storage.files("job-a")
+    assert (f.subdir, f.name, f.size) == ("final", "t.mp3", 3)
+    assert b"".join(storage.iter_bytes("job-a", "final", "t.mp3")) == b"mp3"
+    assert storage.size("job-a") == 3
+    # New jobs still go into shards
+    aa, bb = shard_of("job-b")
+    assert storage.job_dir("job-b") == tmp_path / "jobs" / aa / bb / "job-b"
+
+
+def test_final_artifact_prefers_the_primary_output(tmp_path: Path) -> None:
+    storage = LocalStorage(tmp_path)
+    final = storage.ensure_subdir("j1", "final")
+    for name in ("t.flac", "t.mp3", "cover.jpg"):
+        final.joinpath(name).write_bytes(b"x")
+
+    picked = final_artifact(storage, "j1", ".mp3")
+    assert picked is not None and picked.name == "t.mp3"
+    # Without (or with an unmatched) preference: audio, by name
+    picked = final_artifact(storage, "j1", ".opus")
+    assert picked is not None and picked.name == "t.flac"
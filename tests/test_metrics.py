@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import fakeredis
+import pytest
+from prometheus_client import CollectorRegistry
+
+from core import metrics
+from core.domain.job import JobPriority
+from core.services import scheduler
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    value = metrics.REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+def test_stage_timer_observes_even_on_error() -> None:
+    labels = {"stage": "transcode", "provider": "t", "format": "other"}
+    before = _sample("forge_stage_seconds_count", labels)
+
+    with pytest.raises(RuntimeError):
+        with metrics.stage_timer("transcode", "t", "weird-format"):
+            raise RuntimeError("boom")
+
+    assert _sample("forge_stage_seconds_count", labels) == before + 1
+
+
+def test_failed_job_counts_as_failure() -> None:
+    labels = {"provider": "t", "format": "mp3"}
+    before = _sample("forge_job_failures_total", labels)
+    metrics.observe_job("t", "MP3", "failed", 1.5)
+    assert _sample("forge_job_failures_total", labels) == before + 1
+
+
+@pytest.mark.asyncio
+async def test_cluster_collector_reports_queue_depth(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    server = fakeredis.FakeServer()
+    redis = fakeredis.FakeAsyncRedis(server=server)
+    await scheduler.submit(redis, "j1", client_id="a")
+    await scheduler.submit(redis, "j2", priority=JobPriority.bulk)
+    monkeypatch.setattr(
+        metrics,
+        "get_redis",
+        lambda: fakeredis.FakeRedis(server=server, decode_responses=True),
+    )
+
+    registry = CollectorRegistry()
+    registry.register(metrics.ClusterCollector())
+
+    sample = registry.get_sample_value
+    assert sample("forge_queue_depth", {"lane": "interactive"}) == 1
+    assert sample("forge_queue_depth", {"lane": "bulk"}) == 1
+    assert sample("forge_storage_bytes") == 0
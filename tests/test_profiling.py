@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import fakeredis
+import pytest
+
+from core import profiling
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_sampler_folds_stacks_of_busy_code() -> None:
+    with profiling.SamplingProfiler(interval=0.002) as profiler:
+        _spin(0.2)
+
+    folded = profiler.folded()
+    assert profiler.samples > 0
+    busy = [line for line in folded.splitlines() if "_spin (" in line]
+    assert busy, folded
+    stack, count = busy[0].rsplit(" ", 1)
+    assert stack.startswith("MainThread;")
+    assert int(count) > 0
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_reports_blocking_callback(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monitor = profiling.LoopLagMonitor(0.05, interval=0.02)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    with caplog.at_level(logging.WARNING, logger="core.profiling"):
+        time.sleep(0.3)  # blocks the loop on purpose
+        await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    stalls = [r for r in caplog.records if "loop blocked" in r.getMessage()]
+    assert len(stalls) == 1
+    assert "test_loop_monitor_reports_blocking_callback" in (
+        stalls[0].getMessage()
+    )
+
+
+@pytest.mark.asyncio
+async def test_job_profile_flag_is_consumed_once() -> None:
+    redis = fakeredis.FakeAsyncRedis()
+    assert not await profiling.job_profile_requested(redis, "j1")
+
+    await profiling.request_job_profile(redis, "j1")
+    assert await profiling.job_profile_requested(redis, "j1")
+    assert not await profiling.job_profile_requested(redis, "j1")
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+from typing import Any, cast
+
+import fakeredis
+import pytest
+
+from core.ports.provider_port import DownloadProgress
+from core.services.progress import ProgressReporter, progress_key, read_progress
+from transcoder.ffmpeg_cli import TranscodeProgress, parse_progress_block
+
+
+def _written(r: fakeredis.FakeRedis, job_id: str = "job1") -> dict[str, str]:
+    return cast(dict[str, str], r.hgetall(progress_key(job_id)))
+
+
+def test_reporter_throttles_within_stage() -> None:
+    r = fakeredis.FakeRedis(decode_responses=True)
+    rep = ProgressReporter("job1", redis=r, min_interval=60)
+
+    rep.on_download(DownloadProgress(100, 1000, 50.0, 18))
+    rep.on_download(DownloadProgress(900, 1000, 50.0, 2))
+    rep.flush()
+
+    data = _written(r)
+    assert data["stage"] == "download"
+    # second update is inside the throttle window
+    assert data["downloaded_bytes"] == "100"
+    assert float(data["percent"]) == pytest.approx(10.0)
+
+
+def test_reporter_stage_change_is_written_immediately() -> None:
+    r = fakeredis.FakeRedis(decode_responses=True)
+    rep = ProgressReporter("job1", redis=r, min_interval=60)
+
+    rep.on_download(DownloadProgress(100, 1000, 50.0, 18))
+    rep.on_transcode(TranscodeProgress(position=30.0, duration=120.0, speed=2))
+    rep.flush()
+
+    data = _written(r)
+    assert data["stage"] == "transcode"
+    assert "downloaded_bytes" not in data
+    assert float(data["percent"]) == pytest.approx(25.0)
+
+
+def test_reporter_survives_unreachable_redis() -> None:
+    server = fakeredis.FakeServer()
+    server.connected = False
+    r = fakeredis.FakeRedis(server=server, decode_responses=True)
+    rep = ProgressReporter("job1", redis=r, min_interval=0)
+    rep.stage("download")
+    rep.on_download(DownloadProgress(1, None, None, None))
+    rep.flush()
+
+
+class _SlowRedis:
+    """Wraps a Redis client; every pipeline round trip takes ``delay``."""
+
+    def __init__(self, redis: fakeredis.FakeRedis, delay: float) -> None:
+        self._redis = redis
+        self._delay = delay
+
+    def pipeline(self, **kwargs: Any) -> _SlowPipeline:
+        return _SlowPipeline(self._redis.pipeline(**kwargs), self._delay)
+
+
+class _SlowPipeline:
+    def __init__(self, pipe: Any, delay: float) -> None:
+        self._pipe = pipe
+        self._delay = delay
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pipe, name)
+
+    def execute(self) -> list[Any]:
+        time.sleep(self._delay)
+        return cast(list[Any], self._pipe.execute())
+
+
+def test_reporter_does_not_wait_for_redis() -> None:
+    r = fakeredis.FakeRedis(decode_responses=True)
+    slow = _SlowRedis(r, 0.3)
+    rep = ProgressReporter("job1", redis=slow, min_interval=0)  # type: ignore[arg-type]
+
+    started = time.monotonic()
+    rep.stage("download")
+    rep.on_transcode(TranscodeProgress(position=30.0, duration=120.0, speed=2))
+    assert time.monotonic() - started < 0.1
+
+    rep.flush()
+    # Written in order: the later stage wins
+    assert _written(r)["stage"] == "transcode"
+
+
+@pytest.mark.asyncio
+async def test_read_progress_roundtrip() -> None:
+    server = fakeredis.FakeServer()
+    r = fakeredis.FakeRedis(server=server, decode_responses=True)
+    ar = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    rep = ProgressReporter("job1", redis=r)
+    rep.stage("transcode", duration=240)
+    rep.flush()
+
+    progress = await read_progress("job1", redis=ar)
+    assert progress is not None
+    assert progress.stage == "transcode"
+    assert progress.duration == 240
+    assert await read_progress("missing", redis=ar) is None
+
+
+def test_parse_progress_block() -> None:
+    assert parse_progress_block({"out_time_us": "1500000"}) == 1.5
+    assert parse_progress_block({"out_time_ms": "2000000"}) == 2.0
+    assert parse_progress_block({"out_time_us": "N/A"}) is None
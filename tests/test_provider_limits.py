@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+
+import fakeredis
+import pytest
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError
+from yt_dlp.utils import DownloadError
+
+from core.services.provider_limits import (
+    ProviderGate,
+    ProviderPausedError,
+    is_throttle_error,
+)
+from core.settings import AppSettings
+from providers.ytdlp_common import DownloadIncompleteError
+
+
+def _gate(redis: fakeredis.FakeAsyncRedis, **overrides: object) -> ProviderGate:
+    values: dict[str, object] = {
+        "PROVIDER_RATE": 100.0,
+        "PROVIDER_BURST": 100,
+        "PROVIDER_MAX_CONCURRENCY": 4,
+        "PROVIDER_MAX_WAIT": 0.1,
+        "PROVIDER_BREAKER_THRESHOLD": 3,
+        "PROVIDER_BREAKER_COOLDOWN": 60,
+    }
+    settings = AppSettings(**(values | overrides))  # type: ignore[arg-type]
+    return ProviderGate("sc", redis=redis, settings=settings)
+
+
+async def _throttle(gate: ProviderGate) -> None:
+    with pytest.raises(RuntimeError):
+        async with gate.slot():
+            raise RuntimeError("HTTP Error 429: Too Many Requests")
+
+
+def test_is_throttle_error() -> None:
+    assert is_throttle_error(RuntimeError("HTTP Error 429: Too Many Requests"))
+    assert not is_throttle_error(RuntimeError("HTTP Error 404: Not Found"))
+    # Digits that merely contain 429 are not a status
+    assert not is_throttle_error(
+        DownloadIncompleteError("Song.m4a: 1429 of 3000 bytes")
+    )
+
+
+def test_is_throttle_error_reads_wrapped_http_status() -> None:
+    response = Response(io.BytesIO(b""), "http://x", {}, status=429)
+    err = HTTPError(response)
+    wrapped = DownloadError("ERROR: Unable to download", (HTTPError, err, None))
+    assert is_throttle_error(wrapped)
+    response = Response(io.BytesIO(b""), "http://x", {}, status=500)
+    assert not is_throttle_error(HTTPError(response))
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_concurrent_callers() -> None:
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    gate = _gate(
+        redis,
+        PROVIDER_RATE=20.0,
+        PROVIDER_BURST=1,
+        PROVIDER_MAX_CONCURRENCY=10,
+        PROVIDER_MAX_WAIT=5,
+    )
+    started: list[float] = []
+
+    async def call() -> None:
+        async with gate.slot():
+            started.append(time.monotonic())
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    started.sort()
+    gaps = [b - a for a, b in zip(started, started[1:], strict=False)]
+    # One token every 50ms, not everyone at once after the first wait
+    assert min(gaps) >= 0.04
+    assert started[-1] - started[0] >= 0.24
+
+
+@pytest.mark.asyncio
+async def test_aimd_shrinks_on_throttle_and_grows_on_success() -> None:
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    gate = _gate(redis)
+
+    await _throttle(gate)
+    assert (await gate.state())["limit"] == pytest.approx(2.0)
+
+    async with gate.slot():
+        assert (await gate.state())["in_flight"] == 1
+    state = await gate.state()
+    assert state["limit"] == pytest.approx(2.5)
+    assert state["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_repeated_throttling() -> None:
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    gate = _gate(redis)
+
+    for _ in range(3):
+        await _throttle(gate)
+
+    with pytest.raises(ProviderPausedError) as exc:
+        async with gate.slot():
+            pass
+    assert 0 < exc.value.retry_after <= 60
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_defers_when_full() -> None:
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    gate = _gate(redis, PROVIDER_MAX_CONCURRENCY=1)
+
+    async with gate.slot():
+        with pytest.raises(ProviderPausedError):
+            async with gate.slot():
+                pass
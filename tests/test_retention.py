@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from core.domain.job import DownloadOptions, Job, JobStatus
+from core.infra.db import create_db_and_tables, session_scope
+from core.services import retention
+from core.settings import get_settings
+from storage.local_fs import LocalStorage
+
+_MB = 2**20
+
+
+def _add_job(
+    storage: LocalStorage, job_id: str, status: JobStatus, mb: int, **fields
+) -> None:
+    create_db_and_tables()
+    storage.ensure_subdir(job_id, "original").joinpath("a.wav").write_bytes(
+        b"\0" * mb * _MB
+    )
+    storage.ensure_subdir(job_id, "final").joinpath("a.mp3").write_bytes(
+        b"\0" * 10
+    )
+    with session_scope() as s:
+        s.add(
+            Job(
+                id=job_id,
+                provider="soundcloud",
+                url=f"http://example.com/{job_id}",
+                fingerprint=f"fp-{job_id}",
+                status=status.value,
+                options=DownloadOptions().model_dump(),
+                checkpoints={"download": {}},
+                **fields,
+            )
+        )
+
+
+def _get(job_id: str) -> Job:
+    with session_scope() as s:
+        job = s.get(Job, job_id)
+        assert job is not None
+        return job
+
+
+def test_quota_evicts_least_recently_downloaded() -> None:
+    storage = LocalStorage()
+    now = datetime.now()
+    _add_job(storage, "old", JobStatus.succeeded, 1)
+    _add_job(storage, "used", JobStatus.succeeded, 1, last_accessed_at=now)
+    _add_job(
+        storage,
+        "stale",
+        JobStatus.failed,
+        1,
+        last_accessed_at=now - timedelta(days=1),
+    )
+    _add_job(storage, "busy", JobStatus.running, 5)
+    with session_scope() as s:
+        old = s.get(Job, "old")
+        assert old is not None
+        old.updated_at = now - timedelta(hours=1)
+        s.add(old)
+    get_settings().storage_quota_mb = 2
+
+    assert retention.enforce_quota(storage) == ["stale", "old"]
+
+    for job_id in ("stale", "old"):
+        job = _get(job_id)
+        assert job.status == JobStatus.expired.value
+        assert job.checkpoints is None
+        assert not storage.job_dir(job_id).exists()
+    assert _get("used").status == JobStatus.succeeded.value
+    assert _get("used").size_bytes == _MB + 10
+    # Running jobs are neither indexed nor evicted
+    assert _get("busy").size_bytes is None
+    assert storage.size("busy") == 5 * _MB + 10
+
+
+def test_drop_original_keeps_finals() -> None:
+    storage = LocalStorage()
+    _add_job(storage, "j1", JobStatus.running, 1)
+
+    retention.drop_original("j1", storage)
+
+    assert retention.record_size("j1", storage) == 10
+    assert [p.name for p in storage.list_files("j1")] == ["a.mp3"]
+    assert _get("j1").checkpoints == {}
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterator
+
+import pytest
+
+pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+import boto3  # noqa: E402
+
+from storage import final_artifact  # noqa: E402
+from storage.s3 import S3Storage  # noqa: E402
+
+_MB = 2**20
+
+
+@pytest.fixture
+def storage() -> Iterator[S3Storage]:
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="forge")
+        # Smallest part S3 accepts, so the 6 MB file goes up multipart
+        yield S3Storage(
+            "forge", client=client, prefix="music/", part_size=5 * _MB
+        )
+
+
+def _write_job(storage: S3Storage, job_id: str) -> bytes:
+    audio = bytes(range(256)) * (6 * _MB // 256)
+    storage.ensure_subdir(job_id, "original").joinpath("a.wav").write_bytes(
+        b"wav"
+    )
+    final = storage.ensure_subdir(job_id, "final")
+    final.joinpath("a.mp3").write_bytes(audio)
+    final.joinpath("cover.jpg").write_bytes(b"jpg")
+    return audio
+
+
+def test_publish_uploads_and_drops_scratch(storage: S3Storage) -> None:
+    audio = _write_job(storage, "j1")
+
+    storage.publish("j1")
+
+    assert not storage.job_dir("j1").exists()
+    calls: list[str] = []
+    storage.client.meta.events.register(
+        "before-call.s3", lambda model, **_: calls.append(model.name)
+    )
+    files = {(f.subdir, f.name): f for f in storage.files("j1")}
+    # One listing plus the checksum manifest, not a HEAD per object
+    assert calls == ["ListObjectsV2", "GetObject"]
+    assert set(files) == {
+        ("original", "a.wav"),
+        ("final", "a.mp3"),
+        ("final", "cover.jpg"),
+    }
+    mp3 = files["final", "a.mp3"]
+    assert mp3.size == len(audio)
+    assert mp3.path is None
+    assert mp3.sha256 == hashlib.sha256(audio).hexdigest()
+    assert storage.size("j1") == len(audio) + 6
+    assert final_artifact(storage, "j1") == mp3
+
+
+def test_reads_ranges_and_presigns(storage: S3Storage) -> None:
+    audio = _write_job(storage, "j1")
+    storage.publish("j1")
+
+    assert b"".join(storage.iter_bytes("j1", "final", "a.mp3")) == audio
+    part = b"".join(storage.iter_bytes("j1", "final", "a.mp3", 10, 19))
+    assert part == audio[10:20]
+    with pytest.raises(FileNotFoundError):
+        storage.iter_bytes("j1", "final", "missing.mp3")
+
+    url = storage.url("j1", "final", "a.mp3")
+    assert url is not None
+    assert "music/jobs/" in url and "Signature" in url
+    storage.presign_seconds = 0
+    assert storage.url("j1", "final", "a.mp3") is None
+
+
+def test_delete_removes_objects_and_scratch(storage: S3Storage) -> None:
+    _write_job(storage, "j1")
+    storage.publish("j1")
+    # A retry left new scratch files behind
+    storage.ensure_subdir("j1", "final").joinpath("b.mp3").write_bytes(b"b")
+
+    storage.delete("j1", "original")
+    assert {f.subdir for f in storage.files("j1")} == {"final"}
+
+    storage.delete("j1")
+    assert storage.files("j1") == []
+    assert storage.size("j1") == 0
+    assert not storage.job_dir("j1").exists()
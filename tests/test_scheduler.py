@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import fakeredis
+import pytest
+
+from core.domain.job import JobPriority
+from core.services import scheduler
+
+
+async def _drain(redis: fakeredis.FakeAsyncRedis) -> list[str]:
+    order: list[str] = []
+    while (picked := await scheduler.next_job(redis)) is not None:
+        order.append(picked[2])
+    return order
+
+
+@pytest.mark.asyncio
+async def test_round_robin_across_clients() -> None:
+    redis = fakeredis.FakeAsyncRedis()
+    for i in range(4):
+        await scheduler.submit(redis, f"agent-{i}", client_id="agent")
+    await scheduler.submit(redis, "user-0", client_id="user")
+
+    order = await _drain(redis)
+
+    # the user's single job does not wait behind the agent's backlog
+    assert order == ["agent-0", "user-0", "agent-1", "agent-2", "agent-3"]
+
+
+@pytest.mark.asyncio
+async def test_interactive_lane_runs_before_bulk() -> None:
+    redis = fakeredis.FakeAsyncRedis()
+    for i in range(3):
+        await scheduler.submit(
+            redis, f"bulk-{i}", priority=JobPriority.bulk, client_id="agent"
+        )
+    await scheduler.submit(redis, "tg-0", client_id="tg:1")
+
+    assert await scheduler.pending(redis) == {
+        "interactive": 1,
+        "bulk": 3,
+        "long": 0,
+    }
+    assert await scheduler.next_job(redis) == (
+        JobPriority.interactive,
+        "tg:1",
+        "tg-0",
+    )
+    assert await _drain(redis) == ["bulk-0", "bulk-1", "bulk-2"]
+    assert sum((await scheduler.pending(redis)).values()) == 0
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submit_is_ignored() -> None:
+    redis = fakeredis.FakeAsyncRedis()
+    assert await scheduler.submit(redis, "j1", client_id="a") is True
+    assert await scheduler.submit(redis, "j1", client_id="a") is False
+    assert await _drain(redis) == ["j1"]
+
+
+@pytest.mark.asyncio
+async def test_delayed_submit_waits_until_ready(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    redis = fakeredis.FakeAsyncRedis()
+    now = 1_000_000.0
+    monkeypatch.setattr(scheduler.time, "time", lambda: now)
+    await scheduler.submit(redis, "later", client_id="a", delay=30)
+
+    assert await scheduler.next_job(redis) is None
+    assert (await scheduler.pending(redis))["interactive"] == 1
+
+    now += 31
+    assert await _drain(redis) == ["later"]
+    assert sum((await scheduler.pending(redis)).values()) == 0
+
+
+@pytest.mark.asyncio
+async def test_shorter_jobs_overtake_longer_ones() -> None:
+    redis = fakeredis.FakeAsyncRedis()
+    mix = scheduler.estimate_cost(3 * 3600, "mp3")
+    await scheduler.submit(redis, "mix", client_id="a", cost=mix)
+    for i in range(3):
+        track = scheduler.estimate_cost(180, "mp3")
+        await scheduler.submit(redis, f"track-{i}", client_id="a", cost=track)
+
+    assert await _drain(redis) == ["track-0", "track-1", "track-2", "mix"]
+
+
+@pytest.mark.asyncio
+async def test_long_lane_runs_after_max_wait(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    redis = fakeredis.FakeAsyncRedis()
+    now = 1_000_000.0
+    monkeypatch.setattr(scheduler.time, "time", lambda: now)
+    lane = scheduler.lane_for(JobPriority.interactive, 4 * 3600)
+    assert lane is JobPriority.long
+    await scheduler.submit(redis, "podcast", priority=lane, client_id="a")
+    for i in range(3):
+        await scheduler.submit(redis, f"track-{i}", client_id="b")
+
+    assert await scheduler.next_job(redis) == (
+        JobPriority.interactive,
+        "b",
+        "track-0",
+    )
+    max_wait = scheduler.get_settings().schedule_long_max_wait
+    now += max_wait
+    # starved for too long: jumps ahead of the interactive lane
+    assert await _drain(redis) == ["podcast", "track-1", "track-2"]
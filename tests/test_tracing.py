@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+
+from core import tracing
+
+trace = pytest.importorskip("opentelemetry.trace")
+
+_TRACE_ID = 0x4BF92F3577B34DA6A3CE929D0E0E4736
+
+
+def test_worker_span_continues_the_enqueue_trace() -> None:
+    parent = trace.SpanContext(
+        trace_id=_TRACE_ID,
+        span_id=0x00F067AA0BA902B7,
+        is_remote=False,
+        trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+    )
+    with trace.use_span(trace.NonRecordingSpan(parent)):
+        carrier = tracing.inject()
+    assert carrier["traceparent"].split("-")[1] == f"{_TRACE_ID:032x}"
+
+    # e.g. the worker, with the carrier stored on the job
+    with tracing.span("forge.job", carrier=carrier, **{"job.id": "j1"}):
+        inner = tracing.inject()
+    assert inner["traceparent"].split("-")[1] == f"{_TRACE_ID:032x}"
+
+
+def test_span_without_parent_is_harmless() -> None:
+    with tracing.span("db.session", missing=None) as span:
+        span.set_attribute("rows", 1)
+    assert tracing.inject() == {}
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import yt_dlp
+
+from providers.ytdlp_common import (
+    RESUME_OPTS,
+    DownloadAbortedError,
+    DownloadIncompleteError,
+    SizeCheck,
+    abort_hook,
+    downloaded_file,
+    run_abortable,
+)
+
+_DATA = os.urandom(300_000)
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """Serves _DATA with Range support; the download GET #2 is cut short."""
+
+    requests: list[str | None] = []
+
+    def log_message(self, *args: object) -> None:
+        return None
+
+    def do_GET(self) -> None:
+        rng = self.headers.get("Range")
+        self.requests.append(rng)
+        start = int(rng.split("=")[1].split("-")[0]) if rng else 0
+        body = _DATA[start:]
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if rng:
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(_DATA) - 1}/{len(_DATA)}"
+            )
+        self.end_headers()
+        self.close_connection = True
+        # The first GET is yt-dlp's generic extractor sniffing the URL
+        if len(self.requests) == 2:
+            body = body[:100_000]
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def flaky_url() -> Iterator[str]:
+    _FlakyHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/track.mp3"
+    server.shutdown()
+
+
+def test_retry_resumes_from_partial_file(
+    flaky_url: str, tmp_path: Path
+) -> None:
+    opts = {
+        **RESUME_OPTS,
+        "quiet": True,
+        "noprogress": True,
+        "retries": 0,
+        "outtmpl": str(tmp_path / "%(title)s.%(ext)s"),
+    }
+    with pytest.raises(yt_dlp.utils.DownloadError):
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            ydl.extract_info(flaky_url)
+    # The requests handler keeps whole blocks only, urllib all 100000 bytes
+    partial = (tmp_path / "track.mp3.part").stat().st_size
+    assert 0 < partial <= 100_000
+
+    size_check = SizeCheck()
+    with yt_dlp.YoutubeDL({**opts, "progress_hooks": [size_check]}) as ydl:
+        info = ydl.extract_info(flaky_url)
+    size_check.raise_if_failed()
+
+    assert _FlakyHandler.requests[-1] == f"bytes={partial}-"
+    path = downloaded_file(info, str(tmp_path), "mp3")
+    assert Path(path).read_bytes() == _DATA
+
+
+def test_size_check_discards_wrong_sized_file(tmp_path: Path) -> None:
+    short = tmp_path / "a.mp3"
+    short.write_bytes(b"x" * 10)
+    check = SizeCheck()
+
+    check({"status": "finished", "filename": str(short), "total_bytes": 20})
+
+    assert not short.exists()
+    with pytest.raises(DownloadIncompleteError, match="10 of 20"):
+        check.raise_if_failed()
+
+
+def test_downloaded_file_rejects_empty_output(tmp_path: Path) -> None:
+    (tmp_path / "t.mp3").write_bytes(b"")
+    info = {"requested_downloads": [{"filepath": str(tmp_path / "t.mp3")}]}
+    with pytest.raises(DownloadIncompleteError):
+        downloaded_file(info, str(tmp_path), "mp3")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_download_thread_is_aborted() -> None:
+    abort = threading.Event()
+    hook = abort_hook(abort)
+    stopped: list[BaseException] = []
+
+    def download() -> None:
+        try:
+            while True:
+                hook({"status": "downloading"})
+                time.sleep(0.01)
+        except DownloadAbortedError as e:
+            stopped.append(e)
+            raise
+
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.1):
+            await run_abortable(download, abort)
+
+    deadline = time.monotonic() + 2
+    while not stopped and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    assert stopped
@@ -1,12 +1,43 @@
 from __future__ import annotations
 
-import subprocess
+import asyncio
+import base64
+import struct
+import tempfile
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from anyio import to_thread
-
+from core import tracing
+from core.infra.executor import run_blocking
 from core.settings import get_settings
 
+if TYPE_CHECKING:
+    from core.domain.job import OutputProfile
+
+# ffmpeg can be chatty on long inputs; only the tail is useful for errors
+_STDERR_TAIL_LINES = 40
+_STDERR_LINE_MAX = 1000
+
+# ADTS .aac cannot hold tags or a cover; put AAC in an MP4 container
+_EXTENSIONS = {"aac": "m4a"}
+
+# Muxers that store the cover as an attached picture stream; Ogg needs a
+# METADATA_BLOCK_PICTURE comment instead
+_PICTURE_STREAM_FORMATS = {"mp3", "flac", "aac"}
+
+
+@dataclass
+class TranscodeProgress:
+    position: float
+    duration: float | None
+    speed: float | None
+
+
+TranscodeProgressHook = Callable[[TranscodeProgress], None]
+
 
 def _args_for(format: str, quality: str) -> list[str]:
     f = format.lower()
@@ -31,26 +62,296 @@ def _args_for(format: str, quality: str) -> list[str]:
     return ["-c:a", "copy"]
 
 
+def output_extension(format: str) -> str:
+    f = format.lower()
+    return _EXTENSIONS.get(f, f)
+
+
+def _image_mime(head: bytes) -> str | None:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    return None
+
+
+def _picture_block(data: bytes, mime: str) -> str:
+    """Base64 FLAC PICTURE block: cover art as a Vorbis comment value."""
+    m = mime.encode("ascii")
+    block = (
+        struct.pack(">II", 3, len(m))  # 3 = front cover
+        + m
+        + struct.pack(">I", 0)  # empty description
+        + struct.pack(">5I", 0, 0, 0, 0, len(data))
+        + data
+    )
+    return base64.b64encode(block).decode("ascii")
+
+
+def _escape_ffmetadata(value: str) -> str:
+    for ch in "\\=;#\n":
+        value = value.replace(ch, "\\" + ch)
+    return value
+
+
+def _write_ffmetadata(path: Path, tags: dict[str, str]) -> None:
+    lines = [";FFMETADATA1"] + [
+        f"{_escape_ffmetadata(k)}={_escape_ffmetadata(v)}"
+        for k, v in tags.items()
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _tagging_args(
+    formats: list[str],
+    metadata: dict[str, str],
+    cover: Path | None,
+    meta_dir: Path,
+) -> tuple[list[str], list[list[str]]]:
+    """
+    Extra inputs, then per-output options, that write tags and cover art.
+
+    Tags go through ffmetadata files rather than -metadata so that long
+    values (a base64 cover for Ogg) stay clear of the argv size limit; Ogg
+    outputs get their own file so other containers don't copy that blob.
+    Reads the cover and writes into ``meta_dir``: call off the event loop.
+    """
+    formats = [f.lower() for f in formats]
+    inputs: list[str] = []
+
+    def add_input(*args: str) -> str:
+        # Input 0 is the audio; extra inputs are numbered from 1
+        inputs.extend(args)
+        return str(inputs.count("-i"))
+
+    tags_input = picture_input = ogg_input = None
+    if metadata:
+        _write_ffmetadata(meta_dir / "tags.ffmeta", metadata)
+        tags_input = add_input(
+            "-f", "ffmetadata", "-i", str(meta_dir / "tags.ffmeta")
+        )
+    picture_codec = "copy"
+    if cover is not None:
+        data = cover.read_bytes()
+        mime = _image_mime(data[:8])
+        if _PICTURE_STREAM_FORMATS.intersection(formats):
+            # JPEG/PNG go in as-is; anything else (webp) is re-encoded
+            picture_codec = "copy" if mime else "mjpeg"
+            picture_input = add_input("-i", str(cover))
+        if "opus" in formats and mime:
+            ogg_tags = {
+                **metadata,
+                "METADATA_BLOCK_PICTURE": _picture_block(data, mime),
+            }
+            _write_ffmetadata(meta_dir / "ogg.ffmeta", ogg_tags)
+            ogg_input = add_input(
+                "-f", "ffmetadata", "-i", str(meta_dir / "ogg.ffmeta")
+            )
+
+    per_output: list[list[str]] = []
+    for f in formats:
+        opts = ["-map", "0:a"]
+        meta = ogg_input if f == "opus" and ogg_input else tags_input
+        if meta is not None:
+            opts += ["-map_metadata", meta]
+        if picture_input is not None and f in _PICTURE_STREAM_FORMATS:
+            opts += ["-map", f"{picture_input}:v", "-c:v", picture_codec]
+            opts += ["-disposition:v", "attached_pic"]
+        if f == "mp3":
+            opts += ["-id3v2_version", "3"]
+        per_output.append(opts)
+    return inputs, per_output
+
+
+def _parse_speed(value: str) -> float | None:
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:
+        return None
+
+
+def parse_progress_block(block: dict[str, str]) -> float | None:
+    """Return output position in seconds from one ``-progress`` block."""
+    # out_time_ms is misnamed by ffmpeg and holds microseconds as well
+    for key in ("out_time_us", "out_time_ms"):
+        raw = block.get(key)
+        if raw and raw.lstrip("-").isdigit():
+            return max(int(raw), 0) / 1_000_000
+    return None
+
+
+async def _read_progress(
+    stream: asyncio.StreamReader,
+    duration: float | None,
+    progress: TranscodeProgressHook | None,
+) -> None:
+    block: dict[str, str] = {}
+    async for raw in stream:
+        key, _, value = (
+            raw.decode("utf-8", errors="ignore").strip().partition("=")
+        )
+        if key != "progress":
+            block[key] = value
+            continue
+        position = parse_progress_block(block)
+        if progress is not None and position is not None:
+            progress(
+                TranscodeProgress(
+                    position=position,
+                    duration=duration,
+                    speed=_parse_speed(block.get("speed", "")),
+                )
+            )
+        block = {}
+
+
+async def _drain_stderr(stream: asyncio.StreamReader, tail: deque[str]) -> None:
+    async for raw in stream:
+        tail.append(raw.decode("utf-8", errors="ignore")[:_STDERR_LINE_MAX])
+
+
+@dataclass(frozen=True)
+class TranscodeOutput:
+    format: str
+    quality: str
+    # Copy the audio stream; only the container, tags and cover change
+    remux: bool = False
+
+
+def output_suffixes(
+    outputs: Sequence[TranscodeOutput | OutputProfile],
+) -> list[str]:
+    """
+    How each output's file name ends: ".mp3", or "-320.mp3" when a
+    container repeats.
+    """
+    exts = [output_extension(o.format) for o in outputs]
+    return [
+        f"-{o.quality.lower()}.{ext}" if exts.count(ext) > 1 else f".{ext}"
+        for o, ext in zip(outputs, exts, strict=True)
+    ]
+
+
+def output_paths(
+    input_path: Path, output_dir: Path, outputs: list[TranscodeOutput]
+) -> list[Path]:
+    """Output files, named by quality when a container repeats."""
+    return [
+        output_dir / f"{input_path.stem}{suffix}"
+        for suffix in output_suffixes(outputs)
+    ]
+
+
 async def transcode(
-    input_path: Path, output_dir: Path, target_format: str, quality: str
+    input_path: Path,
+    output_dir: Path,
+    target_format: str,
+    quality: str,
+    *,
+    duration: float | None = None,
+    progress: TranscodeProgressHook | None = None,
+    metadata: dict[str, str] | None = None,
+    cover: Path | None = None,
+    remux: bool = False,
 ) -> Path:
+    """
+    Encode ``input_path`` to ``target_format``, writing ``metadata`` tags
+    and ``cover`` art in the same pass.
+    """
+    (out,) = await transcode_many(
+        input_path,
+        output_dir,
+        [TranscodeOutput(target_format, quality, remux)],
+        duration=duration,
+        progress=progress,
+        metadata=metadata,
+        cover=cover,
+    )
+    return out
+
+
+async def transcode_many(
+    input_path: Path,
+    output_dir: Path,
+    outputs: list[TranscodeOutput],
+    *,
+    duration: float | None = None,
+    progress: TranscodeProgressHook | None = None,
+    metadata: dict[str, str] | None = None,
+    cover: Path | None = None,
+) -> list[Path]:
+    """
+    Produce every output from one ffmpeg process: the input is read and
+    decoded once, then encoded per mapped output.
+    """
     output_dir.mkdir(parents=True, exist_ok=True)
-    out = output_dir / (input_path.stem + f".{target_format}")
-    ffmpeg = get_settings().ffmpeg_bin
-    args: list[str] = [
-        ffmpeg,
-        "-y",
-        "-i",
-        str(input_path),
-        *(_args_for(target_format, quality)),
-        str(out),
-    ]
+    paths = output_paths(input_path, output_dir, outputs)
+    with tempfile.TemporaryDirectory(prefix="forge-ffmeta-") as meta_dir:
+        tag_inputs, tag_outputs = await run_blocking(
+            _tagging_args,
+            [o.format for o in outputs],
+            metadata or {},
+            cover,
+            Path(meta_dir),
+        )
+        args: list[str] = [
+            get_settings().ffmpeg_bin,
+            "-y",
+            "-nostdin",
+            "-nostats",
+            "-progress",
+            "pipe:1",
+            "-i",
+            str(input_path),
+            *tag_inputs,
+        ]
+        for o, opts, path in zip(outputs, tag_outputs, paths, strict=True):
+            codec = (
+                ["-c:a", "copy"] if o.remux else _args_for(o.format, o.quality)
+            )
+            args += [*opts, *codec, str(path)]
+        await _run(args, input_path, paths, outputs, duration, progress)
+    return paths
 
-    def _run() -> None:
-        proc = subprocess.run(args, capture_output=True)
-        if proc.returncode != 0:
-            msg = proc.stderr.decode("utf-8", errors="ignore")
-            raise RuntimeError(f"ffmpeg failed: {msg}")
 
-    await to_thread.run_sync(_run)
-    return out
+async def _run(
+    args: list[str],
+    input_path: Path,
+    paths: list[Path],
+    outputs: list[TranscodeOutput],
+    duration: float | None,
+    progress: TranscodeProgressHook | None,
+) -> None:
+    # Dotted names can't be keywords; None values are dropped by span()
+    attributes: dict[str, Any] = {
+        "media.duration_s": duration,
+        "input.bytes": input_path.stat().st_size,
+    }
+    with tracing.span(
+        "ffmpeg.transcode",
+        format=",".join(o.format for o in outputs),
+        quality=",".join(o.quality for o in outputs),
+        **attributes,
+    ) as span:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        assert proc.stdout is not None and proc.stderr is not None
+        tail: deque[str] = deque(maxlen=_STDERR_TAIL_LINES)
+        try:
+            await asyncio.gather(
+                _read_progress(proc.stdout, duration, progress),
+                _drain_stderr(proc.stderr, tail),
+            )
+            returncode = await proc.wait()
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        span.set_attribute("ffmpeg.returncode", returncode)
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed: {''.join(tail)}")
+        span.set_attribute("output.bytes", sum(p.stat().st_size for p in paths))
@@ -1,28 +1,55 @@
 from __future__ import annotations
 
+import logging
 from typing import Any
 
+from arq import cron
 from arq.connections import RedisSettings
 
+from core import metrics, profiling, tracing
 from core.domain.job import Job, JobStatus
 from core.infra.db import create_db_and_tables, session_scope
+from core.infra.executor import run_blocking
+from core.infra.redis import get_async_redis
+from core.services import leases, retention, scheduler
 from core.services.download_orchestrator import process_job
 from core.settings import get_settings
+from storage import get_storage
 
+logger = logging.getLogger(__name__)
 
-async def startup(_: Any) -> None:  # pragma: no cover - worker bootstrap
+
+async def startup(ctx: Any) -> None:  # pragma: no cover - worker bootstrap
     # Ensure DB tables exist
     create_db_and_tables()
+    if _settings.worker_metrics_port:
+        metrics.start_exporter(_settings.worker_metrics_port)
+    tracing.configure_tracing(_settings, service_suffix="-worker")
+    ctx["loop_monitor"] = profiling.start_loop_monitor()
 
 
-async def shutdown(_: Any) -> None:  # pragma: no cover - worker bootstrap
-    # Nothing to cleanup yet
-    return None
+async def shutdown(ctx: Any) -> None:  # pragma: no cover - worker bootstrap
+    monitor = ctx.get("loop_monitor")
+    if monitor is not None:
+        await monitor.stop()
 
 
-async def process_download(ctx: Any, job_id: str) -> None:
+async def _process_profiled(job_id: str) -> None:
+    # Armed via POST /debug/profile/jobs/{job_id}
+    if not await profiling.job_profile_requested(get_async_redis(), job_id):
+        await process_job(job_id)
+        return
+    profiler = profiling.SamplingProfiler().start()
     try:
         await process_job(job_id)
+    finally:
+        path = profiling.save_profile(f"job-{job_id}", profiler.stop())
+        logger.info("Profile of job %s saved to %s", job_id, path)
+
+
+async def process_download(ctx: Any, job_id: str) -> None:
+    try:
+        await _process_profiled(job_id)
     except Exception as e:  # noqa: BLE001
         # Mark as failed
         with session_scope() as s:
@@ -36,13 +63,49 @@ async def process_download(ctx: Any, job_id: str) -> None:
         return None
 
 
+async def process_next(ctx: Any) -> None:
+    """
+    Ticket task: run whichever job the fair-share scheduler picks next.
+
+    Every submitted job enqueues exactly one ticket, so tickets and pending
+    jobs stay in balance; the order is decided here, not by arq's FIFO.
+    """
+    picked = await scheduler.next_job(ctx["redis"])
+    if picked is None:
+        return None
+    _, _, job_id = picked
+    await process_download(ctx, job_id)
+
+
+async def reap_stale_jobs(ctx: Any) -> int:
+    """Cron: requeue jobs left running by a worker that died."""
+    return await leases.reap_expired()
+
+
+async def enforce_retention(ctx: Any) -> int:
+    """Cron: evict least recently downloaded jobs past STORAGE_QUOTA_MB."""
+    evicted = await run_blocking(retention.enforce_quota, get_storage())
+    return len(evicted)
+
+
 # Resolve Redis settings from env via our settings provider
 _settings = get_settings()
 
 
 class WorkerSettings:  # pragma: no cover - settings container used by arq CLI
-    functions = [process_download]
+    functions = [process_download, process_next]
+    # unique (the default): one worker runs each tick
+    cron_jobs = [
+        cron(reap_stale_jobs, second={0, 30}, run_at_startup=True),
+        cron(enforce_retention, minute=set(range(0, 60, 5)), second=15),
+    ]
     on_startup = startup
     on_shutdown = shutdown
     redis_settings = RedisSettings.from_dsn(_settings.redis_url)
     max_jobs = 1
+    # Outlast the per-stage limits, so they and not arq end a slow job
+    job_timeout = (
+        _settings.download_timeout_seconds
+        + _settings.transcode_timeout_seconds
+        + 60
+    )